@@ -0,0 +1,411 @@
+"""Нагрузочный прогон API внутри процесса.
+
+Наполняет базу синтетическими данными заданного размера, гоняет запросы
+к эндпоинтам ``api/urls.py`` через тестовый клиент Django и собирает по
+каждому эндпоинту перцентили задержки, пропускную способность и число
+SQL-запросов. Отчёт сохраняется в JSON и сравнивается с прошлыми.
+Отдельный прогон ``measure_concurrency`` гоняет живой сервер по HTTP с
+заданным числом одновременных соединений.
+"""
+import json
+import platform
+import socket
+import subprocess
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+
+import django
+from api.query_plan import plan_queryset
+from api.renderers import FastJSONParser, FastJSONRenderer
+from api.serializers import (CommentSerializer, ReviewSerializer,
+                             TitleReadSerializer)
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.search import rebuild_index
+from users.authentication import add_user_claims
+from users.models import User
+
+DEFAULT_SIZES = {
+    'users': 200,
+    'categories': 10,
+    'genres': 30,
+    'titles': 1000,
+    'genres_per_title': 3,
+    'reviews_per_title': 20,
+    'comments_per_review': 2,
+}
+
+BATCH_SIZE = 1000
+
+WORDS = (
+    'произведение', 'отзыв', 'сюжет', 'герой', 'автор', 'финал', 'мир',
+    'история', 'книга', 'фильм', 'песня', 'тьма', 'свет', 'путь', 'море',
+)
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed(sizes, rng):
+    """Создаёт синтетический набор данных, возвращает его описание."""
+    User.objects.bulk_create(
+        User(username=f'bench_user_{i}', email=f'bench_{i}@yamdb.fake')
+        for i in range(sizes['users'])
+    )
+    users = list(User.objects.filter(username__startswith='bench_user_'))
+    Category.objects.bulk_create(
+        Category(name=f'Категория {i}', slug=f'bench-category-{i}')
+        for i in range(sizes['categories'])
+    )
+    categories = list(Category.objects.filter(slug__startswith='bench-'))
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {i}', slug=f'bench-genre-{i}')
+        for i in range(sizes['genres'])
+    )
+    genres = list(Genre.objects.filter(slug__startswith='bench-'))
+    Title.objects.bulk_create(
+        (Title(name=f'{_text(rng, 2).capitalize()} {i}',
+               year=rng.randint(1900, 2020),
+               description=_text(rng, 20),
+               category=rng.choice(categories))
+         for i in range(sizes['titles']))
+    )
+    titles = list(Title.objects.order_by('pk').values_list('pk', flat=True))
+    links = [
+        Title.genre.through(title_id=title_id, genre_id=genre.pk)
+        for title_id in titles
+        for genre in rng.sample(
+            genres, min(sizes['genres_per_title'], len(genres))
+        )
+    ]
+    Title.genre.through.objects.bulk_create(links)
+    # bulk_create не шлёт post_save: индекс поиска строим целиком.
+    rebuild_index(Title.objects.db)
+    per_title = min(sizes['reviews_per_title'], len(users))
+    step = max(1, BATCH_SIZE // max(1, per_title))
+    for start in range(0, len(titles), step):
+        chunk = titles[start:start + step]
+        Review.objects.bulk_create(
+            Review(title_id=title_id, author=author,
+                   text=_text(rng, 30), score=rng.randint(1, 10))
+            for title_id in chunk
+            for author in rng.sample(users, per_title)
+        )
+    reviews = Review.objects.order_by('pk').values_list('pk', 'title_id')
+    comments = (
+        Comment(review_id=review_id, author=rng.choice(users),
+                text=_text(rng, 12))
+        for review_id, _ in reviews.iterator()
+        for _ in range(sizes['comments_per_review'])
+    )
+    batch = []
+    for comment in comments:
+        batch.append(comment)
+        if len(batch) == BATCH_SIZE:
+            Comment.objects.bulk_create(batch)
+            batch = []
+    Comment.objects.bulk_create(batch)
+    return describe()
+
+
+def describe():
+    """Что лежит в базе: размеры таблиц и объекты для адресов запросов."""
+    review = Review.objects.order_by('-pk').first()
+    return {
+        'sizes': {
+            'users': User.objects.count(),
+            'categories': Category.objects.count(),
+            'genres': Genre.objects.count(),
+            'titles': Title.objects.count(),
+            'reviews': Review.objects.count(),
+            'comments': Comment.objects.count(),
+        },
+        'title_id': review.title_id if review else None,
+        'review_id': review.pk if review else None,
+        'genre': Genre.objects.values_list('slug', flat=True).first(),
+        'category': Category.objects.values_list('slug', flat=True).first(),
+        'user_id': User.objects.values_list('pk', flat=True).first(),
+    }
+
+
+def default_scenarios(dataset):
+    """Эндпоинты и адреса, которые гоняет прогон: (имя, url, с токеном)."""
+    title = f'/api/v1/titles/{dataset["title_id"]}'
+    review = f'{title}/reviews/{dataset["review_id"]}'
+    deep_page = max(1, dataset['sizes']['titles'] // api_settings.PAGE_SIZE
+                    // 2)
+    return [
+        ('categories', '/api/v1/categories/', False),
+        ('genres', '/api/v1/genres/', False),
+        ('titles', '/api/v1/titles/', False),
+        ('titles_deep_page', f'/api/v1/titles/?page={deep_page}', False),
+        ('titles_cursor', '/api/v1/titles/?pagination=cursor', False),
+        ('titles_filtered',
+         f'/api/v1/titles/?genre={dataset["genre"]}'
+         f'&category={dataset["category"]}', False),
+        ('titles_search', '/api/v1/titles/?search=история', False),
+        ('title_detail', f'{title}/', False),
+        ('reviews', f'{title}/reviews/', False),
+        ('reviews_authenticated', f'{title}/reviews/', True),
+        ('review_detail', f'{review}/', False),
+        ('comments', f'{review}/comments/', False),
+    ]
+
+
+def percentile(values, q):
+    """Перцентиль по ближайшему рангу, values отсортированы."""
+    if not values:
+        return None
+    rank = max(0, min(len(values) - 1, round(q / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def measure(client, url, iterations, warmup, headers):
+    for _ in range(warmup):
+        client.get(url, **headers)
+    timings, queries, sizes = [], [], []
+    statuses = set()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as context:
+            request_started = time.perf_counter()
+            response = client.get(url, **headers)
+            timings.append(time.perf_counter() - request_started)
+        queries.append(len(context.captured_queries))
+        sizes.append(len(response.content))
+        statuses.add(response.status_code)
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    return {
+        'url': url,
+        'iterations': iterations,
+        'statuses': sorted(statuses),
+        'p50_ms': percentile(timings, 50) * 1000,
+        'p95_ms': percentile(timings, 95) * 1000,
+        'p99_ms': percentile(timings, 99) * 1000,
+        'mean_ms': sum(timings) / len(timings) * 1000,
+        'throughput_rps': iterations / elapsed if elapsed else None,
+        'queries': max(queries),
+        'queries_mean': sum(queries) / len(queries),
+        'response_bytes': max(sizes),
+    }
+
+
+def auth_headers(user_id):
+    user = User.objects.get(pk=user_id)
+    token = add_user_claims(RefreshToken.for_user(user), user).access_token
+    return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(dataset, scenarios, iterations, warmup):
+    """Гоняет сценарии и собирает отчёт."""
+    client = Client()
+    headers = auth_headers(dataset['user_id']) if dataset['user_id'] else {}
+    endpoints = {}
+    for name, url, authenticated in scenarios:
+        endpoints[name] = measure(
+            client, url, iterations, warmup,
+            headers if authenticated else {}
+        )
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'dataset': dataset['sizes'],
+            'iterations': iterations,
+            'warmup': warmup,
+        },
+        'endpoints': endpoints,
+    }
+
+
+def _timed(function, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return percentile(timings, 50) * 1000, result
+
+
+def renderer_payloads(rows):
+    """Страницы каждого сериализатора списков для замеров рендереров."""
+    return [
+        ('titles', TitleReadSerializer, plan_queryset(
+            Title.objects.order_by('pk'), TitleReadSerializer
+        )[:rows]),
+        ('reviews', ReviewSerializer, plan_queryset(
+            Review.objects.order_by('pk'), ReviewSerializer
+        )[:rows]),
+        ('comments', CommentSerializer, plan_queryset(
+            Comment.objects.order_by('pk'), CommentSerializer
+        )[:rows]),
+    ]
+
+
+def measure_renderers(rows=100, iterations=50):
+    """Микробенчмарк: сериализация, рендеринг и разбор JSON.
+
+    Для каждого сериализатора сравниваются рендерер DRF, он же с
+    экранированием не-ASCII символов и рендерер на orjson.
+    """
+    ascii_renderer = JSONRenderer()
+    ascii_renderer.ensure_ascii = True
+    renderers = (
+        ('drf', JSONRenderer(), JSONParser()),
+        ('drf_ascii', ascii_renderer, JSONParser()),
+        ('fast', FastJSONRenderer(), FastJSONParser()),
+    )
+    results = {}
+    for name, serializer_class, queryset in renderer_payloads(rows):
+        instances = list(queryset)
+        serialize_ms, data = _timed(
+            lambda: serializer_class(instances, many=True).data, iterations
+        )
+        results[name] = {'rows': len(instances),
+                         'serialize_ms': serialize_ms}
+        for label, renderer, parser in renderers:
+            render_ms, body = _timed(
+                lambda: renderer.render(data), iterations
+            )
+            parse_ms, _ = _timed(
+                lambda: parser.parse(BytesIO(body)), iterations
+            )
+            results[name][label] = {
+                'render_ms': render_ms,
+                'parse_ms': parse_ms,
+                'bytes': len(body),
+            }
+    return results
+
+
+def _fetch(url, headers, timeout):
+    request = urllib.request.Request(url, headers=headers)
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as error:
+        status = error.code
+    except OSError:
+        status = None
+    return status, time.perf_counter() - started
+
+
+def _ms(value):
+    return value * 1000 if value is not None else None
+
+
+@contextmanager
+def slow_clients(base_url, count):
+    """Соединения, которые начали запрос и не дописывают заголовки.
+
+    Синхронный воркер gunicorn, принявший такое соединение, простаивает
+    до таймаута; так без nginx ведут себя медленные клиенты.
+    """
+    parts = urllib.parse.urlsplit(base_url)
+    sockets = []
+    try:
+        for _ in range(count):
+            sock = socket.create_connection(
+                (parts.hostname, parts.port or 80)
+            )
+            sock.sendall(
+                f'GET / HTTP/1.1\r\nHost: {parts.hostname}\r\n'.encode()
+            )
+            sockets.append(sock)
+        yield
+    finally:
+        for sock in sockets:
+            sock.close()
+
+
+def measure_concurrency(base_url, paths, levels, requests, headers=None,
+                        timeout=10.0):
+    """Задержки и пропускная способность живого сервера по HTTP.
+
+    Для каждого уровня одновременно держится ``level`` соединений, пока
+    не будет отправлено ``requests`` запросов по адресам ``paths``.
+    """
+    headers = headers or {}
+    urls = [base_url.rstrip('/') + path for path in paths]
+    results = {}
+    for level in levels:
+        total = max(requests, level)
+        with ThreadPoolExecutor(max_workers=level) as executor:
+            started = time.perf_counter()
+            outcomes = list(executor.map(
+                lambda index: _fetch(
+                    urls[index % len(urls)], headers, timeout
+                ),
+                range(total)
+            ))
+            elapsed = time.perf_counter() - started
+        timings = sorted(
+            timing for status, timing in outcomes if status == 200
+        )
+        results[f'c{level}'] = {
+            'concurrency': level,
+            'requests': total,
+            'failed': total - len(timings),
+            'p50_ms': _ms(percentile(timings, 50)),
+            'p95_ms': _ms(percentile(timings, 95)),
+            'p99_ms': _ms(percentile(timings, 99)),
+            'throughput_rps': len(timings) / elapsed if elapsed else None,
+        }
+    return results
+
+
+def compare(report, baseline, metrics=('p50_ms', 'p95_ms', 'queries')):
+    """Строки сравнения отчёта с базовым по общим эндпоинтам."""
+    lines = []
+    for name, current in report['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if previous is None:
+            continue
+        parts = []
+        for metric in metrics:
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            parts.append(f'{metric} {old:.2f} -> {new:.2f} '
+                         f'({(new - old) / old * 100:+.0f}%)')
+        lines.append(f'{name}: ' + ', '.join(parts))
+    return lines
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as report:
+        return json.load(report)
+
+
+def save_report(report, path):
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump(report, output, ensure_ascii=False, indent=2)
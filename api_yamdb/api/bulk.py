@@ -0,0 +1,289 @@
+"""Массовое создание и обновление объектов каталога.
+
+Пачка валидируется поштучно без запросов к базе, затем слаги и имена
+разрешаются одним запросом на тип, существующие объекты находятся одним
+запросом по естественному ключу, а запись идёт через ``bulk_create`` и
+``bulk_update`` в одной транзакции. Ошибки отдельных элементов
+возвращаются в ответе и не мешают сохранить остальные.
+"""
+from api.serializers import (CategoryBulkSerializer, GenreBulkSerializer,
+                             ReviewBulkSerializer, TitleBulkSerializer)
+from api.signals import invalidate_on_commit, title_namespaces
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+from reviews import facets
+from reviews.models import ArchivedReview, Category, Genre, Review, Title
+from reviews.search import index_titles
+from users.models import User
+
+NON_FIELD = api_settings.NON_FIELD_ERRORS_KEY
+
+
+def bulk_create_with_ids(model, objs):
+    """bulk_create, после которого у объектов заполнены первичные ключи."""
+    model.objects.bulk_create(objs)
+    if objs and objs[0].pk is None:
+        # SQLite не возвращает id из вставки. До конца транзакции
+        # писать в базу можем только мы, так что наши строки — последние.
+        ids = model.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        )[:len(objs)]
+        for obj, pk in zip(objs, reversed(list(ids))):
+            obj.pk = pk
+
+
+def run_bulk_upsert(upsert_class, items):
+    """Проверяет тело запроса и выполняет массовую загрузку."""
+    if not isinstance(items, list):
+        raise ValidationError({NON_FIELD: ['Ожидается список объектов.']})
+    if len(items) > settings.API_BULK_MAX_ITEMS:
+        raise ValidationError({NON_FIELD: [
+            f'Не больше {settings.API_BULK_MAX_ITEMS} объектов за запрос.'
+        ]})
+    return upsert_class(items).run()
+
+
+class BulkUpsert:
+    """Создание и обновление пачки объектов по естественному ключу."""
+    model = None
+    serializer_class = None
+    update_fields = ()
+    duplicate_message = 'Объект повторяется в пачке.'
+
+    def __init__(self, items):
+        self.items = items
+        self.results = [None] * len(items)
+
+    def error(self, index, errors):
+        self.results[index] = {'errors': errors}
+
+    def key(self, data):
+        raise NotImplementedError
+
+    def validate(self):
+        valid, seen = {}, set()
+        for index, item in enumerate(self.items):
+            serializer = self.serializer_class(data=item)
+            if not serializer.is_valid():
+                self.error(index, serializer.errors)
+                continue
+            key = self.key(serializer.validated_data)
+            if key in seen:
+                self.error(index, {NON_FIELD: [self.duplicate_message]})
+                continue
+            seen.add(key)
+            valid[index] = serializer.validated_data
+        return valid
+
+    def resolve(self, valid):
+        """Разрешает ссылки пачки, отбрасывая элементы с ошибками."""
+        return valid
+
+    def existing(self, valid):
+        """Существующие объекты пачки по ключу, одним запросом."""
+        raise NotImplementedError
+
+    def fill(self, obj, data):
+        for field in self.update_fields:
+            setattr(obj, field, data.get(field, getattr(obj, field)))
+
+    def after_save(self, valid, objs):
+        pass
+
+    def run(self):
+        valid = self.resolve(self.validate())
+        existing = self.existing(valid)
+        objs, created, updated = {}, [], []
+        for index, data in valid.items():
+            obj = existing.get(self.key(data))
+            (created if obj is None else updated).append(index)
+            obj = obj or self.model()
+            self.fill(obj, data)
+            objs[index] = obj
+        with transaction.atomic():
+            bulk_create_with_ids(
+                self.model, [objs[index] for index in created]
+            )
+            if updated:
+                self.model.objects.bulk_update(
+                    [objs[index] for index in updated], self.update_fields
+                )
+            self.after_save(valid, objs)
+        for status, indexes in (('created', created), ('updated', updated)):
+            for index in indexes:
+                self.results[index] = {'id': objs[index].pk,
+                                       'status': status}
+        return {
+            'created': len(created),
+            'updated': len(updated),
+            'errors': len(self.items) - len(valid),
+            'results': self.results,
+        }
+
+
+class SlugUpsert(BulkUpsert):
+    update_fields = ('name', 'slug')
+    duplicate_message = 'Слаг повторяется в пачке.'
+
+    def key(self, data):
+        return data['slug']
+
+    def existing(self, valid):
+        return self.model.objects.in_bulk(
+            [data['slug'] for data in valid.values()], field_name='slug'
+        )
+
+    def after_save(self, valid, objs):
+        # Счётчики фасетов ссылаются на id и от имён и слагов не зависят.
+        invalidate_on_commit(self.namespace)
+
+
+class CategoryUpsert(SlugUpsert):
+    model = Category
+    serializer_class = CategoryBulkSerializer
+    namespace = 'category'
+
+
+class GenreUpsert(SlugUpsert):
+    model = Genre
+    serializer_class = GenreBulkSerializer
+    namespace = 'genre'
+
+
+class TitleUpsert(BulkUpsert):
+    """Произведения: с ``id`` обновляются, без него создаются."""
+    model = Title
+    serializer_class = TitleBulkSerializer
+    update_fields = ('name', 'year', 'description', 'category_id')
+    duplicate_message = 'Произведение повторяется в пачке.'
+
+    def key(self, data):
+        return data.get('id') or object()
+
+    def slugs(self, valid, field):
+        values = set()
+        for data in valid.values():
+            value = data.get(field)
+            if isinstance(value, list):
+                values.update(value)
+            elif value:
+                values.add(value)
+        return values
+
+    def resolve(self, valid):
+        categories = dict(Category.objects.filter(
+            slug__in=self.slugs(valid, 'category')
+        ).values_list('slug', 'pk'))
+        genres = dict(Genre.objects.filter(
+            slug__in=self.slugs(valid, 'genre')
+        ).values_list('slug', 'pk'))
+        resolved = {}
+        for index, data in valid.items():
+            errors = {}
+            category = data.get('category')
+            if category and category not in categories:
+                errors['category'] = [f'Категория {category} не найдена.']
+            missing = [slug for slug in data.get('genre', ())
+                       if slug not in genres]
+            if missing:
+                errors['genre'] = [f'Жанры не найдены: {", ".join(missing)}.']
+            if errors:
+                self.error(index, errors)
+                continue
+            if 'category' in data:
+                data['category_id'] = categories.get(category)
+            data['genre_ids'] = [genres[slug] for slug in data.get(
+                'genre', ()
+            )]
+            resolved[index] = data
+        return resolved
+
+    def existing(self, valid):
+        ids = [data['id'] for data in valid.values() if data.get('id')]
+        found = self.model.objects.in_bulk(ids)
+        for index, data in list(valid.items()):
+            if data.get('id') and data['id'] not in found:
+                self.error(index, {'id': ['Произведение не найдено.']})
+                del valid[index]
+        # bulk_update обходит сигналы: фасеты сдвигаются по разнице.
+        self.before = facets.title_state(list(found), self.model.objects.db)
+        return found
+
+    def after_save(self, valid, objs):
+        linked = [index for index, data in valid.items() if 'genre' in data]
+        through = Title.genre.through
+        through.objects.filter(
+            title_id__in=[objs[index].pk for index in linked]
+        ).delete()
+        through.objects.bulk_create([
+            through(title_id=objs[index].pk, genre_id=genre_id)
+            for index in linked
+            for genre_id in valid[index]['genre_ids']
+        ])
+        using = self.model.objects.db
+        index_titles(list(objs.values()), using)
+        title_ids = [obj.pk for obj in objs.values()]
+        facets.titles_replaced(
+            self.before, facets.title_state(title_ids, using), using
+        )
+        invalidate_on_commit(*title_namespaces(title_ids))
+
+
+class ReviewUpsert(BulkUpsert):
+    """Отзывы: один на пару произведение и автор, повтор обновляет."""
+    model = Review
+    serializer_class = ReviewBulkSerializer
+    update_fields = ('text', 'score')
+    duplicate_message = 'Отзыв автора на произведение повторяется в пачке.'
+
+    def key(self, data):
+        return data['title'], data['author']
+
+    def resolve(self, valid):
+        titles = set(Title.objects.filter(
+            pk__in={data['title'] for data in valid.values()}
+        ).values_list('pk', flat=True))
+        authors = dict(User.objects.filter(
+            username__in={data['author'] for data in valid.values()}
+        ).values_list('username', 'pk'))
+        resolved = {}
+        for index, data in valid.items():
+            errors = {}
+            if data['title'] not in titles:
+                errors['title'] = ['Произведение не найдено.']
+            if data['author'] not in authors:
+                errors['author'] = ['Пользователь не найден.']
+            if errors:
+                self.error(index, errors)
+                continue
+            data['author_id'] = authors[data['author']]
+            resolved[index] = data
+        return resolved
+
+    def existing(self, valid):
+        pairs = {
+            'title_id__in': {data['title'] for data in valid.values()},
+            'author_id__in': {data['author_id'] for data in valid.values()},
+            'is_deleted': False,
+        }
+        # Архивный отзыв не обновляется, а второй отзыв автора исказил бы
+        # рейтинг: такие элементы отклоняем.
+        archived = set(ArchivedReview.objects.filter(**pairs).values_list(
+            'title_id', 'author_id'
+        ))
+        for index, data in list(valid.items()):
+            if (data['title'], data['author_id']) in archived:
+                self.error(index, {NON_FIELD: [
+                    'Отзыв автора на произведение уже в архиве.'
+                ]})
+                del valid[index]
+        reviews = Review.objects.filter(**pairs).select_related('author')
+        return {(review.title_id, review.author.username): review
+                for review in reviews}
+
+    def fill(self, obj, data):
+        super().fill(obj, data)
+        obj.title_id = data['title']
+        obj.author_id = data['author_id']
@@ -0,0 +1,136 @@
+"""Кеш ответов каталога с версионными ключами.
+
+Ключ ответа складывается из версий пространств имён, от которых ответ
+зависит, роли пользователя и полного пути с параметрами запроса. Запись
+в модель увеличивает версию только своих пространств, и затронутые ответы
+перестают находиться в кеше, а остальные продолжают обслуживаться.
+"""
+import hashlib
+import json
+import threading
+import time
+
+from api.routers import use_primary
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+KEY_PREFIX = 'api'
+
+_stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'invalidations': 0}
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def _count(counter):
+    with _stats_lock:
+        _stats[counter] += 1
+
+
+def get_stats():
+    """Счётчики попаданий и промахов текущего процесса."""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = stats['hits'] / lookups if lookups else None
+    return stats
+
+
+def _version_key(namespace):
+    return f'{KEY_PREFIX}:ver:{namespace}'
+
+
+def get_versions(namespaces):
+    cache = get_cache()
+    keys = [_version_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, 1, timeout=None)
+            versions[key] = cache.get(key, 1)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*namespaces):
+    """Увеличивает версии пространств имён, сбрасывая их ответы."""
+    cache = get_cache()
+    for namespace in namespaces:
+        key = _version_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 2, timeout=None)
+        _count('invalidations')
+
+
+def make_key(request, namespaces):
+    user = request.user
+    role = user.role if user.is_authenticated else 'anonymous'
+    versions = get_versions(namespaces)
+    raw = '|'.join([
+        role,
+        request.get_full_path(),
+        *(f'{name}={version}'
+          for name, version in zip(namespaces, versions)),
+    ])
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'{KEY_PREFIX}:resp:{digest}'
+
+
+def _etag(data):
+    body = json.dumps(data, sort_keys=True, default=str).encode()
+    return '"{}"'.format(hashlib.md5(body).hexdigest())
+
+
+def _not_modified(request, entry):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        return entry['etag'] in (
+            tag.strip() for tag in if_none_match.split(',')
+        ) or if_none_match.strip() == '*'
+    if_modified_since = parse_http_date_safe(
+        request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+    )
+    return (if_modified_since is not None
+            and entry['modified'] <= if_modified_since)
+
+
+def _with_validators(response, entry):
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['modified'])
+    return response
+
+
+def cached_response(request, namespaces, handler):
+    """Отдаёт ответ из кеша или строит и кладёт его туда."""
+    cache = get_cache()
+    key = make_key(request, namespaces)
+    entry = cache.get(key)
+    if entry is None:
+        _count('misses')
+        # Ответ живёт в кеше до следующей записи: отставшая реплика
+        # закрепила бы в нём устаревшие данные.
+        with use_primary():
+            response = handler()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        entry = {
+            'data': response.data,
+            'etag': _etag(response.data),
+            'modified': int(time.time()),
+        }
+        cache.set(key, entry, settings.API_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+    else:
+        _count('hits')
+        response = Response(entry['data'])
+        response['X-Cache'] = 'HIT'
+    if _not_modified(request, entry):
+        _count('not_modified')
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    return _with_validators(response, entry)
@@ -0,0 +1,123 @@
+import random
+
+from api import benchmark
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (override_settings, setup_databases,
+                               teardown_databases)
+
+NO_CACHE = {'default': {
+    'BACKEND': 'django.core.cache.backends.dummy.DummyCache'
+}}
+
+
+class Command(BaseCommand):
+    """Нагрузочный прогон эндпоинтов API на синтетических данных."""
+    help = ('Наполняет одноразовую базу синтетическими данными, гоняет '
+            'запросы к API и пишет отчёт о задержках и числе запросов.')
+
+    def add_arguments(self, parser):
+        for name, default in benchmark.DEFAULT_SIZES.items():
+            parser.add_argument(
+                f'--{name.replace("_", "-")}', type=int, default=default,
+                help=f'Размер набора данных: {name} (по умолчанию '
+                     f'{default}).'
+            )
+        parser.add_argument('--iterations', type=int, default=50,
+                            help='Замеряемых запросов на эндпоинт.')
+        parser.add_argument('--warmup', type=int, default=5,
+                            help='Прогревочных запросов на эндпоинт.')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Зерно генератора данных.')
+        parser.add_argument('--only', nargs='+', metavar='ENDPOINT',
+                            help='Гонять только указанные эндпоинты.')
+        parser.add_argument('--cache', action='store_true',
+                            help='Не отключать кеш ответов API.')
+        parser.add_argument('--no-flat-lists', action='store_true',
+                            help='Отдавать списки отзывов и комментариев '
+                                 'через сериализатор, а не строками values().')
+        parser.add_argument('--renderers', action='store_true',
+                            help='Добавить микробенчмарк JSON-рендереров '
+                                 'и парсеров.')
+        parser.add_argument('--existing-db', action='store_true',
+                            help='Работать с настроенной базой как есть, '
+                                 'без создания тестовой и наполнения.')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Не удалять тестовую базу после прогона.')
+        parser.add_argument('--output', help='Куда сохранить отчёт JSON.')
+        parser.add_argument('--compare', metavar='REPORT',
+                            help='Сравнить с сохранённым отчётом.')
+
+    def handle(self, *args, **options):
+        if options['existing_db']:
+            report = self.run(benchmark.describe(), options)
+        else:
+            old_config = setup_databases(
+                verbosity=0, interactive=False, keepdb=options['keepdb'],
+                aliases=[connection.alias]
+            )
+            try:
+                report = self.run(self.seed(options), options)
+            finally:
+                teardown_databases(
+                    old_config, verbosity=0, keepdb=options['keepdb']
+                )
+        self.print_report(report)
+        if options['output']:
+            benchmark.save_report(report, options['output'])
+            self.stdout.write(f'Отчёт сохранён в {options["output"]}.')
+        if options['compare']:
+            baseline = benchmark.load_report(options['compare'])
+            self.stdout.write(
+                f'Сравнение с {baseline["meta"].get("revision")}:'
+            )
+            for line in benchmark.compare(report, baseline):
+                self.stdout.write(line)
+
+    def seed(self, options):
+        sizes = {name: options[name] for name in benchmark.DEFAULT_SIZES}
+        self.stdout.write(f'Наполнение {connection.vendor}: {sizes}')
+        return benchmark.seed(sizes, random.Random(options['seed']))
+
+    def run(self, dataset, options):
+        scenarios = benchmark.default_scenarios(dataset)
+        if options['only']:
+            scenarios = [scenario for scenario in scenarios
+                         if scenario[0] in options['only']]
+        caches = settings.CACHES if options['cache'] else NO_CACHE
+        flat_lists = not options['no_flat_lists']
+        with override_settings(CACHES=caches, ALLOWED_HOSTS=['*'],
+                               API_FLAT_LISTS=flat_lists):
+            report = benchmark.run(
+                dataset, scenarios, options['iterations'], options['warmup']
+            )
+        report['meta']['flat_lists'] = flat_lists
+        if options['renderers']:
+            report['renderers'] = benchmark.measure_renderers(
+                iterations=options['iterations']
+            )
+        return report
+
+    def print_report(self, report):
+        self.stdout.write(
+            f'{"эндпоинт":<24}{"p50":>9}{"p95":>9}{"p99":>9}'
+            f'{"rps":>9}{"SQL":>6}  статус'
+        )
+        for name, stats in report['endpoints'].items():
+            self.stdout.write(
+                f'{name:<24}{stats["p50_ms"]:>9.2f}{stats["p95_ms"]:>9.2f}'
+                f'{stats["p99_ms"]:>9.2f}{stats["throughput_rps"]:>9.1f}'
+                f'{stats["queries"]:>6}  {stats["statuses"]}'
+            )
+        for name, stats in report.get('renderers', {}).items():
+            self.stdout.write(
+                f'{name} ({stats["rows"]} строк), сериализация '
+                f'{stats["serialize_ms"]:.2f} мс:'
+            )
+            for label in ('drf', 'drf_ascii', 'fast'):
+                self.stdout.write(
+                    f'  {label:<10} рендер {stats[label]["render_ms"]:.3f} мс'
+                    f', разбор {stats[label]["parse_ms"]:.3f} мс, '
+                    f'{stats[label]["bytes"]} байт'
+                )
@@ -0,0 +1,90 @@
+import platform
+import time
+
+from api import benchmark
+from django.core.management.base import BaseCommand
+
+DEFAULT_PATHS = ('/api/v1/titles/', '/api/v1/categories/', '/api/v1/genres/')
+
+
+class Command(BaseCommand):
+    """Прогон живого сервера с растущим числом одновременных соединений."""
+    help = ('Гоняет запущенный сервер по HTTP с заданным числом '
+            'одновременных соединений и пишет отчёт о задержках и '
+            'пропускной способности. Для сравнения режимов gunicorn '
+            'сохраните отчёт одного и передайте его в --compare другому.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Адрес сервера, например '
+                                        'http://127.0.0.1:8000.')
+        parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS,
+                            help='Адреса запросов относительно сервера.')
+        parser.add_argument('--concurrency', nargs='+', type=int,
+                            default=(1, 8, 32, 64),
+                            help='Уровни одновременных соединений.')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Запросов на каждый уровень.')
+        parser.add_argument('--slow-clients', type=int, default=0,
+                            help='Сколько соединений держать открытыми с '
+                                 'недописанным запросом во время прогона.')
+        parser.add_argument('--timeout', type=float, default=10.0,
+                            help='Таймаут одного запроса, секунд.')
+        parser.add_argument('--token', help='JWT для заголовка '
+                                            'Authorization.')
+        parser.add_argument('--label', help='Метка прогона в отчёте, '
+                                            'например sync или gthread.')
+        parser.add_argument('--output', help='Куда сохранить отчёт JSON.')
+        parser.add_argument('--compare', metavar='REPORT',
+                            help='Сравнить с сохранённым отчётом.')
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options['token']:
+            headers['Authorization'] = f'Bearer {options["token"]}'
+        with benchmark.slow_clients(options['url'], options['slow_clients']):
+            endpoints = benchmark.measure_concurrency(
+                options['url'], options['paths'], options['concurrency'],
+                options['requests'], headers, options['timeout']
+            )
+        report = {
+            'meta': {
+                'revision': benchmark.git_revision(),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'python': platform.python_version(),
+                'label': options['label'],
+                'url': options['url'],
+                'paths': list(options['paths']),
+                'slow_clients': options['slow_clients'],
+            },
+            'endpoints': endpoints,
+        }
+        self.print_report(report)
+        if options['output']:
+            benchmark.save_report(report, options['output'])
+            self.stdout.write(f'Отчёт сохранён в {options["output"]}.')
+        if options['compare']:
+            baseline = benchmark.load_report(options['compare'])
+            self.stdout.write(
+                f'Сравнение с {baseline["meta"].get("label")}:'
+            )
+            for line in benchmark.compare(
+                report, baseline,
+                ('p50_ms', 'p99_ms', 'throughput_rps', 'failed')
+            ):
+                self.stdout.write(line)
+
+    def print_report(self, report):
+        self.stdout.write(
+            f'{"соединений":<12}{"p50":>9}{"p95":>9}{"p99":>9}'
+            f'{"rps":>9}{"ошибок":>8}'
+        )
+        for stats in report['endpoints'].values():
+            self.stdout.write(
+                f'{stats["concurrency"]:<12}'
+                + ''.join(
+                    f'{stats[metric]:>9.2f}' if stats[metric] is not None
+                    else f'{"—":>9}'
+                    for metric in ('p50_ms', 'p95_ms', 'p99_ms')
+                )
+                + f'{stats["throughput_rps"]:>9.1f}{stats["failed"]:>8}'
+            )
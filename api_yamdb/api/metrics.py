@@ -0,0 +1,167 @@
+"""Метрики запросов к API: SQL, сериализация, размер ответа.
+
+Замеряются только запросы, попавшие в выборку ``API_METRICS_SAMPLE_RATE``.
+Данные копятся в памяти процесса гистограммами по представлениям, а
+одинаковые SQL, выполненные за один запрос несколько раз, отмечаются
+как вероятный N+1.
+"""
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+DUPLICATES_KEPT = 5
+
+_current = contextvars.ContextVar('api_request_metrics', default=None)
+_endpoints = {}
+_lock = threading.Lock()
+
+
+class RequestMetrics:
+    """Замеры одного запроса; передаётся в ``execute_wrapper`` базы."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def duplicates(self, threshold):
+        return {sql: count for sql, count in self.statements.items()
+                if count >= threshold}
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, value):
+        index = len(self.bounds)
+        for position, bound in enumerate(self.bounds):
+            if value <= bound:
+                index = position
+                break
+        self.buckets[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def as_dict(self):
+        labels = [f'<={bound}' for bound in self.bounds] + ['+Inf']
+        return {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else None,
+            'max': self.max,
+            'buckets': dict(zip(labels, self.buckets)),
+        }
+
+
+class EndpointMetrics:
+    """Накопленные метрики одного представления."""
+
+    def __init__(self):
+        self.duration_ms = Histogram(DURATION_BUCKETS)
+        self.sql_ms = Histogram(DURATION_BUCKETS)
+        self.serializer_ms = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+        self.duplicate_requests = 0
+        self.duplicates = {}
+
+    def observe(self, metrics, duration, size, duplicates):
+        self.duration_ms.observe(duration * 1000)
+        self.sql_ms.observe(metrics.sql_time * 1000)
+        self.serializer_ms.observe(metrics.serializer_time * 1000)
+        self.queries.observe(metrics.queries)
+        self.response_bytes.observe(size)
+        if not duplicates:
+            return
+        self.duplicate_requests += 1
+        for sql, count in duplicates.items():
+            self.duplicates[sql] = max(self.duplicates.get(sql, 0), count)
+        worst = sorted(self.duplicates.items(), key=lambda item: -item[1])
+        self.duplicates = dict(worst[:DUPLICATES_KEPT])
+
+    def as_dict(self):
+        return {
+            'duration_ms': self.duration_ms.as_dict(),
+            'sql_ms': self.sql_ms.as_dict(),
+            'serializer_ms': self.serializer_ms.as_dict(),
+            'queries': self.queries.as_dict(),
+            'response_bytes': self.response_bytes.as_dict(),
+            'duplicate_requests': self.duplicate_requests,
+            'duplicate_queries': [
+                {'sql': sql, 'count': count}
+                for sql, count in self.duplicates.items()
+            ],
+        }
+
+
+def record(endpoint, metrics, duration, size, duplicates):
+    with _lock:
+        stats = _endpoints.get(endpoint)
+        if stats is None:
+            stats = _endpoints[endpoint] = EndpointMetrics()
+        stats.observe(metrics, duration, size, duplicates)
+
+
+def get_metrics():
+    """Снимок метрик текущего процесса по представлениям."""
+    with _lock:
+        return {endpoint: stats.as_dict()
+                for endpoint, stats in sorted(_endpoints.items())}
+
+
+def reset():
+    with _lock:
+        _endpoints.clear()
+
+
+def activate(metrics):
+    return _current.set(metrics)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+class TimedSerializerMixin:
+    """Учитывает время сериализации в метриках текущего запроса.
+
+    Вложенные сериализаторы и элементы списка не считаются повторно:
+    замеряется только внешний вызов ``to_representation``.
+    """
+
+    def to_representation(self, instance):
+        metrics = _current.get()
+        if metrics is None or metrics.serializing:
+            return super().to_representation(instance)
+        metrics.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_time += time.perf_counter() - started
+            metrics.serializing = False
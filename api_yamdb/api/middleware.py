@@ -0,0 +1,142 @@
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from api import metrics, routers, throttling
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+from rest_framework.permissions import SAFE_METHODS
+
+
+class QueryMetricsMiddleware:
+    """Замеры SQL, сериализации и размера ответа для выборки запросов.
+
+    Результат попадает в заголовок ``Server-Timing`` и в метрики
+    процесса, доступные администратору. Вне выборки запрос проходит
+    без обёрток.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.API_METRICS_SAMPLE_RATE
+        self.duplicate_threshold = settings.API_METRICS_DUPLICATE_THRESHOLD
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.activate(request_metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(request_metrics)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+        duration = time.perf_counter() - started
+        duplicates = request_metrics.duplicates(self.duplicate_threshold)
+        endpoint = self.endpoint_name(request)
+        if duplicates:
+            metrics.logger.warning(
+                '%s: одинаковые SQL-запросы выполнены повторно, '
+                'вероятен N+1: %s', endpoint, duplicates
+            )
+        size = 0 if response.streaming else len(response.content)
+        metrics.record(endpoint, request_metrics, duration, size, duplicates)
+        response['Server-Timing'] = self.server_timing(
+            request_metrics, duration, duplicates
+        )
+        return response
+
+    @staticmethod
+    def endpoint_name(request):
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else 'unresolved'
+        return f'{request.method} {view_name}'
+
+    @staticmethod
+    def server_timing(request_metrics, duration, duplicates):
+        description = f'{request_metrics.queries} queries'
+        if duplicates:
+            description += f', {sum(duplicates.values())} duplicated'
+        return (
+            f'db;dur={request_metrics.sql_time * 1000:.2f};'
+            f'desc="{description}", '
+            f'serializer;dur={request_metrics.serializer_time * 1000:.2f}, '
+            f'total;dur={duration * 1000:.2f}'
+        )
+
+
+class ReplicaRoutingMiddleware:
+    """Разрешает чтение с реплик в запросах безопасными методами.
+
+    После успешной записи пользователь на время закрепляется за основной
+    базой, чтобы следующие чтения видели его изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.begin(request)
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            routers.pin(request)
+        return response
+
+
+class AdmissionControlMiddleware:
+    """Отказывает с 503 и ``Retry-After``, пока процесс перегружен.
+
+    Запрос отбрасывается, если он дольше ``API_ADMISSION_MAX_QUEUE_MS``
+    ждал в очереди (по заголовку nginx ``X-Request-Start``) или если
+    процесс уже обрабатывает ``API_ADMISSION_MAX_CONCURRENT`` запросов.
+    Дочитывание потокового ответа в лимит не входит.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.max_queue_time = settings.API_ADMISSION_MAX_QUEUE_MS / 1000
+        max_concurrent = settings.API_ADMISSION_MAX_CONCURRENT
+        self.slots = (
+            threading.BoundedSemaphore(max_concurrent)
+            if max_concurrent else None
+        )
+
+    def __call__(self, request):
+        if (self.max_queue_time
+                and self.queue_time(request) > self.max_queue_time):
+            return self.reject('queue')
+        if self.slots is None:
+            return self.get_response(request)
+        if not self.slots.acquire(blocking=False):
+            return self.reject('concurrency')
+        try:
+            return self.get_response(request)
+        finally:
+            self.slots.release()
+
+    @staticmethod
+    def queue_time(request):
+        """Секунды с ``X-Request-Start: t=<время прихода в nginx>``."""
+        header = request.META.get('HTTP_X_REQUEST_START', '')
+        try:
+            started = float(header.replace('t=', '', 1))
+        except ValueError:
+            return 0
+        return time.time() - started
+
+    @staticmethod
+    def reject(reason):
+        throttling.count_rejection(f'shed:{reason}')
+        response = JsonResponse(
+            {'detail': 'Сервер перегружен, повторите запрос позже.'},
+            status=503, json_dumps_params={'ensure_ascii': False}
+        )
+        response['Retry-After'] = str(settings.API_ADMISSION_RETRY_AFTER)
+        return response
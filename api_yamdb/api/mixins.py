@@ -1,4 +1,14 @@
-from rest_framework import mixins, viewsets
+from api.bulk import run_bulk_upsert
+from api.cache import cached_response
+from api.permissions import IsAdmin
+from api.query_plan import flat_fields, plan_queryset
+from api.streaming import CONTENT_TYPES, keyset_chunks, streaming_response
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 
 
 class CustomGenreCategoryViewSet(mixins.CreateModelMixin,
@@ -18,3 +28,167 @@ class CustomTitleViewSet(mixins.CreateModelMixin,
     """Кастомный вьюсет для создания, вывода, возврата, обновление,
        сохранение списка и удаления."""
     pass
+
+
+class BulkUpsertMixin:
+    """Миксин эндпоинта массовой загрузки ``POST <список>/bulk/``."""
+    bulk_upsert_class = None
+
+    @action(methods=['post'], detail=False, permission_classes=(IsAdmin,))
+    def bulk(self, request):
+        return Response(
+            run_bulk_upsert(self.bulk_upsert_class, request.data),
+            status=status.HTTP_200_OK
+        )
+
+
+class SerializerQueryPlanMixin:
+    """Миксин, строящий queryset по дереву полей сериализатора."""
+
+    def get_queryset(self):
+        return plan_queryset(
+            super().get_queryset(), self.get_serializer_class()
+        )
+
+
+class FlatListMixin:
+    """Миксин, отдающий список строками values() без создания моделей.
+
+    Столбцы берутся из сериализатора. Если какое-то поле не сводится к
+    столбцу или ``API_FLAT_LISTS`` выключен, список строится обычным путём.
+    """
+
+    def get_flat_fields(self):
+        if not settings.API_FLAT_LISTS:
+            return None
+        return flat_fields(self.get_serializer_class())
+
+    @staticmethod
+    def flat_queryset(queryset, fields):
+        return queryset.values(*{lookup for _, lookup in fields})
+
+    @staticmethod
+    def flat_rows(rows, fields):
+        return [{name: row[lookup] for name, lookup in fields}
+                for row in rows]
+
+    def list(self, request, *args, **kwargs):
+        fields = self.get_flat_fields()
+        if fields is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.flat_queryset(
+            self.filter_queryset(self.get_queryset()), fields
+        )
+        page = self.paginate_queryset(queryset)
+        rows = self.flat_rows(queryset if page is None else page, fields)
+        if page is None:
+            return Response(rows)
+        return self.get_paginated_response(rows)
+
+
+class StreamingListMixin(FlatListMixin):
+    """Миксин потоковой выдачи списка по ``?stream=json`` или ``ndjson``.
+
+    Весь отфильтрованный список без пагинации отдаётся пачками по
+    ``API_STREAM_CHUNK_SIZE`` в порядке ключа курсорной пагинации, со
+    сжатием по Accept-Encoding. Кеш ответов при этом не используется.
+    """
+    stream_query_param = 'stream'
+
+    def list(self, request, *args, **kwargs):
+        stream_format = request.query_params.get(self.stream_query_param)
+        if stream_format is None:
+            return super().list(request, *args, **kwargs)
+        if stream_format not in CONTENT_TYPES:
+            raise ValidationError({self.stream_query_param: [
+                f'Допустимые значения: {", ".join(CONTENT_TYPES)}.'
+            ]})
+        return self.stream_list(request, stream_format)
+
+    def stream_list(self, request, stream_format):
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = getattr(self.pagination_class, 'keyset_ordering', ('id',))
+        fields = self.get_flat_fields()
+        if fields is not None:
+            queryset = self.flat_queryset(queryset, fields)
+        chunks = keyset_chunks(
+            queryset, ordering, settings.API_STREAM_CHUNK_SIZE
+        )
+        if fields is not None:
+            items = (self.flat_rows(chunk, fields) for chunk in chunks)
+        else:
+            items = (self.get_serializer(chunk, many=True).data
+                     for chunk in chunks)
+        return streaming_response(request, items, stream_format)
+
+
+class NestedParentMixin:
+    """Миксин вложенных маршрутов вида titles/<id>/reviews/<id>/comments.
+
+    Родитель из URL проверяется вместе со всей цепочкой одним запросом и
+    запоминается на запросе. Список фильтруется по параметрам URL без
+    загрузки родителя: он нужен, только если страница пуста.
+    """
+    parent_model = None
+    parent_queryset = None
+    parent_field = None
+    parent_lookups = {}
+
+    def parent_filter(self, prefix=''):
+        return {f'{prefix}{field}': self.kwargs[kwarg]
+                for field, kwarg in self.parent_lookups.items()}
+
+    def get_parent(self):
+        parents = getattr(self.request, 'nested_parents', None)
+        if parents is None:
+            parents = self.request.nested_parents = {}
+        lookup = self.parent_filter()
+        key = (self.parent_model, tuple(sorted(lookup.items())))
+        if key not in parents:
+            queryset = self.parent_queryset
+            parents[key] = get_object_or_404(
+                self.parent_model if queryset is None else queryset.all(),
+                **lookup
+            )
+        return parents[key]
+
+    def get_queryset(self):
+        return super().get_queryset().filter(
+            **self.parent_filter(f'{self.parent_field}__')
+        )
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page:
+            # Пустой список отличаем от несуществующего родителя.
+            self.get_parent()
+        return page
+
+    def stream_list(self, request, stream_format):
+        # Заголовки уходят до первой пачки, поэтому 404 — заранее.
+        self.get_parent()
+        return super().stream_list(request, stream_format)
+
+
+class CachedReadMixin:
+    """Миксин, отдающий list и retrieve из кеша ответов."""
+    cache_namespaces = ()
+
+    def get_cache_namespaces(self):
+        return self.cache_namespaces
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(
+            request, self.get_cache_namespaces(),
+            lambda: super(CachedReadMixin, self).list(
+                request, *args, **kwargs
+            )
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(
+            request, self.get_cache_namespaces(),
+            lambda: super(CachedReadMixin, self).retrieve(
+                request, *args, **kwargs
+            )
+        )
@@ -0,0 +1,83 @@
+"""Массовая модерация отзывов и комментариев.
+
+Набор отбирается по списку id, автору и периоду публикации и
+обрабатывается одной транзакцией без загрузки объектов и проверки прав
+на каждый. Удаление и скрытие отзывов идут через ``ReviewQuerySet``,
+так что рейтинг пересчитывается по разу на затронутое произведение.
+Скрытые отзывы и комментарии не отдаются в API и не входят в рейтинг.
+
+Удаление, как и удаление автором, только помечает строки — вместе с
+комментариями удаляемых отзывов, — и они уходят в архив как обычно.
+Возврат снимает и скрытие, и пометку удаления, кроме отзывов, вместо
+которых автор уже написал новый.
+"""
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from rest_framework.exceptions import ValidationError
+from reviews.models import Comment, Review
+from users.models import User
+
+AFFECTED_KEYS = {Review: 'reviews', Comment: 'comments'}
+
+
+def select(model, data):
+    """Отзывы или комментарии, подходящие под все условия отбора.
+
+    Удалённые строки отбираются только для возврата.
+    """
+    filters = {}
+    if data['action'] != 'restore':
+        filters['is_deleted'] = False
+    if 'ids' in data:
+        filters['pk__in'] = data['ids']
+    if 'author' in data:
+        filters['author_id'] = User.objects.filter(
+            username=data['author']
+        ).values_list('pk', flat=True).first()
+        if filters['author_id'] is None:
+            raise ValidationError({'author': ['Пользователь не найден.']})
+    if data.get('since'):
+        filters['pub_date__gte'] = data['since']
+    if data.get('until'):
+        filters['pub_date__lte'] = data['until']
+    return model.objects.filter(**filters)
+
+
+def restorable(model, queryset):
+    """Набор без удалённых отзывов, чьё место уже занято.
+
+    Место отзыва автора на произведение занимает живой отзыв или более
+    поздний удалённый: возвращается только последний из удалённых.
+    """
+    if model is not Review:
+        return queryset
+    return queryset.annotate(replaced=Exists(Review.objects.filter(
+        Q(is_deleted=False) | Q(pk__gt=OuterRef('pk')),
+        title=OuterRef('title'), author=OuterRef('author'),
+    ))).filter(Q(is_deleted=False) | Q(replaced=False))
+
+
+def moderate(model, data):
+    """Удаляет, скрывает или возвращает набор; отдаёт число затронутых."""
+    queryset = select(model, data)
+    action = data['action']
+    with transaction.atomic():
+        if action == 'delete':
+            affected = dict.fromkeys(AFFECTED_KEYS.values(), 0)
+            if model is Review:
+                affected['comments'] = Comment.objects.filter(
+                    review__in=queryset, is_deleted=False
+                ).update(is_deleted=True)
+            affected[AFFECTED_KEYS[model]] = queryset.update(is_deleted=True)
+        elif action == 'hide':
+            affected = {AFFECTED_KEYS[model]: queryset.filter(
+                is_hidden=False
+            ).update(is_hidden=True)}
+        else:
+            queryset = restorable(model, queryset).filter(
+                Q(is_hidden=True) | Q(is_deleted=True)
+            )
+            affected = {AFFECTED_KEYS[model]: queryset.update(
+                is_hidden=False, is_deleted=False
+            )}
+    return {'action': action, 'affected': affected}
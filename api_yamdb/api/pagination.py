@@ -0,0 +1,161 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from functools import reduce
+from operator import or_
+from types import SimpleNamespace
+
+from django.core import exceptions as django_exceptions
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from reviews.search import is_ranked
+
+
+class KeysetPagination(BasePagination):
+    """Пагинация по ключу: страница отбирается условием по последней
+    записи предыдущей страницы, без COUNT(*) и OFFSET.
+
+    Курсор непрозрачен для клиента: это base64 от значений полей
+    ``ordering`` у граничной записи и направления обхода.
+    """
+    ordering = ('id',)
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.fields = [
+            queryset.model._meta.get_field(name) for name in self.ordering
+        ]
+        values, reverse = self.decode_cursor(request)
+        ordering = [f'-{name}' if reverse else name for name in self.ordering]
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.after(values, reverse))
+        page = list(queryset[:self.page_size + 1])
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+        if reverse:
+            page.reverse()
+        self.has_next = has_more if not reverse else values is not None
+        self.has_previous = values is not None if not reverse else has_more
+        self.page = page
+        return page
+
+    def after(self, values, reverse):
+        """Условие «строго после курсора» для составного ключа."""
+        lookup = 'lt' if reverse else 'gt'
+        conditions = []
+        for position, name in enumerate(self.ordering):
+            equal = dict(zip(self.ordering[:position], values[:position]))
+            equal[f'{name}__{lookup}'] = values[position]
+            conditions.append(Q(**equal))
+        return reduce(or_, conditions)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            values = [
+                field.to_python(value)
+                for field, value in zip(self.fields, payload['v'])
+            ]
+            if len(values) != len(self.fields):
+                raise ValueError
+            return values, bool(payload.get('r'))
+        except (BinasciiError, UnicodeError, ValueError, KeyError,
+                TypeError, django_exceptions.ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse):
+        if isinstance(obj, dict):
+            # Строка values(): значения ключа лежат по именам полей.
+            obj = SimpleNamespace(**{
+                field.attname: obj[field.name] for field in self.fields
+            })
+        values = [
+            field.value_to_string(obj) for field in self.fields
+        ]
+        payload = json.dumps({'v': values, 'r': int(reverse)},
+                             separators=(',', ':'))
+        cursor = urlsafe_b64encode(payload.encode()).decode('ascii')
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, cursor
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class SwitchablePagination(PageNumberPagination):
+    """Постраничная пагинация с переключением на курсорную по запросу.
+
+    Клиенты со ``?page=`` работают как раньше, а ``?pagination=cursor``
+    или ``?cursor=...`` включают пагинацию по ключу ``keyset_ordering``.
+    Курсор заменил бы порядок релевантности поиска, поэтому вместе с ним
+    запрос отклоняется.
+    """
+    keyset_ordering = ('id',)
+    mode_query_param = 'pagination'
+    ranked_message = ('Результаты поиска упорядочены по релевантности и '
+                      'листаются только по страницам (?page=).')
+
+    def get_keyset(self, request):
+        params = request.query_params
+        if (params.get(self.mode_query_param) == 'cursor'
+                or KeysetPagination.cursor_query_param in params):
+            return KeysetPagination(self.keyset_ordering)
+        return None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.get_keyset(request)
+        if self.keyset is not None and is_ranked(queryset):
+            raise ValidationError({self.mode_query_param: [
+                self.ranked_message
+            ]})
+        if self.keyset is not None:
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class PubDatePagination(SwitchablePagination):
+    """Пагинация отзывов и комментариев по дате публикации."""
+    keyset_ordering = ('pub_date', 'id')
+
+
+class NamePagination(SwitchablePagination):
+    """Пагинация произведений по названию."""
+    keyset_ordering = ('name', 'id')
@@ -15,6 +15,16 @@ class IsAdmin(permissions.BasePermission):
                 or request.user.is_superuser)
 
 
+class IsModerator(permissions.BasePermission):
+    """Разрешение только модераторам и админам."""
+    message = 'Доступ только у модератора!'
+
+    def has_permission(self, request, view):
+        return (request.user.is_authenticated
+                and (request.user.role in SAFE_ROLE
+                     or request.user.is_superuser))
+
+
 class IsSelfOrAdmin(permissions.BasePermission):
     """Разрешение на редактирование только владельцем и админом."""
 
@@ -24,7 +34,7 @@ class IsSelfOrAdmin(permissions.BasePermission):
         return request.user.is_authenticated
 
     def has_object_permission(self, request, view, obj):
-        return (obj == request.user
+        return (obj.pk == request.user.pk
                 or request.user.is_admin())
 
 
@@ -48,5 +58,5 @@ class ReadOnlyForUnauthorized(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         return (request.method in permissions.SAFE_METHODS
-                or obj.author == request.user
+                or obj.author_id == request.user.pk
                 or request.user.role in SAFE_ROLE)
@@ -0,0 +1,200 @@
+"""Пул соединений с базой для бэкендов ``api.pool.*``.
+
+Django держит по соединению на поток и закрывает его по окончании
+запроса (или через ``CONN_MAX_AGE``). Пул подменяет открытие и закрытие:
+соединение берётся из общего для процесса набора и возвращается в него.
+Размер пула ограничен, простаивающие дольше ``IDLE_TIMEOUT`` соединения
+закрываются, а перед выдачей давно не использованного соединения
+выполняется ``SELECT 1``. Настройки берутся из ключа ``POOL`` описания
+базы в ``DATABASES``.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+DEFAULTS = {
+    'MAX_SIZE': 10,
+    'IDLE_TIMEOUT': 300,
+    'HEALTH_CHECK_INTERVAL': 30,
+    'TIMEOUT': 5,
+}
+
+COUNTERS = ('created', 'reused', 'closed', 'unhealthy', 'waits', 'timeouts')
+
+
+class PoolExhaustedError(Exception):
+    """Все соединения пула заняты дольше допустимого."""
+
+
+class ConnectionPool:
+    """Потокобезопасный пул DB-API соединений одного процесса."""
+
+    def __init__(self, max_size=10, idle_timeout=300,
+                 health_check_interval=30, timeout=5, errors=(Exception,)):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self.errors = errors
+        self.size = 0
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._idle = deque()
+        self._condition = threading.Condition()
+
+    def _close(self, raw):
+        self.size -= 1
+        self.counters['closed'] += 1
+        try:
+            raw.close()
+        except self.errors:
+            pass
+
+    def _expire(self, now):
+        while self._idle and now - self._idle[0][1] >= self.idle_timeout:
+            self._close(self._idle.popleft()[0])
+
+    def _take(self):
+        """Свободное соединение, None для нового или ожидание."""
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                if self._idle:
+                    return self._idle.pop()
+                if self.size < self.max_size:
+                    self.size += 1
+                    return None, now
+                if now >= deadline:
+                    self.counters['timeouts'] += 1
+                    raise PoolExhaustedError(
+                        f'Все {self.max_size} соединений пула заняты.'
+                    )
+                self.counters['waits'] += 1
+                self._condition.wait(deadline - now)
+
+    def healthy(self, raw):
+        try:
+            cursor = raw.cursor()
+            cursor.execute('SELECT 1')
+            cursor.close()
+        except self.errors:
+            return False
+        return True
+
+    def acquire(self, connect):
+        """Соединение из пула; ``connect`` открывает новое при нехватке."""
+        while True:
+            raw, released = self._take()
+            if raw is None:
+                break
+            stale = time.monotonic() - released >= self.health_check_interval
+            if not stale or self.healthy(raw):
+                with self._condition:
+                    self.counters['reused'] += 1
+                return raw
+            with self._condition:
+                self.counters['unhealthy'] += 1
+                self._close(raw)
+                self._condition.notify()
+        try:
+            raw = connect()
+        except BaseException:
+            with self._condition:
+                self.size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.counters['created'] += 1
+        return raw
+
+    def release(self, raw, reusable=True):
+        with self._condition:
+            if reusable:
+                self._idle.append((raw, time.monotonic()))
+            else:
+                self._close(raw)
+            self._condition.notify()
+
+    def clear(self):
+        """Закрывает все свободные соединения."""
+        with self._condition:
+            while self._idle:
+                self._close(self._idle.pop()[0])
+            self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return dict(
+                self.counters,
+                max_size=self.max_size,
+                size=self.size,
+                idle=len(self._idle),
+                in_use=self.size - len(self._idle),
+            )
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict, errors=(Exception,)):
+    with _pools_lock:
+        if alias not in _pools:
+            options = dict(DEFAULTS, **settings_dict.get('POOL', {}))
+            _pools[alias] = ConnectionPool(
+                max_size=options['MAX_SIZE'],
+                idle_timeout=options['IDLE_TIMEOUT'],
+                health_check_interval=options['HEALTH_CHECK_INTERVAL'],
+                timeout=options['TIMEOUT'],
+                errors=errors,
+            )
+        return _pools[alias]
+
+
+def get_stats():
+    """Счётчики пулов текущего процесса (воркера) по базам."""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {
+        'pid': os.getpid(),
+        'databases': {alias: pool.stats() for alias, pool in pools.items()},
+    }
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.clear()
+
+
+class PooledDatabaseMixin:
+    """Берёт соединения ``DatabaseWrapper`` из пула и возвращает в него."""
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict, self.Database.Error)
+
+    def get_new_connection(self, conn_params):
+        try:
+            return self.pool.acquire(
+                lambda: super(PooledDatabaseMixin, self).get_new_connection(
+                    conn_params
+                )
+            )
+        except PoolExhaustedError as error:
+            raise self.Database.OperationalError(str(error)) from error
+
+    def _close(self):
+        if self.connection is None:
+            return
+        reusable = not self.errors_occurred and not self.in_atomic_block
+        if reusable and not self.autocommit:
+            try:
+                self.connection.rollback()
+            except self.Database.Error:
+                reusable = False
+        self.pool.release(self.connection, reusable)
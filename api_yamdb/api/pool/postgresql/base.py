@@ -0,0 +1,6 @@
+from api.pool import PooledDatabaseMixin
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(PooledDatabaseMixin, base.DatabaseWrapper):
+    """PostgreSQL с пулом соединений."""
@@ -0,0 +1,6 @@
+from api.pool import PooledDatabaseMixin
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(PooledDatabaseMixin, base.DatabaseWrapper):
+    """SQLite с пулом соединений, для локальной проверки пула."""
@@ -0,0 +1,108 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+# Поля, чьё представление в JSON совпадает со значением столбца.
+FLAT_FIELD_TYPES = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.DateField,
+    serializers.FloatField,
+    serializers.IntegerField,
+)
+
+
+def _related_serializer(field):
+    """Вложенный сериализатор или связанное поле, требующее загрузки."""
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    elif isinstance(field, serializers.ManyRelatedField):
+        field = field.child_relation
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        return None if field.use_pk_only_optimization() else field
+    if isinstance(field, (serializers.BaseSerializer,
+                          serializers.RelatedField)):
+        return field
+    return None
+
+
+def _resolve(model, source, prefix):
+    """Переводит source поля в путь lookup'а от модели queryset."""
+    path, multiple = prefix, False
+    for name in source.split('.'):
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.is_relation:
+            return None
+        path = f'{path}__{name}' if path else name
+        multiple = (multiple or model_field.many_to_many
+                    or model_field.one_to_many)
+        model = model_field.related_model
+    return path, multiple, model
+
+
+def _walk(serializer, model, prefix, prefetching, plan):
+    for field in serializer.fields.values():
+        nested = _related_serializer(field)
+        if nested is None or field.source in ('*', ''):
+            continue
+        resolved = _resolve(model, field.source, prefix)
+        if resolved is None:
+            continue
+        path, multiple, related_model = resolved
+        multiple = prefetching or multiple
+        plan['prefetch' if multiple else 'select'].append(path)
+        if isinstance(nested, serializers.Serializer):
+            _walk(nested, related_model, path, multiple, plan)
+
+
+def plan_queryset(queryset, serializer_class):
+    """Подключает связи, которые обойдёт сериализатор, к queryset.
+
+    Одиночные связи присоединяются через select_related, множественные
+    и всё, что лежит под ними, загружаются через prefetch_related. Так
+    страница любого размера отдаётся постоянным числом запросов.
+    """
+    plan = {'select': [], 'prefetch': []}
+    _walk(serializer_class(), queryset.model, '', False, plan)
+    if plan['select']:
+        queryset = queryset.select_related(*plan['select'])
+    return queryset.prefetch_related(*plan['prefetch'])
+
+
+def _flat_lookup(field, model):
+    if type(field) is serializers.SlugRelatedField:
+        resolved = _resolve(model, field.source, '')
+        if resolved is None or resolved[1]:
+            return None
+        return f'{resolved[0]}__{field.slug_field}'
+    if type(field) not in FLAT_FIELD_TYPES or '.' in field.source:
+        return None
+    try:
+        model_field = model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        return None
+    return None if model_field.is_relation else field.source
+
+
+@lru_cache(maxsize=None)
+def flat_fields(serializer_class):
+    """Пары (имя в ответе, lookup для values()) для чтения строками.
+
+    None, если какое-то поле сериализатора не сводится к столбцу.
+    """
+    serializer = serializer_class()
+    model = serializer.Meta.model
+    fields = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        lookup = _flat_lookup(field, model)
+        if lookup is None:
+            return None
+        fields.append((name, lookup))
+    return tuple(fields)
@@ -0,0 +1,163 @@
+"""Чтение с реплик базы для запросов безопасными методами.
+
+``ReplicaRoutingMiddleware`` в начале запроса решает, можно ли читать с
+реплик ``DATABASE_REPLICAS``: только для GET, HEAD и OPTIONS и только
+если пользователь не писал в базу последние
+``DATABASE_REPLICA_PIN_SECONDS`` секунд — так он видит свои изменения,
+пока реплики догоняют основную базу. Реплика выбирается одна на запрос;
+не прошедшая проверку соединения исключается из выбора на
+``DATABASE_REPLICA_CHECK_INTERVAL`` секунд, а без живых реплик чтение
+идёт с основной базы.
+"""
+import contextvars
+import logging
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import request_finished
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.dispatch import receiver
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+logger = logging.getLogger(__name__)
+
+PIN_KEY = 'api:replica-pin:{}'
+
+_state = contextvars.ContextVar('api_db_routing', default=None)
+_health = {}
+
+
+class RoutingState:
+    """Решение о чтении с реплик для текущего запроса."""
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.replica = None
+
+
+def request_user_id(request):
+    """Пользователь из JWT запроса, без обращения к базе."""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    try:
+        raw_token = authentication.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = authentication.get_validated_token(raw_token)
+    except AuthenticationFailed:
+        return None
+    return token.get(jwt_settings.USER_ID_CLAIM)
+
+
+def _pin_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def begin(request):
+    use_replica = (
+        bool(settings.DATABASE_REPLICAS) and request.method in SAFE_METHODS
+    )
+    if use_replica:
+        user_id = request_user_id(request)
+        use_replica = user_id is None or not _pin_cache().get(
+            PIN_KEY.format(user_id)
+        )
+    _state.set(RoutingState(use_replica))
+
+
+def pin(request):
+    """Закрепляет автора записи за основной базой на время отставания."""
+    user_id = request_user_id(request)
+    if user_id is not None and settings.DATABASE_REPLICAS:
+        _pin_cache().set(
+            PIN_KEY.format(user_id), True,
+            settings.DATABASE_REPLICA_PIN_SECONDS
+        )
+
+
+@receiver(request_finished)
+def end(**kwargs):
+    # Потоковый ответ читает базу и после выхода из middleware.
+    _state.set(None)
+
+
+@contextmanager
+def use_primary():
+    """Чтение внутри блока идёт с основной базы."""
+    state = _state.get()
+    if state is None:
+        yield
+        return
+    use_replica, state.use_replica = state.use_replica, False
+    try:
+        yield
+    finally:
+        state.use_replica = use_replica
+
+
+def replica_healthy(alias):
+    """Проверка соединения с репликой не чаще раза в интервал."""
+    now = time.monotonic()
+    checked_at, healthy = _health.get(alias, (None, False))
+    if (checked_at is not None
+            and now - checked_at < settings.DATABASE_REPLICA_CHECK_INTERVAL):
+        return healthy
+    connection = connections[alias]
+    try:
+        connection.ensure_connection()
+        healthy = connection.is_usable()
+        if not healthy:
+            connection.close()
+    except DatabaseError:
+        healthy = False
+    if not healthy:
+        logger.warning('Реплика %s недоступна, чтение идёт с основной базы.',
+                       alias)
+    _health[alias] = (now, healthy)
+    return healthy
+
+
+def get_health():
+    """Последние результаты проверки реплик в этом процессе."""
+    return {alias: _health[alias][1] if alias in _health else None
+            for alias in settings.DATABASE_REPLICAS}
+
+
+class ReplicaRouter:
+    """Чтение с реплики, выбранной для запроса, запись — в основную."""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (state is None or not state.use_replica
+                or model._meta.app_label in settings.DATABASE_PRIMARY_APPS):
+            return None
+        if state.replica is None:
+            healthy = [alias for alias in settings.DATABASE_REPLICAS
+                       if replica_healthy(alias)]
+            if not healthy:
+                state.use_replica = False
+                return None
+            state.replica = random.choice(healthy)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        # Без этого объект, прочитанный с реплики, сохранялся бы в неё же.
+        instance = hints.get('instance')
+        if (instance is not None
+                and instance._state.db in settings.DATABASE_REPLICAS):
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -1,17 +1,24 @@
 import json
 
+from api.metrics import TimedSerializerMixin
+from django.conf import settings
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import update_last_login
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import exceptions, serializers
+from rest_framework.settings import api_settings as drf_settings
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.settings import api_settings
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import (ArchivedComment, ArchivedReview, Category, Comment,
+                            Genre, Review, Title)
+from reviews.scores import score_stats, title_histogram
+from users.authentication import add_user_claims
 from users.models import User
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор отзывов."""
     author = serializers.SlugRelatedField(
         slug_field='username',
@@ -26,18 +33,39 @@ class ReviewSerializer(serializers.ModelSerializer):
             'pub_date',
         )
 
-    def validate(self, data):
-        author = self.context.get('request').user
-        title = self.context.get('title')
-        review = Review.objects.filter(title=title, author=author)
-        if review.exists() and self.context.get('request').method == 'POST':
-            raise serializers.ValidationError(
-                'Вы уже оставляли рецензию на это произведение!'
-            )
-        return data
+    duplicate_message = 'Вы уже оставляли рецензию на это произведение!'
 
+    def duplicate_error(self):
+        return serializers.ValidationError({
+            drf_settings.NON_FIELD_ERRORS_KEY: [self.duplicate_message]
+        })
 
-class CommentSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        # Архивный отзыв в уникальное ограничение не попадает, а его
+        # оценка по-прежнему входит в рейтинг.
+        if ArchivedReview.objects.filter(
+            is_deleted=False,
+            title=validated_data['title'],
+            author_id=validated_data['author_id'],
+        ).exists():
+            raise self.duplicate_error()
+        # Повтор в рабочей таблице ловит уникальное ограничение; прочие
+        # нарушения целостности не выдаём за повтор. Точка сохранения
+        # позволяет перепроверить после ошибки внутри транзакции.
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            if Review.objects.filter(
+                is_deleted=False,
+                title=validated_data['title'],
+                author_id=validated_data['author_id'],
+            ).exists():
+                raise self.duplicate_error()
+            raise
+
+
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор комментов."""
     author = serializers.SlugRelatedField(
         slug_field='username',
@@ -52,7 +80,21 @@ class CommentSerializer(serializers.ModelSerializer):
         )
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class ArchivedReviewSerializer(ReviewSerializer):
+    """Сериализатор архивных отзывов."""
+
+    class Meta(ReviewSerializer.Meta):
+        model = ArchivedReview
+
+
+class ArchivedCommentSerializer(CommentSerializer):
+    """Сериализатор архивных комментов."""
+
+    class Meta(CommentSerializer.Meta):
+        model = ArchivedComment
+
+
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор категорий."""
 
     class Meta:
@@ -60,7 +102,7 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор жанров."""
 
     class Meta:
@@ -68,7 +110,7 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор произведений."""
     category = serializers.SlugRelatedField(
         slug_field='slug',
@@ -82,23 +124,95 @@ class TitleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = (
+            'id', 'name', 'year',
+            'description', 'genre', 'category',
+        )
+
 
+def stats_requested(request):
+    """Запрошена ли статистика оценок: ``?stats=true``."""
+    return request is not None and request.query_params.get(
+        'stats', ''
+    ).lower() in ('1', 'true')
 
-class TitleReadSerializer(serializers.ModelSerializer):
-    """Сериализатор чтения произведений."""
+
+class TitleReadSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Сериализатор чтения произведений.
+
+    Поле ``stats`` отдаётся только по ``?stats=true``.
+    """
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(read_only=True, many=True)
-    rating = serializers.IntegerField(
-        source='reviews__score__avg', read_only=True
+    rating = serializers.IntegerField(read_only=True)
+    stats = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Title
+        fields = (
+            'id', 'name', 'year', 'rating',
+            'description', 'genre', 'category', 'stats',
+        )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not stats_requested(self.context.get('request')):
+            self.fields.pop('stats')
+
+    def get_stats(self, title):
+        return score_stats(title_histogram(title.score_buckets.all()))
+
+
+class CategoryBulkSerializer(serializers.ModelSerializer):
+    """Элемент массовой загрузки категорий, без запросов к базе."""
+    slug = serializers.SlugField(max_length=50)
+
+    class Meta:
+        model = Category
+        fields = ('name', 'slug')
+
+
+class GenreBulkSerializer(serializers.ModelSerializer):
+    """Элемент массовой загрузки жанров, без запросов к базе."""
+    slug = serializers.SlugField(max_length=50)
+
+    class Meta:
+        model = Genre
+        fields = ('name', 'slug')
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    """Элемент массовой загрузки произведений.
+
+    Слаги категории и жанров не разрешаются поштучно: это делается
+    для всей пачки сразу.
+    """
+    id = serializers.IntegerField(required=False)
+    category = serializers.SlugField(allow_null=True, required=False)
+    genre = serializers.ListField(
+        child=serializers.SlugField(), required=False
     )
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = (
+            'id', 'name', 'year',
+            'description', 'genre', 'category',
+        )
+
+
+class ReviewBulkSerializer(serializers.ModelSerializer):
+    """Элемент массовой загрузки отзывов: произведение и имя автора."""
+    title = serializers.IntegerField()
+    author = serializers.CharField(max_length=150)
+
+    class Meta:
+        model = Review
+        fields = ('title', 'author', 'text', 'score')
+        validators = []
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор пользователей."""
 
     class Meta:
@@ -152,11 +266,45 @@ class SignupSerializer(serializers.ModelSerializer):
         return user
 
 
+class ModerationSerializer(serializers.Serializer):
+    """Действие модератора над отзывами или комментариями.
+
+    Отбор — по списку ``ids``, автору и периоду публикации; условия
+    складываются, хотя бы одно обязательно.
+    """
+    action = serializers.ChoiceField(choices=('delete', 'hide', 'restore'))
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=settings.API_BULK_MAX_ITEMS,
+        required=False
+    )
+    author = serializers.CharField(max_length=150, required=False)
+    since = serializers.DateField(required=False)
+    until = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if not {'ids', 'author', 'since', 'until'} & set(attrs):
+            raise serializers.ValidationError(
+                'Укажите id, автора или период публикации.'
+            )
+        if attrs.get('since') and attrs.get('until') and (
+            attrs['since'] > attrs['until']
+        ):
+            raise serializers.ValidationError(
+                {'until': ['Конец периода раньше его начала.']}
+            )
+        return attrs
+
+
 class TokenSerializer(TokenObtainPairSerializer):
     """Сериализатор получения токена."""
     username = serializers.CharField(max_length=255)
     confirmation_code = serializers.CharField(max_length=128)
 
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields['password'].required = False
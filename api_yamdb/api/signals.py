@@ -0,0 +1,69 @@
+from api.cache import invalidate
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import (Category, Genre, Review, Title, catalog_imported,
+                            rankings_refreshed, titles_rated)
+
+
+def invalidate_on_commit(*namespaces):
+    """Сбрасывает кеш сразу и ещё раз после фиксации транзакции,
+    чтобы параллельный запрос не успел закешировать старые данные."""
+    invalidate(*namespaces)
+    transaction.on_commit(lambda: invalidate(*namespaces))
+
+
+def title_namespaces(title_ids):
+    return ('title', *(f'title:{title_id}' for title_id in title_ids))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    invalidate_on_commit('category')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def genre_changed(sender, **kwargs):
+    invalidate_on_commit('genre')
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def title_changed(sender, instance, **kwargs):
+    invalidate_on_commit(*title_namespaces([instance.pk]))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_on_commit(*title_namespaces([instance.pk]))
+    elif pk_set is None:
+        invalidate_on_commit('title')
+    else:
+        invalidate_on_commit(*title_namespaces(pk_set))
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, **kwargs):
+    invalidate_on_commit(*title_namespaces([instance.title_id]))
+
+
+@receiver(titles_rated)
+def titles_rated_in_bulk(sender, title_ids, **kwargs):
+    invalidate_on_commit(*title_namespaces(title_ids))
+
+
+@receiver(catalog_imported)
+def catalog_imported_in_bulk(sender, **kwargs):
+    invalidate_on_commit('category', 'genre', 'title')
+
+
+@receiver(rankings_refreshed)
+def rankings_changed(sender, **kwargs):
+    invalidate_on_commit('ranking')
@@ -0,0 +1,138 @@
+"""Потоковая выдача больших списков.
+
+Queryset обходится пачками по ключу пагинации (``WHERE key > last``),
+каждая пачка сериализуется и сразу уходит клиенту массивом JSON или
+NDJSON, при необходимости сжатым gzip или brotli. Память воркера
+ограничена одной пачкой независимо от размера выборки.
+"""
+import zlib
+
+from api.pagination import KeysetPagination
+from api.renderers import FastJSONRenderer
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class GzipEncoder:
+    name = 'gzip'
+
+    def __init__(self):
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + 15)
+
+    def encode(self, data):
+        # Сброс после каждой пачки: клиент получает данные сразу.
+        return (self.compressor.compress(data)
+                + self.compressor.flush(zlib.Z_SYNC_FLUSH))
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliEncoder:
+    name = 'br'
+
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=5)
+
+    def encode(self, data):
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding с ненулевым q."""
+    encodings = set()
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(name.strip().lower())
+    return encodings
+
+
+def negotiate_encoder(request):
+    """Кодировщик сжатия по Accept-Encoding: brotli, затем gzip."""
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if brotli is not None and 'br' in accepted:
+        return BrotliEncoder()
+    if 'gzip' in accepted:
+        return GzipEncoder()
+    return None
+
+
+def _key(row, name):
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def keyset_chunks(queryset, ordering, chunk_size):
+    """Обходит queryset пачками по ключу, каждая — отдельный запрос."""
+    keyset = KeysetPagination(ordering)
+    queryset = queryset.order_by(*ordering)
+    chunk = list(queryset[:chunk_size])
+    while chunk:
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        values = [_key(chunk[-1], name) for name in ordering]
+        chunk = list(
+            queryset.filter(keyset.after(values, False))[:chunk_size]
+        )
+
+
+def json_array(items):
+    renderer = FastJSONRenderer()
+    yield b'['
+    separator = b''
+    for chunk in items:
+        if chunk:
+            yield separator + renderer.render(chunk)[1:-1]
+            separator = b','
+    yield b']'
+
+
+def ndjson(items):
+    renderer = FastJSONRenderer()
+    for chunk in items:
+        yield b''.join(renderer.render(item) + b'\n' for item in chunk)
+
+
+def compressed(stream, encoder):
+    for data in stream:
+        encoded = encoder.encode(data)
+        if encoded:
+            yield encoded
+    yield encoder.finish()
+
+
+def streaming_response(request, items, stream_format):
+    """Ответ, отдающий сериализованные пачки по мере их готовности."""
+    stream = (json_array if stream_format == 'json' else ndjson)(items)
+    encoder = negotiate_encoder(request)
+    if encoder is not None:
+        stream = compressed(stream, encoder)
+    response = StreamingHttpResponse(
+        stream, content_type=CONTENT_TYPES[stream_format]
+    )
+    if encoder is not None:
+        response['Content-Encoding'] = encoder.name
+    patch_vary_headers(response, ('Accept-Encoding',))
+    # nginx не должен копить поток в буфере.
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,108 @@
+"""Ограничение частоты запросов корзиной токенов и счётчики отказов.
+
+Корзина вмещает ``N`` токенов из ставки ``N/период`` и пополняется
+равномерно: клиент может сделать ``N`` запросов подряд, а дальше — по
+одному в ``период / N``. Состояние корзины — пара (токены, время) в кеше
+``API_THROTTLE_CACHE_ALIAS``: кеш в памяти процесса считает по
+воркерам, общий кеш — по всему сервису. Проверка — одно чтение и одна
+запись; между ними параллельный запрос может проскочить, и корзина
+уйдёт в минус на единицы, что для защиты от злоупотреблений неважно.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+KEY_PREFIX = 'throttle'
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+_rejected = Counter()
+_rejected_lock = threading.Lock()
+
+
+def count_rejection(reason):
+    with _rejected_lock:
+        _rejected[reason] += 1
+
+
+def get_stats():
+    """Отказы текущего процесса по ограничениям."""
+    with _rejected_lock:
+        return dict(_rejected)
+
+
+def reset_stats():
+    with _rejected_lock:
+        _rejected.clear()
+
+
+def parse_rate(rate):
+    """``'5/hour'`` -> (ёмкость 5, пополнение токенов в секунду)."""
+    number, period = rate.split('/')
+    capacity = int(number)
+    return capacity, capacity / DURATIONS[period[0]]
+
+
+def take_token(key, capacity, refill_rate, now=None):
+    """Берёт токен из корзины; возвращает (разрешено, ждать секунд)."""
+    cache = caches[settings.API_THROTTLE_CACHE_ALIAS]
+    now = time.time() if now is None else now
+    tokens, updated = cache.get(key) or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * refill_rate)
+    allowed = tokens >= 1
+    if allowed:
+        tokens -= 1
+    # Запись исчезает, когда корзина успела бы наполниться.
+    cache.set(key, (tokens, now), (capacity - tokens) / refill_rate + 1)
+    return allowed, 0 if allowed else (1 - tokens) / refill_rate
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Корзина токенов на пользователя, а для анонимов — на IP."""
+    scope = None
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        rate = settings.API_THROTTLE_RATES.get(self.scope)
+        if not rate:
+            return True
+        capacity, refill_rate = parse_rate(rate)
+        allowed, self.wait_seconds = take_token(
+            f'{KEY_PREFIX}:{self.scope}:{self.get_ident_key(request)}',
+            capacity, refill_rate
+        )
+        if not allowed:
+            count_rejection(f'throttled:{self.scope}')
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class SignupThrottle(TokenBucketThrottle):
+    scope = 'signup'
+
+
+class TokenThrottle(TokenBucketThrottle):
+    scope = 'token'
+
+
+class WriteThrottle(TokenBucketThrottle):
+    """Ограничивает только запись: чтение списков не расходует токены."""
+    scope = 'review_write'
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        return super().allow_request(request, view)
@@ -1,6 +1,7 @@
-from api.views import (CategoryViewSet, CommentsViewSet, GenreViewSet,
-                       ReviewViewSet, SignupView, TitleViewSet, TokenAPIView,
-                       UserViewSet)
+from api.views import (CacheStatsView, CategoryViewSet, CommentModerationView,
+                       CommentsViewSet, GenreViewSet, MetricsView,
+                       ReviewBulkView, ReviewModerationView, ReviewViewSet,
+                       SignupView, TitleViewSet, TokenAPIView, UserViewSet)
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
@@ -9,6 +10,22 @@ v1_auth_urlpatterns = [
     path('auth/token/', TokenAPIView.as_view(), name='token'),
 ]
 
+v1_bulk_urlpatterns = [
+    path('reviews/bulk/', ReviewBulkView.as_view(), name='reviews-bulk'),
+]
+
+v1_moderation_urlpatterns = [
+    path('moderation/reviews/', ReviewModerationView.as_view(),
+         name='moderation-reviews'),
+    path('moderation/comments/', CommentModerationView.as_view(),
+         name='moderation-comments'),
+]
+
+v1_metrics_urlpatterns = [
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    path('metrics/cache/', CacheStatsView.as_view(), name='cache-stats'),
+]
+
 v1_router = DefaultRouter()
 v1_router.register('users', UserViewSet, basename='user')
 v1_router.register(
@@ -28,4 +45,7 @@ v1_router.register('titles', TitleViewSet, basename='title')
 urlpatterns = [
     path('v1/', include(v1_router.urls)),
     path('v1/', include(v1_auth_urlpatterns)),
+    path('v1/', include(v1_bulk_urlpatterns)),
+    path('v1/', include(v1_moderation_urlpatterns)),
+    path('v1/', include(v1_metrics_urlpatterns)),
 ]
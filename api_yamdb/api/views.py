@@ -1,74 +1,136 @@
-from api.mixins import CustomGenreCategoryViewSet, CustomTitleViewSet
-from api.permissions import (IsAdmin, IsAdminOrReadOnly, IsSelfOrAdmin,
-                             ReadOnlyForUnauthorized)
-from api.serializers import (CategorySerializer, CommentSerializer,
-                             GenreSerializer, ReviewSerializer,
+from api import metrics, throttling
+from api.bulk import (CategoryUpsert, GenreUpsert, ReviewUpsert, TitleUpsert,
+                      run_bulk_upsert)
+from api.cache import cached_response
+from api.cache import get_stats as get_cache_stats
+from api.mixins import (BulkUpsertMixin, CachedReadMixin,
+                        CustomGenreCategoryViewSet, CustomTitleViewSet,
+                        NestedParentMixin, SerializerQueryPlanMixin,
+                        StreamingListMixin)
+from api.moderation import moderate
+from api.pagination import NamePagination, PubDatePagination
+from api.permissions import (IsAdmin, IsAdminOrReadOnly, IsModerator,
+                             IsSelfOrAdmin, ReadOnlyForUnauthorized)
+from api.pool import get_stats as get_pool_stats
+from api.routers import get_health as get_replica_health
+from api.serializers import (ArchivedCommentSerializer,
+                             ArchivedReviewSerializer, CategorySerializer,
+                             CommentSerializer, GenreSerializer,
+                             ModerationSerializer, ReviewSerializer,
                              SignupSerializer, TitleReadSerializer,
-                             TitleSerializer, TokenSerializer, UserSerializer)
-from django.core.mail import send_mail
-from django.db.models import Avg
+                             TitleSerializer, TokenSerializer, UserSerializer,
+                             stats_requested)
+from api.throttling import SignupThrottle, TokenThrottle, WriteThrottle
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.utils import translate_validation
 from rest_framework import filters, generics, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
+from reviews.facets import FACET_PARAMS, title_facets
 from reviews.filter import TitleFilter
-from reviews.models import Category, Genre, Review, Title
+from reviews.models import (LIVE, ArchivedComment, ArchivedReview, Category,
+                            Comment, Genre, Review, ScoreBucket, Title)
+from reviews.rankings import ranked_title_ids
+from reviews.scores import score_stats, title_histogram
 from users.models import User
+from users.outbox import enqueue_email
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
-    """Представление модели отзывов."""
-    serializer_class = ReviewSerializer
-    permission_classes = (ReadOnlyForUnauthorized,)
+def soft_delete(instance):
+    """Помечает отзыв или коммент удалённым, не трогая строку."""
+    instance.is_deleted = True
+    instance.save(update_fields=['is_deleted'])
 
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context['title'] = self.kwargs.get('title_id')
-        return context
 
-    def title_object(self):
-        return get_object_or_404(Title, id=self.kwargs.get('title_id'))
+def archived_list(view, queryset):
+    """Страница архивных записей; пустая — только у живого родителя."""
+    page = view.paginate_queryset(queryset)
+    serializer = view.get_serializer(page, many=True)
+    return view.get_paginated_response(serializer.data)
 
-    def get_queryset(self):
-        title = self.title_object()
-        return title.reviews.all()
+
+class ReviewViewSet(NestedParentMixin, StreamingListMixin,
+                    SerializerQueryPlanMixin, viewsets.ModelViewSet):
+    """Представление модели отзывов."""
+    queryset = Review.objects.filter(LIVE)
+    serializer_class = ReviewSerializer
+    permission_classes = (ReadOnlyForUnauthorized,)
+    throttle_classes = (WriteThrottle,)
+    pagination_class = PubDatePagination
+    parent_model = Title
+    parent_field = 'title'
+    parent_lookups = {'pk': 'title_id'}
 
     def perform_create(self, serializer):
-        title = self.title_object()
         serializer.save(
-            author=self.request.user,
-            title=title
+            author_id=self.request.user.pk,
+            title=self.get_parent()
         )
 
+    def perform_destroy(self, instance):
+        soft_delete(instance)
+
+    @action(detail=False, serializer_class=ArchivedReviewSerializer)
+    def archive(self, request, title_id=None):
+        """Отзывы произведения, перенесённые в архив."""
+        return archived_list(self, ArchivedReview.objects.filter(
+            LIVE, title_id=title_id
+        ).select_related('author'))
 
-class CommentsViewSet(viewsets.ModelViewSet):
+
+class CommentsViewSet(NestedParentMixin, StreamingListMixin,
+                      SerializerQueryPlanMixin, viewsets.ModelViewSet):
     """Представление модели комментов."""
+    queryset = Comment.objects.filter(
+        LIVE, review__is_hidden=False, review__is_deleted=False
+    )
     serializer_class = CommentSerializer
     permission_classes = (ReadOnlyForUnauthorized,)
-
-    def review_object(self):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        return get_object_or_404(
-            Review,
-            title=title,
-            id=self.kwargs.get('review_id')
-        )
-
-    def get_queryset(self):
-        review = self.review_object()
-        return review.comments.all()
+    throttle_classes = (WriteThrottle,)
+    pagination_class = PubDatePagination
+    parent_model = Review
+    parent_queryset = Review.objects.filter(LIVE)
+    parent_field = 'review'
+    parent_lookups = {'pk': 'review_id', 'title_id': 'title_id'}
 
     def perform_create(self, serializer):
-        review = self.review_object()
         serializer.save(
-            author=self.request.user,
-            review=review
+            author_id=self.request.user.pk,
+            review=self.get_parent()
         )
 
+    def perform_destroy(self, instance):
+        soft_delete(instance)
+
+    def get_parent(self):
+        try:
+            return super().get_parent()
+        except Http404:
+            # Архивный отзыв: его комментарии читаются только из архива.
+            if self.action != 'archive':
+                raise
+            return get_object_or_404(
+                ArchivedReview.objects.filter(LIVE), **self.parent_filter()
+            )
+
+    @action(detail=False, serializer_class=ArchivedCommentSerializer)
+    def archive(self, request, title_id=None, review_id=None):
+        """Комментарии отзыва, перенесённые в архив."""
+        # У архивного комментария нет внешнего ключа: отзыв проверяем всегда.
+        self.get_parent()
+        return archived_list(self, ArchivedComment.objects.filter(
+            LIVE, review_id=review_id
+        ).select_related('author'))
+
 
 class UserViewSet(viewsets.ModelViewSet):
     """Представление модели пользователей."""
@@ -86,6 +148,8 @@ class UserViewSet(viewsets.ModelViewSet):
             permission_classes=(IsSelfOrAdmin,))
     def me(self, request, *args, **kwargs):
         user = request.user
+        if not isinstance(user, User):
+            user = get_object_or_404(User, pk=user.pk)
         if request.method == 'PATCH':
             serializer = self.get_serializer(
                 user, data=request.data, partial=True)
@@ -101,29 +165,89 @@ class SignupView(generics.GenericAPIView):
     queryset = User.objects.all()
     serializer_class = SignupSerializer
     permission_classes = (AllowAny,)
+    throttle_classes = (SignupThrottle,)
 
     def post(self, request):
         user = request.data
         serializer = self.serializer_class(data=user)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        user_data = serializer.data
-        user = User.objects.get(username=user_data['username'])
-        email_body = (f'Здравствуйте {user.username}. Используйте код ниже,'
-                      ' чтобы верифицировать вашу почту:\n'
-                      f'{user.confirmation_code}')
-        send_mail('Verify your email', email_body, 'from@example.com',
-                  [user.email])
+        with transaction.atomic():
+            user = serializer.save()
+            email_body = (f'Здравствуйте {user.username}. Используйте код '
+                          'ниже, чтобы верифицировать вашу почту:\n'
+                          f'{user.confirmation_code}')
+            enqueue_email('Verify your email', email_body,
+                          'from@example.com', user.email)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 class TokenAPIView(TokenObtainPairView):
     """Представление получения токена пользователем."""
     permission_classes = (AllowAny,)
+    throttle_classes = (TokenThrottle,)
     serializer_class = TokenSerializer
 
 
-class CategoryViewSet(CustomGenreCategoryViewSet):
+class CacheStatsView(APIView):
+    """Счётчики кеша ответов каталога."""
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return Response(get_cache_stats(), status=status.HTTP_200_OK)
+
+
+class MetricsView(APIView):
+    """Метрики запросов по представлениям и счётчики кеша."""
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return Response({
+            'sample_rate': settings.API_METRICS_SAMPLE_RATE,
+            'endpoints': metrics.get_metrics(),
+            'cache': get_cache_stats(),
+            'db_pools': get_pool_stats(),
+            'db_replicas': get_replica_health(),
+            'rejected': throttling.get_stats(),
+        }, status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        metrics.reset()
+        throttling.reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ModerationView(APIView):
+    """Удаление, скрытие и возврат набора объектов одним запросом."""
+    permission_classes = (IsModerator,)
+    model = None
+
+    def post(self, request):
+        serializer = ModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(moderate(self.model, serializer.validated_data))
+
+
+class ReviewModerationView(ModerationView):
+    model = Review
+
+
+class CommentModerationView(ModerationView):
+    model = Comment
+
+
+class ReviewBulkView(APIView):
+    """Массовая загрузка отзывов к разным произведениям."""
+    permission_classes = (IsAdmin,)
+
+    def post(self, request):
+        return Response(
+            run_bulk_upsert(ReviewUpsert, request.data),
+            status=status.HTTP_200_OK
+        )
+
+
+class CategoryViewSet(BulkUpsertMixin, CachedReadMixin,
+                      CustomGenreCategoryViewSet):
     """Представление модели категории."""
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
@@ -131,9 +255,12 @@ class CategoryViewSet(CustomGenreCategoryViewSet):
     filter_backends = [filters.SearchFilter]
     lookup_field = 'slug'
     search_fields = ('=name',)
+    cache_namespaces = ('category',)
+    bulk_upsert_class = CategoryUpsert
 
 
-class GenreViewSet(CustomGenreCategoryViewSet):
+class GenreViewSet(BulkUpsertMixin, CachedReadMixin,
+                   CustomGenreCategoryViewSet):
     """Представление модели жантра."""
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
@@ -141,17 +268,111 @@ class GenreViewSet(CustomGenreCategoryViewSet):
     filter_backends = [filters.SearchFilter]
     lookup_field = 'slug'
     search_fields = ('=name',)
+    cache_namespaces = ('genre',)
+    bulk_upsert_class = GenreUpsert
 
 
-class TitleViewSet(CustomTitleViewSet):
+class TitleViewSet(BulkUpsertMixin, StreamingListMixin, CachedReadMixin,
+                   SerializerQueryPlanMixin, CustomTitleViewSet):
     """Представление модели произведения."""
-    queryset = Title.objects.all().annotate(
-        Avg("reviews__score")).order_by('name')
+    queryset = Title.objects.all().order_by('name')
     permission_classes = [IsAdminOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_class = TitleFilter
+    pagination_class = NamePagination
+    bulk_upsert_class = TitleUpsert
+    lookup_value_regex = r'\d+'
+
+    def get_cache_namespaces(self):
+        if self.action == 'retrieve':
+            return (f'title:{self.kwargs["pk"]}', 'category', 'genre')
+        if self.action == 'stats':
+            return (f'title:{self.kwargs["pk"]}',)
+        if self.action in ('top', 'trending'):
+            return ('title', 'category', 'genre', 'ranking')
+        return ('title', 'category', 'genre')
 
     def get_serializer_class(self):
         if self.request.method in permissions.SAFE_METHODS:
             return TitleReadSerializer
         return TitleSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if stats_requested(self.request):
+            return queryset.prefetch_related('score_buckets')
+        return queryset
+
+    def title_stats(self, pk):
+        buckets = list(ScoreBucket.objects.filter(title_id=pk))
+        if not buckets:
+            get_object_or_404(Title.objects.only('pk'), pk=pk)
+        return Response(score_stats(title_histogram(buckets)))
+
+    @action(detail=True)
+    def stats(self, request, pk=None):
+        """Распределение, медиана, процентили и разброс оценок."""
+        return cached_response(
+            request, self.get_cache_namespaces(),
+            lambda: self.title_stats(pk)
+        )
+
+    @action(detail=False)
+    def facets(self, request):
+        """Число произведений по жанрам, категориям и годам для фильтров."""
+        filterset = TitleFilter(
+            request.query_params, queryset=Title.objects.all()
+        )
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        params = filterset.form.cleaned_data
+        queryset = None
+        if any(value for name, value in params.items()
+               if name not in FACET_PARAMS):
+            # Фильтры по названию и поиску таблица счётчиков не знает.
+            queryset = TitleFilter({
+                name: value for name, value in request.query_params.items()
+                if name not in FACET_PARAMS
+            }, queryset=Title.objects.all()).qs
+        return cached_response(
+            request, self.get_cache_namespaces(),
+            lambda: Response(title_facets(params, queryset))
+        )
+
+    def get_ranking_limit(self):
+        limit = self.request.query_params.get('limit', '10')
+        if not limit.isdigit() or not (
+            0 < int(limit) <= settings.API_RANKING_MAX_LIMIT
+        ):
+            raise ValidationError({'limit': [
+                f'Целое число от 1 до {settings.API_RANKING_MAX_LIMIT}.'
+            ]})
+        return int(limit)
+
+    def ranked(self, kind):
+        """Произведения в порядке таблицы рейтинга, с их оценкой."""
+        ranked = ranked_title_ids(kind, self.get_ranking_limit())
+        titles = self.get_queryset().in_bulk([pk for pk, _ in ranked])
+        results = []
+        for pk, score in ranked:
+            if pk in titles:
+                data = self.get_serializer(titles[pk]).data
+                data['score'] = round(score, 4)
+                results.append(data)
+        return Response(results)
+
+    @action(detail=False)
+    def top(self, request):
+        """Лучшие произведения по байесовскому рейтингу."""
+        return cached_response(
+            request, self.get_cache_namespaces(),
+            lambda: self.ranked('top')
+        )
+
+    @action(detail=False)
+    def trending(self, request):
+        """Произведения, о которых больше всего пишут в последние дни."""
+        return cached_response(
+            request, self.get_cache_namespaces(),
+            lambda: self.ranked('trending')
+        )
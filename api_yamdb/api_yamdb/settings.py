@@ -17,6 +17,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'reviews.apps.ReviewsConfig',
@@ -25,6 +26,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.AdmissionControlMiddleware',
+    'api.middleware.QueryMetricsMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,10 +67,76 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default=None),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default=None),
         'HOST': os.getenv('DB_HOST', default=None),
-        'PORT': os.getenv('DB_PORT', default=None)
+        'PORT': os.getenv('DB_PORT', default=None),
+        # Для бэкендов пула (api.pool.postgresql) держите 0:
+        # соединение возвращается в пул в конце запроса.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=0)),
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', default=10)),
+            'IDLE_TIMEOUT': int(os.getenv('DB_POOL_IDLE_TIMEOUT', default=300)),
+            'HEALTH_CHECK_INTERVAL': int(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', default=30)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=5)),
+        },
+    }
+}
+
+# Реплики только для чтения: хосты через запятую, остальные параметры
+# подключения — как у основной базы.
+DATABASE_REPLICAS = []
+for number, host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', default='').split(',')), 1):
+    DATABASES[f'replica_{number}'] = dict(DATABASES['default'], HOST=host.strip(), TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(f'replica_{number}')
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+# Права и версии токенов всегда читаются с основной базы.
+DATABASE_PRIMARY_APPS = ('users',)
+# Сколько секунд после записи читать данные автора с основной базы.
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', default=5))
+# Как часто проверять соединение с репликой, секунд.
+DATABASE_REPLICA_CHECK_INTERVAL = 5
+
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yamdb'),
     }
 }
 
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', default=300))
+
+# Списки отзывов и комментариев читаются строками values(), без моделей.
+API_FLAT_LISTS = True
+# Строк в одной пачке потоковой выдачи списков (?stream=json|ndjson).
+API_STREAM_CHUNK_SIZE = 500
+# Наибольшее число объектов в одном запросе массовой загрузки.
+API_BULK_MAX_ITEMS = 10000
+# Наибольшее число произведений в ответе топа и трендов (?limit=).
+API_RANKING_MAX_LIMIT = 100
+
+# Байесовский рейтинг: сколько воображаемых отзывов со средней оценкой
+# каталога добавляется к отзывам произведения.
+RANKING_PRIOR_REVIEWS = int(os.getenv('RANKING_PRIOR_REVIEWS', default=10))
+# Тренды: окно отзывов и период, за который вес отзыва падает вдвое, дни.
+RANKING_TRENDING_DAYS = int(os.getenv('RANKING_TRENDING_DAYS', default=30))
+RANKING_HALF_LIFE_DAYS = float(os.getenv('RANKING_HALF_LIFE_DAYS', default=7))
+# Период пересчёта таблицы рейтинга командой refresh_rankings --loop, с.
+RANKING_REFRESH_INTERVAL = int(os.getenv('RANKING_REFRESH_INTERVAL', default=600))
+
+# Возраст отзывов и комментариев, после которого archive_content переносит
+# их в архивные таблицы, дни. Должен быть больше окна трендов.
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', default=365))
+
+# С какого числа строк списки админки берут оценку из статистики
+# PostgreSQL вместо COUNT(*).
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.getenv('ADMIN_ESTIMATED_COUNT_THRESHOLD', default=100000))
+
+# Доля запросов, для которых собираются метрики SQL и сериализации
+# (0 — замеры выключены, 1 — замеряется каждый запрос).
+API_METRICS_SAMPLE_RATE = float(os.getenv('API_METRICS_SAMPLE_RATE', default=0))
+# С какого числа повторов одинаковый SQL в запросе считается N+1.
+API_METRICS_DUPLICATE_THRESHOLD = 3
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -107,17 +177,50 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 4,
+    # Сколько прокси перед приложением дописывают X-Forwarded-For (nginx).
+    'NUM_PROXIES': int(os.getenv('API_NUM_PROXIES', default=1)),
 }
 
+# Корзины токенов: 5/hour — до 5 запросов подряд, затем по одному в
+# 12 минут. Ключ — пользователь, для анонимов — IP.
+API_THROTTLE_RATES = {
+    'signup': os.getenv('API_THROTTLE_SIGNUP', default='5/hour'),
+    'token': os.getenv('API_THROTTLE_TOKEN', default='20/minute'),
+    # Создание и изменение отзывов и комментариев.
+    'review_write': os.getenv('API_THROTTLE_REVIEW_WRITE', default='30/minute'),
+}
+API_THROTTLE_CACHE_ALIAS = 'default'
+# Сброс нагрузки с 503: запросов в обработке на процесс и время ожидания
+# в очереди nginx, мс (0 — без ограничения).
+API_ADMISSION_MAX_CONCURRENT = int(os.getenv('API_ADMISSION_MAX_CONCURRENT', default=0))
+API_ADMISSION_MAX_QUEUE_MS = int(os.getenv('API_ADMISSION_MAX_QUEUE_MS', default=0))
+API_ADMISSION_RETRY_AFTER = 1
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=30),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Сколько секунд версия токенов пользователя живёт в памяти процесса:
+# столько может пройти от смены роли до отказа старым токенам.
+# С LocMemCache этим же сроком ограничено хранение версии в кеше.
+JWT_TOKEN_VERSION_LOCAL_TTL = int(os.getenv('JWT_TOKEN_VERSION_LOCAL_TTL', default=5))
+# Срок версии в общем кеше (CACHE_BACKEND не в памяти процесса).
+JWT_TOKEN_VERSION_CACHE_TIMEOUT = 24 * 60 * 60
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
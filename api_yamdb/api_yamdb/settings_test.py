@@ -0,0 +1,11 @@
+from api_yamdb.settings import *  # noqa: F401, F403
+
+# Тесты с базой данных гоняются на SQLite в памяти,
+# чтобы не требовать запущенного PostgreSQL.
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+DATABASE_REPLICAS = []
@@ -0,0 +1,22 @@
+"""Настройки gunicorn; переопределяются переменными окружения.
+
+По умолчанию воркеры ``gthread``: пока поток ждёт базу или медленного
+клиента на потоковом ответе, остальные потоки процесса обслуживают
+запросы, а keep-alive соединения от nginx не занимают процесс целиком.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', default='0:8000')
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', default='gthread')
+workers = int(os.getenv(
+    'GUNICORN_WORKERS', default=multiprocessing.cpu_count() * 2 + 1
+))
+threads = int(os.getenv('GUNICORN_THREADS', default=4))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', default=30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', default=30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', default=5))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', default=1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER',
+                                    default=100))
+accesslog = os.getenv('GUNICORN_ACCESSLOG', default=None)
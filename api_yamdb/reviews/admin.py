@@ -1,13 +1,27 @@
 from django.contrib import admin
 from reviews.models import Category, Genre, Review, Title
+from reviews.paginator import EstimatedCountPaginator
+from reviews.search import search_titles
+
+SEARCH_TITLES_LIMIT = 500
 
 
 class TitleAdmin(admin.ModelAdmin):
     """Класс для админки произведений."""
     list_display = ('name', 'year', 'description', 'category')
+    list_select_related = ('category',)
     search_fields = ('name',)
+    autocomplete_fields = ('category', 'genre')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по индексу названий, а не UPPER(name) LIKE по всей таблице.
+        if not search_term:
+            return queryset, False
+        return search_titles(queryset, search_term), False
+
 
 class GenreAdmin(admin.ModelAdmin):
     """Класс для админки жанров."""
@@ -25,10 +39,25 @@ class CategoryAdmin(admin.ModelAdmin):
 
 class ReviewAdmin(admin.ModelAdmin):
     """Класс для админки отзывов."""
-    list_display = ('title', 'score')
-    search_fields = ('title',)
+    list_display = ('title', 'author', 'score', 'pub_date')
+    list_select_related = ('title', 'author')
+    search_fields = ('title__name',)
+    autocomplete_fields = ('title',)
+    raw_id_fields = ('author',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Отзывы самых подходящих произведений из индекса названий:
+        # FTS-запрос SQLite нельзя вложить подзапросом.
+        if not search_term:
+            return queryset, False
+        title_ids = list(search_titles(
+            Title.objects.using(queryset.db), search_term
+        ).values_list('pk', flat=True)[:SEARCH_TITLES_LIMIT])
+        return queryset.filter(title_id__in=title_ids), False
+
 
 admin.site.register(Title, TitleAdmin)
 admin.site.register(Genre, GenreAdmin)
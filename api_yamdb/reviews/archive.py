@@ -0,0 +1,204 @@
+"""Перенос старых отзывов и комментариев из рабочих таблиц в архив.
+
+Отзывы старше порога переезжают пачками в ``ArchivedReview`` вместе со
+всеми комментариями, а старые комментарии оставшихся отзывов — в
+``ArchivedComment``. Оценки архивных отзывов по-прежнему входят в
+рейтинг, поэтому суммы и гистограммы произведений не меняются.
+
+Самые старые архивные строки можно выгрузить в сжатые файлы
+``reviews.jsonl.gz`` и ``comments.jsonl.gz`` формата импорта и удалить из
+базы: ``import_catalog`` вернёт их в рабочие таблицы. Пачка сначала
+пишется во временный файл и дописывается в выгрузку только после
+фиксации удаления, так что повторный запуск не выгружает её дважды.
+"""
+import gzip
+import json
+import os
+import shutil
+
+from django.db import connections, transaction
+from reviews.models import (ArchivedComment, ArchivedReview, Comment, Review,
+                            Title, suspend_rating_sync, titles_rated)
+
+REVIEW_FIELDS = ('id', 'title_id', 'text', 'author_id', 'score',
+                 'pub_date', 'is_hidden', 'is_deleted')
+COMMENT_FIELDS = ('id', 'review_id', 'text', 'author_id', 'pub_date',
+                  'is_hidden', 'is_deleted')
+
+
+def _id_batches(queryset, size):
+    """Пачки ``id`` строк, пока запрос не опустеет."""
+    while True:
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:size])
+        if not ids:
+            return
+        yield ids
+
+
+def _move_comments(comments, using):
+    moved = ArchivedComment.objects.using(using).bulk_create(
+        ArchivedComment(**row) for row in comments.values(*COMMENT_FIELDS)
+    )
+    comments.delete()
+    return len(moved)
+
+
+def archive_reviews(cutoff, batch_size=1000, using='default'):
+    """Переносит отзывы старше ``cutoff`` с комментариями в архив.
+
+    Возвращает число перенесённых отзывов и комментариев.
+    """
+    reviews = Review.objects.using(using).filter(pub_date__lt=cutoff)
+    comments = Comment.objects.using(using)
+    moved_reviews = moved_comments = 0
+    for ids in _id_batches(reviews, batch_size):
+        with transaction.atomic(using=using), suspend_rating_sync():
+            ArchivedReview.objects.using(using).bulk_create(
+                ArchivedReview(**row)
+                for row in reviews.filter(pk__in=ids).values(*REVIEW_FIELDS)
+            )
+            moved_comments += _move_comments(
+                comments.filter(review_id__in=ids), using
+            )
+            reviews.filter(pk__in=ids).delete()
+        moved_reviews += len(ids)
+    return moved_reviews, moved_comments
+
+
+def archive_comments(cutoff, batch_size=1000, using='default'):
+    """Переносит в архив старые комментарии оставшихся отзывов."""
+    comments = Comment.objects.using(using).filter(pub_date__lt=cutoff)
+    moved = 0
+    for ids in _id_batches(comments, batch_size):
+        with transaction.atomic(using=using):
+            moved += _move_comments(comments.filter(pk__in=ids), using)
+    return moved
+
+
+def _pending_path(path):
+    return path + '.pending'
+
+
+def _write_batch(path, rows):
+    """Пишет пачку во временный файл рядом с выгрузкой."""
+    count = 0
+    with gzip.open(_pending_path(path), 'wt', encoding='utf-8') as output:
+        for row in rows:
+            output.write(json.dumps(row, ensure_ascii=False) + '\n')
+            count += 1
+    return count
+
+
+def _commit_batch(path):
+    # Дописываем отдельным gzip-потоком: gzip читает их подряд.
+    pending = _pending_path(path)
+    with open(pending, 'rb') as source, open(path, 'ab') as output:
+        shutil.copyfileobj(source, output)
+    os.remove(pending)
+
+
+def _recover_batch(path, model, using):
+    """Доводит пачку, оставшуюся от прерванного запуска.
+
+    Если строк пачки уже нет в базе, их удаление зафиксировано, и пачка
+    дописывается в выгрузку; иначе она будет выгружена заново.
+    """
+    pending = _pending_path(path)
+    if not os.path.exists(pending):
+        return
+    try:
+        with gzip.open(pending, 'rt', encoding='utf-8') as source:
+            ids = [json.loads(line)['id'] for line in source]
+    except (EOFError, OSError, ValueError):
+        # Файл не дописан: до удаления строк дело не дошло.
+        ids = None
+    if ids is None or model.objects.using(using).filter(
+        pk__in=ids
+    ).exists():
+        os.remove(pending)
+    else:
+        _commit_batch(path)
+
+
+def export_archive(directory, cutoff, batch_size=1000, using='default'):
+    """Выгружает архивные строки старше ``cutoff`` в файлы и удаляет их.
+
+    Рейтинг затронутых произведений пересчитывается: выгруженные оценки
+    в нём больше не учитываются. Возвращает число отзывов и комментариев.
+    """
+    os.makedirs(directory, exist_ok=True)
+    reviews = ArchivedReview.objects.using(using).filter(pub_date__lt=cutoff)
+    comments = ArchivedComment.objects.using(using).filter(
+        pub_date__lt=cutoff
+    )
+    reviews_path = os.path.join(directory, 'reviews.jsonl.gz')
+    comments_path = os.path.join(directory, 'comments.jsonl.gz')
+    _recover_batch(reviews_path, ArchivedReview, using)
+    _recover_batch(comments_path, ArchivedComment, using)
+    exported_reviews = exported_comments = 0
+    for ids in _id_batches(reviews, batch_size):
+        batch = reviews.filter(pk__in=ids)
+        title_ids = set(batch.values_list('title_id', flat=True))
+        exported_reviews += _write_batch(
+            reviews_path,
+            ({
+                'id': row['id'],
+                'title': row['title_id'],
+                'author': row['author__username'],
+                'text': row['text'],
+                'score': row['score'],
+                'pub_date': row['pub_date'].isoformat(),
+                'is_hidden': row['is_hidden'],
+                'is_deleted': row['is_deleted'],
+            } for row in batch.values(
+                *REVIEW_FIELDS, 'author__username'
+            ).order_by('pk'))
+        )
+        with transaction.atomic(using=using), suspend_rating_sync():
+            batch.delete()
+            Title.objects.using(using).filter(
+                pk__in=title_ids
+            ).recalculate_rating()
+            titles_rated.send(sender=Title, title_ids=title_ids)
+        _commit_batch(reviews_path)
+    for ids in _id_batches(comments, batch_size):
+        batch = comments.filter(pk__in=ids)
+        exported_comments += _write_batch(
+            comments_path,
+            ({
+                'id': row['id'],
+                'review': row['review_id'],
+                'author': row['author__username'],
+                'text': row['text'],
+                'pub_date': row['pub_date'].isoformat(),
+                'is_hidden': row['is_hidden'],
+                'is_deleted': row['is_deleted'],
+            } for row in batch.values(
+                *COMMENT_FIELDS, 'author__username'
+            ).order_by('pk'))
+        )
+        batch.delete()
+        _commit_batch(comments_path)
+    return exported_reviews, exported_comments
+
+
+def table_counts(using='default'):
+    """Число строк в рабочих и архивных таблицах."""
+    return {
+        model._meta.db_table: model.objects.using(using).count()
+        for model in (Review, Comment, ArchivedReview, ArchivedComment)
+    }
+
+
+def vacuum(using='default'):
+    """Возвращает место удалённых строк и обновляет статистику таблиц."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for model in (Review, Comment, ArchivedReview, ArchivedComment):
+                cursor.execute(
+                    'VACUUM ANALYZE '
+                    + connection.ops.quote_name(model._meta.db_table)
+                )
+        elif connection.vendor == 'sqlite':
+            cursor.execute('VACUUM')
@@ -0,0 +1,263 @@
+"""Счётчики произведений по жанрам, категориям и годам для фильтров.
+
+Таблица ``TitleFacet`` хранит число произведений на каждое сочетание
+жанра, категории и года и обновляется приращениями из сигналов моделей,
+так что фасеты каталога считаются без сканирования произведений. После
+массовых операций в обход сигналов таблица пересобирается целиком.
+
+Счётчики каждого измерения учитывают фильтры по остальным измерениям,
+но не по нему самому: в списке жанров видно, сколько произведений
+найдётся при выборе другого жанра.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from reviews.models import Category, Genre, Title, TitleFacet
+
+NONE = 0
+FACET_PARAMS = ('genre', 'category', 'year')
+# Виды массовой загрузки, после которых таблица пересобирается.
+IMPORTED_KINDS = {'titles', 'genre_title'}
+
+
+def facet_keys(category_id, year, genre_ids):
+    """Строки таблицы, в которых учитывается произведение."""
+    category_id = category_id or NONE
+    return [(NONE, category_id, year)] + [
+        (genre_id, category_id, year) for genre_id in genre_ids
+    ]
+
+
+def shift_facets(deltas, using):
+    """Применяет приращения счётчиков ``{(жанр, категория, год): n}``."""
+    facets = TitleFacet.objects.using(using)
+    for (genre_id, category_id, year), delta in deltas.items():
+        if not delta:
+            continue
+        key = {'genre_id': genre_id, 'category_id': category_id,
+               'year': year}
+        if facets.filter(**key).update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic(using=using):
+                facets.create(count=delta, **key)
+        except IntegrityError:
+            # Строку успел создать параллельный запрос.
+            facets.filter(**key).update(count=F('count') + delta)
+
+
+def genre_ids(title, using):
+    return list(Title.genre.through.objects.using(using).filter(
+        title_id=title.pk
+    ).values_list('genre_id', flat=True))
+
+
+def title_saving(title, using):
+    """Запоминает категорию и год до сохранения, если они неизвестны."""
+    if title.pk is None or getattr(title, '_faceted', (None, None))[1]:
+        return
+    title._faceted = Title.objects.using(using).filter(
+        pk=title.pk
+    ).values_list('category_id', 'year').first() or (None, None)
+
+
+def title_saved(title, created, using):
+    category_id, year = title.category_id, title.year
+    old_category_id, old_year = getattr(title, '_faceted', (None, None))
+    if created or old_year is None:
+        # Жанры добавятся позже и придут через m2m_changed.
+        shift_facets({(NONE, category_id or NONE, year): 1}, using)
+    elif (old_category_id, old_year) != (category_id, year):
+        genres = genre_ids(title, using)
+        deltas = Counter()
+        deltas.subtract(facet_keys(old_category_id, old_year, genres))
+        deltas.update(facet_keys(category_id, year, genres))
+        shift_facets(deltas, using)
+    title._faceted = (category_id, year)
+
+
+def title_deleting(title, using):
+    shift_facets(Counter({
+        key: -1 for key in facet_keys(
+            title.category_id, title.year, genre_ids(title, using)
+        )
+    }), using)
+
+
+def links_changed(links, sign, using):
+    """Приращения для добавленных или удалённых связей с жанрами."""
+    deltas = Counter()
+    titles = Title.objects.using(using).in_bulk(
+        {title_id for title_id, _ in links}
+    )
+    for title_id, genre_id in links:
+        title = titles[title_id]
+        deltas[(genre_id, title.category_id or NONE, title.year)] += sign
+    shift_facets(deltas, using)
+
+
+def genre_links_changed(instance, action, reverse, pk_set, using):
+    """Обработка ``m2m_changed`` связей произведений с жанрами."""
+    if action == 'post_add':
+        links_changed([
+            (pk, instance.pk) if reverse else (instance.pk, pk)
+            for pk in pk_set
+        ], 1, using)
+    elif action in ('pre_remove', 'pre_clear'):
+        # После удаления уже не узнать, какие из связей существовали.
+        own, other = (
+            ('genre_id', 'title_id') if reverse else ('title_id', 'genre_id')
+        )
+        links = Title.genre.through.objects.using(using).filter(
+            **{own: instance.pk}
+        )
+        if action == 'pre_remove':
+            links = links.filter(**{f'{other}__in': pk_set})
+        links_changed(
+            list(links.values_list('title_id', 'genre_id')), -1, using
+        )
+
+
+def title_state(title_ids, using):
+    """Категория, год и жанры произведений: ``{id: (категория, год,
+    жанры)}``."""
+    state = {
+        pk: (category_id, year, [])
+        for pk, category_id, year in Title.objects.using(using).filter(
+            pk__in=title_ids
+        ).values_list('pk', 'category_id', 'year')
+    }
+    for title_id, genre_id in Title.genre.through.objects.using(using).filter(
+        title_id__in=title_ids
+    ).values_list('title_id', 'genre_id'):
+        state[title_id][2].append(genre_id)
+    return state
+
+
+def titles_replaced(before, after, using):
+    """Переносит в счётчиках произведения, сохранённые в обход сигналов.
+
+    ``before`` и ``after`` — состояния из ``title_state`` до и после.
+    """
+    deltas = Counter()
+    for state, sign in ((before, -1), (after, 1)):
+        for category_id, year, genres in state.values():
+            for key in facet_keys(category_id, year, genres):
+                deltas[key] += sign
+    shift_facets(deltas, using)
+
+
+def genre_deleted(genre, using):
+    TitleFacet.objects.using(using).filter(genre_id=genre.pk).delete()
+
+
+def category_deleted(category, using):
+    """Переносит счётчики удалённой категории в «без категории»."""
+    facets = TitleFacet.objects.using(using).filter(category_id=category.pk)
+    deltas = Counter()
+    for genre_id, year, count in facets.values_list(
+        'genre_id', 'year', 'count'
+    ):
+        deltas[(genre_id, NONE, year)] += count
+    facets.delete()
+    shift_facets(deltas, using)
+
+
+def rebuild_facets(using='default'):
+    """Пересчитывает таблицу счётчиков с нуля двумя группировками."""
+    titles = Title.objects.using(using).order_by().values(
+        'category_id', 'year'
+    ).annotate(count=Count('pk'))
+    links = Title.genre.through.objects.using(using).order_by().values(
+        'genre_id', 'title__category_id', 'title__year'
+    ).annotate(count=Count('pk'))
+    with transaction.atomic(using=using):
+        TitleFacet.objects.using(using).all().delete()
+        TitleFacet.objects.using(using).bulk_create([
+            TitleFacet(genre_id=NONE, category_id=row['category_id'] or NONE,
+                       year=row['year'], count=row['count'])
+            for row in titles
+        ] + [
+            TitleFacet(genre_id=row['genre_id'],
+                       category_id=row['title__category_id'] or NONE,
+                       year=row['title__year'], count=row['count'])
+            for row in links
+        ])
+
+
+def _table_counts(field, genre_id, category_id, year):
+    rows = TitleFacet.objects.filter(count__gt=0)
+    if field == 'genre_id':
+        rows = rows.exclude(genre_id=NONE)
+    else:
+        rows = rows.filter(genre_id=genre_id or NONE)
+    if category_id is not None and field != 'category_id':
+        rows = rows.filter(category_id=category_id)
+    if year is not None and field != 'year':
+        rows = rows.filter(year=year)
+    if field is None:
+        return rows.aggregate(total=Sum('count'))['total'] or 0
+    return dict(rows.order_by().values_list(field).annotate(
+        total=Sum('count')
+    ))
+
+
+def _queryset_counts(queryset, field, genre_id, category_id, year):
+    titles = queryset.order_by()
+    if genre_id is not None and field != 'genre_id':
+        titles = titles.filter(genre=genre_id)
+    if category_id is not None and field != 'category_id':
+        titles = titles.filter(category=category_id)
+    if year is not None and field != 'year':
+        titles = titles.filter(year=year)
+    if field is None:
+        return titles.count()
+    lookup = {'genre_id': 'genre', 'category_id': 'category'}.get(
+        field, field
+    )
+    return dict(titles.filter(**{f'{lookup}__isnull': False}).values_list(
+        lookup
+    ).annotate(total=Count('pk', distinct=True)))
+
+
+def _named(model, counts):
+    objects = model.objects.filter(pk__in=[
+        pk for pk in counts if pk != NONE
+    ]).values('pk', 'slug', 'name')
+    return [{'slug': obj['slug'], 'name': obj['name'],
+             'count': counts[obj['pk']]} for obj in objects]
+
+
+def title_facets(params, queryset=None):
+    """Фасеты каталога для фильтров ``genre``, ``category`` и ``year``.
+
+    Без ``queryset`` счётчики берутся из таблицы; с ним — группировкой
+    по уже отфильтрованным произведениям, для фильтров вне таблицы.
+    """
+    genre_id = category_id = year = None
+    if params.get('genre'):
+        genre_id = Genre.objects.filter(
+            slug=params['genre']
+        ).values_list('pk', flat=True).first() or -1
+    if params.get('category'):
+        category_id = Category.objects.filter(
+            slug=params['category']
+        ).values_list('pk', flat=True).first() or -1
+    if params.get('year'):
+        year = int(params['year'])
+    counts = {}
+    for field in ('genre_id', 'category_id', 'year', None):
+        if queryset is None:
+            counts[field] = _table_counts(field, genre_id, category_id, year)
+        else:
+            counts[field] = _queryset_counts(
+                queryset, field, genre_id, category_id, year
+            )
+    return {
+        'count': counts[None],
+        'genre': _named(Genre, counts['genre_id']),
+        'category': _named(Category, counts['category_id']),
+        'year': [{'year': value, 'count': count}
+                 for value, count in sorted(counts['year'].items())],
+    }
@@ -1,22 +1,21 @@
 import django_filters
 from reviews.models import Title
+from reviews.search import filter_names, search_titles
 
 
 class TitleFilter(django_filters.FilterSet):
     """"Настройка фильтров по категориям, жантрам и именам для произведений."""
-    category = django_filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='contains'
-    )
-    genre = django_filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='contains'
-    )
-    name = django_filters.CharFilter(
-        field_name='name',
-        lookup_expr='contains'
-    )
+    category = django_filters.CharFilter(field_name='category__slug')
+    genre = django_filters.CharFilter(field_name='genre__slug')
+    name = django_filters.CharFilter(method='filter_name')
+    search = django_filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ('category', 'genre', 'name', 'year')
+        fields = ('category', 'genre', 'name', 'year', 'search')
+
+    def filter_name(self, queryset, name, value):
+        return filter_names(queryset, value)
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
@@ -0,0 +1,325 @@
+"""Потоковый импорт каталога из JSON Lines, сжатого JSON Lines и CSV.
+
+Файлы читаются построчно и вставляются пачками через ``bulk_create``,
+так что память не растёт с размером файла. Внешние ключи на категории,
+жанры и пользователей разрешаются по слагу и имени через словари в
+памяти, на произведения и отзывы — по ``id`` из файла. Отзывы для
+комментариев заранее не сверяются: их могут быть десятки миллионов,
+ссылку проверяет внешний ключ в базе. Число загруженных строк
+пишется в контрольную точку в базе в той же транзакции, что и пачка,
+и прерванный импорт продолжается ровно с первой незагруженной строки.
+Пачку, нарушившую ограничение базы (например, второй отзыв автора на
+то же произведение), загружаем заново по строке, пропуская нарушителей
+с номерами их строк в файле.
+Так же загружаются выгрузки архива отзывов из
+``archive_content --export``.
+"""
+import csv
+import datetime
+import gzip
+import json
+import os
+import time
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import IntegrityError, connections, transaction
+from django.utils.dateparse import parse_date
+from reviews.models import (Category, Comment, Genre, ImportCheckpoint, Review,
+                            Title, catalog_imported, suspend_rating_sync)
+from reviews.search import rebuild_index
+from users.models import User
+
+KINDS = (
+    'users', 'categories', 'genres', 'titles',
+    'genre_title', 'reviews', 'comments',
+)
+FORMATS = ('.jsonl', '.jsonl.gz', '.csv')
+
+
+def find_files(directory):
+    """Файлы импорта в каталоге: ``<вид>.jsonl[.gz]`` или ``<вид>.csv``."""
+    files = {}
+    for kind in KINDS:
+        for extension in FORMATS:
+            path = os.path.join(directory, kind + extension)
+            if os.path.exists(path):
+                files[kind] = path
+                break
+    return files
+
+
+def read_rows(path):
+    """Построчно отдаёт номер строки в файле и запись в виде словаря."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', newline='') as source:
+        if path.endswith('.csv'):
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for number, line in enumerate(source, 1):
+            if line.strip():
+                yield number, json.loads(line)
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    batch = list(islice(rows, size))
+    while batch:
+        yield batch
+        batch = list(islice(rows, size))
+
+
+def _pk(row):
+    value = row.get('id')
+    return int(value) if value not in (None, '') else None
+
+
+def _flag(value):
+    # В JSON флаг — логическое значение, в CSV — строка.
+    return str(value).lower() in ('1', 'true')
+
+
+def _date(value, default):
+    # В выгрузках дата бывает и полной меткой времени.
+    return parse_date((value or '')[:10]) or default
+
+
+class Checkpoint:
+    """Число загруженных строк по видам.
+
+    Именованная точка хранится в базе, без имени — только в памяти.
+    """
+
+    def __init__(self, name, using='default'):
+        self.name = name
+        self.using = using
+        self.done = {}
+
+    def _rows(self):
+        return ImportCheckpoint.objects.using(self.using).filter(
+            name=self.name
+        )
+
+    def get(self, kind):
+        if not self.name:
+            return self.done.get(kind, 0)
+        return self._rows().filter(kind=kind).values_list(
+            'rows', flat=True
+        ).first() or 0
+
+    def save(self, kind, rows):
+        if not self.name:
+            self.done[kind] = rows
+            return
+        ImportCheckpoint.objects.using(self.using).update_or_create(
+            name=self.name, kind=kind, defaults={'rows': rows}
+        )
+
+    def clear(self):
+        self.done = {}
+        if self.name:
+            self._rows().delete()
+
+
+class ImportStats:
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.rows = 0
+        self.skipped = 0
+        # Номера строк, отвергнутых базой, и текст ошибки.
+        self.errors = []
+        self.resumed_from = 0
+        self.seconds = 0.0
+
+    @property
+    def rate(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class CatalogImporter:
+    """Загружает виды каталога по порядку, отдавая статистику по каждому."""
+
+    models = {
+        'users': User,
+        'categories': Category,
+        'genres': Genre,
+        'titles': Title,
+        'genre_title': Title.genre.through,
+        'reviews': Review,
+        'comments': Comment,
+    }
+
+    def __init__(self, batch_size=5000, checkpoint=None, using='default'):
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint or Checkpoint(None, using)
+        self.using = using
+        self.today = datetime.date.today()
+        self._maps = {}
+
+    def slug_map(self, model):
+        if model not in self._maps:
+            self._maps[model] = dict(
+                model.objects.using(self.using).values_list('slug', 'pk')
+            )
+        return self._maps[model]
+
+    def title_ids(self):
+        if Title not in self._maps:
+            self._maps[Title] = set(
+                Title.objects.using(self.using).values_list(
+                    'pk', flat=True
+                ).iterator()
+            )
+        return self._maps[Title]
+
+    def user_map(self):
+        if User not in self._maps:
+            self._maps[User] = dict(
+                User.objects.using(self.using).values_list(
+                    'username', 'pk'
+                ).iterator()
+            )
+        return self._maps[User]
+
+    def build_users(self, row):
+        return User(
+            pk=_pk(row),
+            username=row['username'],
+            email=row['email'],
+            role=row.get('role') or User.USER,
+            bio=row.get('bio') or '',
+            first_name=row.get('first_name') or '',
+            last_name=row.get('last_name') or '',
+            password=make_password(None),
+        )
+
+    def build_categories(self, row):
+        return Category(pk=_pk(row), name=row['name'], slug=row['slug'])
+
+    def build_genres(self, row):
+        return Genre(pk=_pk(row), name=row['name'], slug=row['slug'])
+
+    def build_titles(self, row):
+        category_id = None
+        if row.get('category'):
+            category_id = self.slug_map(Category).get(row['category'])
+            if category_id is None:
+                return None
+        return Title(
+            pk=_pk(row),
+            name=row['name'],
+            year=int(row['year']),
+            description=row.get('description') or '',
+            category_id=category_id,
+        )
+
+    def build_genre_title(self, row):
+        genre_id = self.slug_map(Genre).get(row['genre'])
+        title_id = int(row['title'])
+        if genre_id is None or title_id not in self.title_ids():
+            return None
+        return Title.genre.through(title_id=title_id, genre_id=genre_id)
+
+    def build_reviews(self, row):
+        author_id = self.user_map().get(row['author'])
+        title_id = int(row['title'])
+        if author_id is None or title_id not in self.title_ids():
+            return None
+        return Review(
+            pk=_pk(row),
+            title_id=title_id,
+            author_id=author_id,
+            text=row['text'],
+            score=int(row['score']),
+            pub_date=_date(row.get('pub_date'), self.today),
+            is_hidden=_flag(row.get('is_hidden')),
+            is_deleted=_flag(row.get('is_deleted')),
+        )
+
+    def build_comments(self, row):
+        author_id = self.user_map().get(row['author'])
+        if author_id is None:
+            return None
+        return Comment(
+            pk=_pk(row),
+            review_id=int(row['review']),
+            author_id=author_id,
+            text=row['text'],
+            pub_date=_date(row.get('pub_date'), self.today),
+            is_hidden=_flag(row.get('is_hidden')),
+            is_deleted=_flag(row.get('is_deleted')),
+        )
+
+    def import_kind(self, kind, rows):
+        """Загружает строки одного вида пачками с контрольными точками."""
+        model = self.models[kind]
+        build = getattr(self, f'build_{kind}')
+        stats = ImportStats(kind)
+        stats.resumed_from = done = self.checkpoint.get(kind)
+        started = time.perf_counter()
+        for batch in batches(islice(rows, done, None), self.batch_size):
+            objs = []
+            for line, row in batch:
+                obj = build(row)
+                if obj is None:
+                    stats.skipped += 1
+                else:
+                    objs.append((line, obj))
+            # Точка фиксируется вместе с пачкой: при повторном запуске
+            # строки пропускаются по ней, а не по конфликтам ключей.
+            with transaction.atomic(using=self.using):
+                try:
+                    with transaction.atomic(using=self.using):
+                        model.objects.using(self.using).bulk_create(
+                            [obj for _, obj in objs]
+                        )
+                except IntegrityError:
+                    objs = self.insert_rows(model, objs, stats)
+                self.checkpoint.save(kind, done + len(batch))
+            stats.rows += len(objs)
+            done += len(batch)
+        stats.seconds = time.perf_counter() - started
+        self._maps.pop(model, None)
+        return stats
+
+    def insert_rows(self, model, objs, stats):
+        """Вставляет пачку по строке, пропуская отвергнутые базой."""
+        inserted = []
+        for line, obj in objs:
+            try:
+                with transaction.atomic(using=self.using):
+                    model.objects.using(self.using).bulk_create([obj])
+            except IntegrityError as error:
+                stats.skipped += 1
+                stats.errors.append((line, str(error)))
+            else:
+                inserted.append((line, obj))
+        return inserted
+
+    def run(self, files):
+        """Загружает файлы по видам в порядке зависимостей."""
+        imported = [kind for kind in KINDS if kind in files]
+        with suspend_rating_sync():
+            for kind in imported:
+                yield self.import_kind(kind, read_rows(files[kind]))
+        self.finish(imported)
+
+    def finish(self, kinds):
+        """Пересчёт производных данных, которые пропустил bulk_create."""
+        connection = connections[self.using]
+        sequences = connection.ops.sequence_reset_sql(
+            no_style(), [self.models[kind] for kind in kinds]
+        )
+        with connection.cursor() as cursor:
+            for sql in sequences:
+                cursor.execute(sql)
+        if 'titles' in kinds:
+            rebuild_index(self.using)
+        if {'titles', 'reviews'} & set(kinds):
+            Title.objects.using(self.using).all().recalculate_rating()
+        catalog_imported.send(sender=Title, kinds=kinds, using=self.using)
+        self.checkpoint.clear()
@@ -0,0 +1,83 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from reviews.archive import (archive_comments, archive_reviews, export_archive,
+                             table_counts, vacuum)
+
+
+class Command(BaseCommand):
+    """Перенос старых отзывов и комментариев в архив."""
+    help = ('Переносит отзывы и комментарии старше порога в архивные '
+            'таблицы; с --export выгружает архивные строки старше порога '
+            'в сжатые файлы формата import_catalog.')
+
+    def add_arguments(self, parser):
+        cutoff = parser.add_mutually_exclusive_group()
+        cutoff.add_argument(
+            '--days', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+            help='Архивировать записи старше стольких дней '
+                 f'(по умолчанию {settings.ARCHIVE_AFTER_DAYS}).'
+        )
+        cutoff.add_argument(
+            '--before', help='Архивировать записи до даты ГГГГ-ММ-ДД.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Строк в одной транзакции (по умолчанию 1000).'
+        )
+        parser.add_argument(
+            '--export', metavar='DIRECTORY',
+            help='Выгрузить архивные строки старше порога в каталог '
+                 'и удалить их из базы.'
+        )
+        parser.add_argument(
+            '--vacuum', action='store_true',
+            help='После переноса вернуть место удалённых строк (VACUUM).'
+        )
+
+    def get_cutoff(self, options):
+        if options['before'] is None:
+            return datetime.date.today() - datetime.timedelta(
+                days=options['days']
+            )
+        try:
+            cutoff = parse_date(options['before'])
+        except ValueError:
+            cutoff = None
+        if cutoff is None:
+            raise CommandError('Дата --before должна быть в формате '
+                               'ГГГГ-ММ-ДД.')
+        return cutoff
+
+    def handle(self, *args, **options):
+        cutoff = self.get_cutoff(options)
+        trending_since = datetime.date.today() - datetime.timedelta(
+            days=settings.RANKING_TRENDING_DAYS
+        )
+        if cutoff > trending_since:
+            raise CommandError(
+                'Отзывы из окна трендов '
+                f'({settings.RANKING_TRENDING_DAYS} дней) не архивируются.'
+            )
+        if options['export']:
+            reviews, comments = export_archive(
+                options['export'], cutoff, options['batch_size']
+            )
+            self.stdout.write(
+                f'Выгружено до {cutoff}: отзывов {reviews}, '
+                f'комментариев {comments}.'
+            )
+        else:
+            reviews, comments = archive_reviews(cutoff, options['batch_size'])
+            comments += archive_comments(cutoff, options['batch_size'])
+            self.stdout.write(
+                f'В архив до {cutoff}: отзывов {reviews}, '
+                f'комментариев {comments}.'
+            )
+        if options['vacuum']:
+            vacuum()
+        for table, rows in table_counts().items():
+            self.stdout.write(f'{table}: {rows} строк')
+        self.stdout.write(self.style.SUCCESS('Архивация завершена.'))
@@ -0,0 +1,67 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from reviews.importer import KINDS, CatalogImporter, Checkpoint, find_files
+
+
+class Command(BaseCommand):
+    """Потоковый импорт каталога пачками с возобновлением."""
+    help = ('Загружает пользователей, категории, жанры, произведения, '
+            'связи с жанрами, отзывы и комментарии из файлов <вид>.jsonl '
+            'или <вид>.csv в каталоге, в том числе сжатые <вид>.jsonl.gz.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Каталог с файлами импорта.')
+        parser.add_argument(
+            '--only', nargs='+', choices=KINDS, metavar='KIND',
+            help=f'Загрузить только указанные виды: {", ".join(KINDS)}.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Строк в одной вставке (по умолчанию 5000).'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Имя контрольной точки в базе (по умолчанию полный путь '
+                 'каталога импорта).'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать заново, не учитывая контрольную точку.'
+        )
+
+    def handle(self, *args, **options):
+        files = find_files(options['directory'])
+        if options['only']:
+            files = {kind: path for kind, path in files.items()
+                     if kind in options['only']}
+        if not files:
+            raise CommandError(
+                f'В каталоге {options["directory"]} нет файлов импорта.'
+            )
+        checkpoint = Checkpoint(
+            options['checkpoint'] or os.path.abspath(options['directory'])
+        )
+        if options['restart']:
+            checkpoint.clear()
+        importer = CatalogImporter(options['batch_size'], checkpoint)
+        total_rows, total_seconds = 0, 0.0
+        for stats in importer.run(files):
+            resumed = (f', продолжено со строки {stats.resumed_from}'
+                       if stats.resumed_from else '')
+            self.stdout.write(
+                f'{stats.kind}: {stats.rows} строк за {stats.seconds:.1f} с '
+                f'({stats.rate:.0f} строк/с), пропущено {stats.skipped}'
+                f'{resumed}'
+            )
+            for line, error in stats.errors:
+                self.stderr.write(
+                    f'{stats.kind}: строка {line} пропущена: {error}'
+                )
+            total_rows += stats.rows
+            total_seconds += stats.seconds
+        rate = total_rows / total_seconds if total_seconds else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено {total_rows} строк за {total_seconds:.1f} с '
+            f'({rate:.0f} строк/с).'
+        ))
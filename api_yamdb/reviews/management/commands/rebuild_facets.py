@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from reviews.facets import rebuild_facets
+from reviews.models import TitleFacet
+
+
+class Command(BaseCommand):
+    """Пересборка счётчиков фасетов каталога с нуля."""
+    help = ('Пересчитывает число произведений по жанрам, категориям и '
+            'годам, например после изменения произведений в обход модели.')
+
+    def handle(self, *args, **options):
+        rebuild_facets()
+        self.stdout.write(self.style.SUCCESS(
+            f'Фасеты пересобраны: {TitleFacet.objects.count()} строк.'
+        ))
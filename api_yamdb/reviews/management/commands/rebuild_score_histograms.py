@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from reviews.models import ScoreBucket, Title
+from reviews.scores import histogram_drift
+
+DRIFT_REPORT_LIMIT = 20
+REBUILD_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    """Сверка и пересборка гистограмм оценок произведений."""
+    help = ('Сверяет гистограммы оценок произведений с отзывами '
+            'и пересобирает разошедшиеся.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать расхождения, ничего не сохраняя.'
+        )
+
+    def handle(self, *args, **options):
+        drifted = []
+        for title_id, stored, actual in histogram_drift():
+            drifted.append(title_id)
+            if len(drifted) <= DRIFT_REPORT_LIMIT:
+                self.stdout.write(f'{title_id}: {stored} -> {actual}')
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Расхождений нет.'))
+            return
+        self.stdout.write(
+            self.style.WARNING(f'Расхождений: {len(drifted)}.')
+        )
+        if options['dry_run']:
+            return
+        for start in range(0, len(drifted), REBUILD_BATCH_SIZE):
+            ScoreBucket.objects.rebuild(Title.objects.filter(
+                pk__in=drifted[start:start + REBUILD_BATCH_SIZE]
+            ))
+        self.stdout.write(self.style.SUCCESS('Гистограммы пересобраны.'))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from reviews.models import Title
+
+DRIFT_REPORT_LIMIT = 20
+
+
+class Command(BaseCommand):
+    """Пересчёт денормализованного рейтинга произведений с нуля."""
+    help = ('Сверяет сохранённый рейтинг произведений с отзывами '
+            'и пересчитывает его.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать расхождения, ничего не сохраняя.'
+        )
+
+    def handle(self, *args, **options):
+        drifted = Title.objects.with_rating_drift().order_by('pk')
+        drift_count = 0
+        for title in drifted.iterator():
+            drift_count += 1
+            if drift_count <= DRIFT_REPORT_LIMIT:
+                self.stdout.write(
+                    f'{title.pk} «{title}»: '
+                    f'сумма {title.score_sum} -> {title.actual_score_sum}, '
+                    f'отзывов {title.review_count} -> '
+                    f'{title.actual_review_count}'
+                )
+        if not drift_count:
+            self.stdout.write(self.style.SUCCESS('Расхождений нет.'))
+            return
+        self.stdout.write(
+            self.style.WARNING(f'Расхождений: {drift_count}.')
+        )
+        if options['dry_run']:
+            return
+        Title.objects.all().recalculate_rating()
+        self.stdout.write(self.style.SUCCESS('Рейтинг пересчитан.'))
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from reviews.rankings import refresh_rankings
+
+
+class Command(BaseCommand):
+    """Пересчёт таблицы топа и трендов произведений."""
+    help = ('Пересчитывает взвешенный рейтинг и тренды всех произведений; '
+            'с --loop повторяет пересчёт с интервалом.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а пересчитывать таблицу с интервалом.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.RANKING_REFRESH_INTERVAL,
+            help='Пауза между пересчётами, секунд.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                rows = refresh_rankings()
+                self.stdout.write(self.style.SUCCESS(
+                    f'Рейтинг пересчитан: {rows} произведений.'
+                ))
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
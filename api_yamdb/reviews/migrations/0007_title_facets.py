@@ -0,0 +1,55 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:19
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_facets(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    TitleFacet = apps.get_model('reviews', 'TitleFacet')
+    using = schema_editor.connection.alias
+    titles = Title.objects.using(using).order_by().values(
+        'category_id', 'year'
+    ).annotate(count=Count('pk'))
+    links = Title.genre.through.objects.using(using).order_by().values(
+        'genre_id', 'title__category_id', 'title__year'
+    ).annotate(count=Count('pk'))
+    TitleFacet.objects.using(using).bulk_create([
+        TitleFacet(genre_id=0, category_id=row['category_id'] or 0,
+                   year=row['year'], count=row['count'])
+        for row in titles
+    ] + [
+        TitleFacet(genre_id=row['genre_id'],
+                   category_id=row['title__category_id'] or 0,
+                   year=row['title__year'], count=row['count'])
+        for row in links
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleFacet',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('genre_id', models.PositiveIntegerField(verbose_name='Жанр')),
+                ('category_id', models.PositiveIntegerField(verbose_name='Категория')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Год выпуска')),
+                ('count', models.IntegerField(default=0, verbose_name='Количество произведений')),
+            ],
+            options={
+                'verbose_name': 'Счётчик фасета',
+                'verbose_name_plural': 'Счётчики фасетов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='titlefacet',
+            constraint=models.UniqueConstraint(fields=('genre_id', 'category_id', 'year'), name='unique_title_facet'),
+        ),
+        migrations.RunPython(fill_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:25
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Sum
+
+
+def fill_rankings(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    TitleRanking = apps.get_model('reviews', 'TitleRanking')
+    using = schema_editor.connection.alias
+    titles = Title.objects.using(using).filter(review_count__gt=0)
+    totals = titles.aggregate(
+        score_sum=Sum('score_sum'), review_count=Sum('review_count')
+    )
+    if not totals['review_count']:
+        return
+    mean = totals['score_sum'] / totals['review_count']
+    prior = settings.RANKING_PRIOR_REVIEWS
+    today = datetime.date.today()
+    since = today - datetime.timedelta(days=settings.RANKING_TRENDING_DAYS)
+    trending = {}
+    for title_id, pub_date, count in Review.objects.using(using).filter(
+        pub_date__gt=since
+    ).order_by().values_list('title_id', 'pub_date').annotate(
+        count=Count('pk')
+    ):
+        age = max((today - pub_date).days, 0)
+        trending[title_id] = trending.get(title_id, 0) + count * 0.5 ** (
+            age / settings.RANKING_HALF_LIFE_DAYS
+        )
+    TitleRanking.objects.using(using).bulk_create([
+        TitleRanking(
+            title_id=pk,
+            bayesian_score=(prior * mean + score_sum) / (prior + count),
+            trending_score=trending.get(pk, 0),
+        )
+        for pk, score_sum, count in titles.values_list(
+            'pk', 'score_sum', 'review_count'
+        )
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_facets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='reviews.Title', verbose_name='Произведение')),
+                ('bayesian_score', models.FloatField(default=0, verbose_name='Взвешенный рейтинг')),
+                ('trending_score', models.FloatField(default=0, verbose_name='Популярность')),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Места в рейтинге',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['-bayesian_score', 'title'], name='ranking_bayesian_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['-trending_score', 'title'], name='ranking_trending_idx'),
+        ),
+        migrations.RunPython(fill_rankings, migrations.RunPython.noop),
+    ]
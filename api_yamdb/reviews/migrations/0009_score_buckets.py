@@ -0,0 +1,44 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def fill_score_buckets(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    ScoreBucket = apps.get_model('reviews', 'ScoreBucket')
+    using = schema_editor.connection.alias
+    ScoreBucket.objects.using(using).bulk_create(
+        ScoreBucket(title_id=title_id, score=score, count=count)
+        for title_id, score, count in Review.objects.using(using).order_by(
+        ).values_list('title_id', 'score').annotate(count=Count('pk'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_rankings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveSmallIntegerField(choices=[(1, 1), (2, 2), (3, 3), (4, 4), (5, 5), (6, 6), (7, 7), (8, 8), (9, 9), (10, 10)], verbose_name='Оценка')),
+                ('count', models.IntegerField(default=0, verbose_name='Количество отзывов')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_buckets', to='reviews.Title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Счётчик оценок',
+                'verbose_name_plural': 'Счётчики оценок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='scorebucket',
+            constraint=models.UniqueConstraint(fields=('title', 'score'), name='unique_title_score'),
+        ),
+        migrations.RunPython(fill_score_buckets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reviews', '0010_moderation_hidden'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('review_id', models.IntegerField(verbose_name='Отзыв')),
+                ('text', models.TextField(verbose_name='Текст комментария')),
+                ('pub_date', models.DateField(verbose_name='Дата публикации')),
+                ('is_hidden', models.BooleanField(default=False, verbose_name='Скрыт модератором')),
+                ('is_deleted', models.BooleanField(default=False, verbose_name='Удалён')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата архивации')),
+            ],
+            options={
+                'verbose_name': 'Архивный комментарий',
+                'verbose_name_plural': 'Архивные комментарии',
+                'ordering': ('pub_date',),
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedReview',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('text', models.TextField(verbose_name='Текст отзыва')),
+                ('score', models.PositiveSmallIntegerField(choices=[(1, 1), (2, 2), (3, 3), (4, 4), (5, 5), (6, 6), (7, 7), (8, 8), (9, 9), (10, 10)])),
+                ('pub_date', models.DateField(verbose_name='Дата публикации')),
+                ('is_hidden', models.BooleanField(default=False, verbose_name='Скрыт модератором')),
+                ('is_deleted', models.BooleanField(default=False, verbose_name='Удалён')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата архивации')),
+            ],
+            options={
+                'verbose_name': 'Архивный отзыв',
+                'verbose_name_plural': 'Архивные отзывы',
+                'ordering': ('pub_date',),
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='comment_review_pub_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='review',
+            name='review_title_pub_date_idx',
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='is_deleted',
+            field=models.BooleanField(default=False, verbose_name='Удалён'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='is_deleted',
+            field=models.BooleanField(default=False, verbose_name='Удалён'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_hidden', False)), fields=['review', 'pub_date', 'id'], name='comment_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_hidden', False)), fields=['title', 'pub_date', 'id'], name='review_live_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedreview',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reviews', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AddField(
+            model_name='archivedreview',
+            name='title',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reviews', to='reviews.Title', verbose_name='Произведение'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedreview',
+            index=models.Index(fields=['title', 'pub_date', 'id'], name='archived_review_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomment',
+            index=models.Index(fields=['review_id', 'pub_date', 'id'], name='archived_comment_review_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_archive_tiering'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='review',
+            name='unique_title_author',
+        ),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(condition=models.Q(is_deleted=False), fields=('title', 'author'), name='unique_title_author'),
+        ),
+    ]
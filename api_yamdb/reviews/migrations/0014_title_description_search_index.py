@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def create_description_index(apps, schema_editor):
+    # На SQLite описание уже входит в таблицу FTS5 из 0005.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS reviews_title_description_trgm '
+            'ON reviews_title USING gin (description gin_trgm_ops)'
+        )
+
+
+def drop_description_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'DROP INDEX IF EXISTS reviews_title_description_trgm'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0013_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_description_index, drop_description_index),
+    ]
@@ -1,7 +1,14 @@
 import datetime
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
 
 from django.core.validators import MaxValueValidator
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import (Count, ExpressionWrapper, F, OuterRef, Q,
+                              Subquery, Sum)
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.dispatch import Signal
 from users.models import User
 
 now = datetime.datetime.now()
@@ -18,6 +25,35 @@ SCORE_CHOICES = (
     (9, 9), (10, 10)
 )
 
+# Рейтинг произведений изменён массовой операцией над отзывами.
+titles_rated = Signal()
+# Каталог загружен массовым импортом в обход сигналов моделей.
+catalog_imported = Signal()
+# Таблица рейтинга пересчитана целиком.
+rankings_refreshed = Signal()
+
+# Отзывы и комментарии, которые видны в API и учитываются в рейтинге.
+LIVE = Q(is_hidden=False, is_deleted=False)
+
+_rating_sync_suspended = ContextVar('rating_sync_suspended', default=False)
+
+
+@contextmanager
+def suspend_rating_sync():
+    """Отключает поддержку рейтинга при удалении и массовой вставке отзывов.
+
+    Вызывающий код сам отвечает за итоговый пересчёт рейтинга.
+    """
+    token = _rating_sync_suspended.set(True)
+    try:
+        yield
+    finally:
+        _rating_sync_suspended.reset(token)
+
+
+def rating_sync_suspended():
+    return _rating_sync_suspended.get()
+
 
 class Category(models.Model):
     """Модель категории."""
@@ -47,6 +83,73 @@ class Genre(models.Model):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+    """Операции над денормализованным рейтингом произведений."""
+
+    def update_rating(self, score_delta, count_delta):
+        """Сдвигает сумму и количество оценок одним UPDATE."""
+        if not score_delta and not count_delta:
+            return 0
+        score_sum = F('score_sum') + score_delta
+        review_count = F('review_count') + count_delta
+        return self.update(
+            score_sum=score_sum,
+            review_count=review_count,
+            rating=ExpressionWrapper(
+                Cast(score_sum, models.FloatField())
+                / NullIf(review_count, 0),
+                output_field=models.FloatField()
+            )
+        )
+
+    @staticmethod
+    def actual_rating():
+        """Сумма и количество оценок по живым отзывам, включая архив."""
+        totals = []
+        for model in (Review, ArchivedReview):
+            reviews = model.objects.filter(
+                LIVE, title=OuterRef('pk')
+            ).order_by().values('title')
+            totals.append([
+                Coalesce(Subquery(
+                    reviews.annotate(total=aggregate).values('total'),
+                    output_field=models.IntegerField()
+                ), 0)
+                for aggregate in (Sum('score'), Count('pk'))
+            ])
+        (score_sum, review_count), (archived_sum, archived_count) = totals
+        return score_sum + archived_sum, review_count + archived_count
+
+    def recalculate_rating(self):
+        """Пересчитывает рейтинг и гистограммы оценок по отзывам."""
+        ScoreBucket.objects.using(self.db).rebuild(self)
+        score_sum, review_count = self.actual_rating()
+        return self.update(
+            score_sum=score_sum,
+            review_count=review_count,
+            rating=ExpressionWrapper(
+                Cast(score_sum, models.FloatField())
+                / NullIf(review_count, 0),
+                output_field=models.FloatField()
+            )
+        )
+
+    def with_actual_rating(self):
+        """Добавляет посчитанные по отзывам сумму и количество оценок."""
+        score_sum, review_count = self.actual_rating()
+        return self.annotate(
+            actual_score_sum=score_sum,
+            actual_review_count=review_count
+        )
+
+    def with_rating_drift(self):
+        """Произведения, у которых сохранённый рейтинг разошёлся с отзывами."""
+        return self.with_actual_rating().exclude(
+            score_sum=F('actual_score_sum'),
+            review_count=F('actual_review_count')
+        )
+
+
 class Title(models.Model):
     """Модель произведения."""
     name = models.CharField('Название произведения', max_length=100)
@@ -62,8 +165,29 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         verbose_name='Категория'
     )
+    rating = models.FloatField(
+        'Рейтинг',
+        blank=True,
+        null=True,
+        editable=False
+    )
+    review_count = models.PositiveIntegerField(
+        'Количество отзывов',
+        default=0,
+        editable=False
+    )
+    score_sum = models.PositiveIntegerField(
+        'Сумма оценок',
+        default=0,
+        editable=False
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
+        indexes = [
+            models.Index(fields=['name', 'id'], name='title_name_id_idx'),
+        ]
         ordering = ('name',)
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
@@ -71,6 +195,214 @@ class Title(models.Model):
     def __str__(self) -> str:
         return self.name[:TEXT_TITLE]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._faceted = (
+            instance.__dict__.get('category_id'),
+            instance.__dict__.get('year')
+        )
+        return instance
+
+
+class TitleFacet(models.Model):
+    """Число произведений на сочетание жанра, категории и года.
+
+    Строки с ``genre_id = 0`` считают сами произведения, остальные —
+    их связи с жанрами; ``category_id = 0`` — произведения без
+    категории. Таблицу поддерживают сигналы ``reviews.facets``.
+    """
+    genre_id = models.PositiveIntegerField('Жанр')
+    category_id = models.PositiveIntegerField('Категория')
+    year = models.PositiveSmallIntegerField('Год выпуска')
+    count = models.IntegerField('Количество произведений', default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['genre_id', 'category_id', 'year'],
+                name='unique_title_facet'
+            )
+        ]
+        verbose_name = 'Счётчик фасета'
+        verbose_name_plural = 'Счётчики фасетов'
+
+
+class TitleRanking(models.Model):
+    """Оценки произведения для топа и трендов, заранее посчитанные.
+
+    Строки есть только у произведений с отзывами. Индексы по убыванию
+    оценки отдают первые N строк сканированием диапазона индекса.
+    Таблицу ведёт ``reviews.rankings``.
+    """
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ranking',
+        verbose_name='Произведение'
+    )
+    bayesian_score = models.FloatField('Взвешенный рейтинг', default=0)
+    trending_score = models.FloatField('Популярность', default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-bayesian_score', 'title'],
+                name='ranking_bayesian_idx'
+            ),
+            models.Index(
+                fields=['-trending_score', 'title'],
+                name='ranking_trending_idx'
+            ),
+        ]
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Места в рейтинге'
+
+
+class ScoreBucketQuerySet(models.QuerySet):
+    """Поддержка гистограмм оценок произведений."""
+
+    def shift(self, deltas):
+        """Применяет приращения ``{(произведение, оценка): n}``."""
+        for (title_id, score), delta in deltas.items():
+            if not delta:
+                continue
+            key = {'title_id': title_id, 'score': score}
+            if self.filter(**key).update(count=F('count') + delta):
+                continue
+            if delta < 0:
+                # Счётчика нет: произведение удаляется вместе с отзывами.
+                continue
+            try:
+                with transaction.atomic(using=self.db):
+                    self.create(count=delta, **key)
+            except IntegrityError:
+                # Строку успел создать параллельный запрос.
+                self.filter(**key).update(count=F('count') + delta)
+
+    def rebuild(self, titles):
+        """Пересобирает гистограммы произведений по отзывам и архиву."""
+        counts = Counter()
+        for model in (Review, ArchivedReview):
+            for title_id, score, count in model.objects.using(self.db).filter(
+                LIVE, title__in=titles.values('pk')
+            ).order_by().values_list('title_id', 'score').annotate(
+                count=Count('pk')
+            ).iterator():
+                counts[(title_id, score)] += count
+        with transaction.atomic(using=self.db):
+            self.filter(title__in=titles.values('pk')).delete()
+            self.bulk_create(
+                ScoreBucket(title_id=title_id, score=score, count=count)
+                for (title_id, score), count in counts.items()
+            )
+
+
+class ScoreBucket(models.Model):
+    """Число отзывов произведения с одной оценкой.
+
+    Десять строк на произведение дают распределение, медиану и разброс
+    оценок без чтения отзывов.
+    """
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='score_buckets',
+        verbose_name='Произведение'
+    )
+    score = models.PositiveSmallIntegerField(
+        'Оценка', choices=SCORE_CHOICES
+    )
+    count = models.IntegerField('Количество отзывов', default=0)
+
+    objects = ScoreBucketQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'score'],
+                name='unique_title_score'
+            )
+        ]
+        verbose_name = 'Счётчик оценок'
+        verbose_name_plural = 'Счётчики оценок'
+
+
+def shift_ratings(scores):
+    """Применяет приращения оценок ``{(произведение, оценка): n}``.
+
+    Сдвигает рейтинг и гистограммы; возвращает id произведений.
+    """
+    deltas = {}
+    for (title_id, score), count in scores.items():
+        score_sum, total = deltas.get(title_id, (0, 0))
+        deltas[title_id] = (score_sum + score * count, total + count)
+    for title_id, (score_sum, count) in deltas.items():
+        Title.objects.filter(pk=title_id).update_rating(score_sum, count)
+    ScoreBucket.objects.shift(scores)
+    return set(deltas)
+
+
+class ReviewQuerySet(models.QuerySet):
+    """Массовые операции с отзывами, сохраняющие рейтинг произведений.
+
+    Скрытые модератором и удалённые отзывы в рейтинге не учитываются.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        if rating_sync_suspended():
+            return super().bulk_create(objs, *args, **kwargs)
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            if kwargs.get('ignore_conflicts'):
+                # Пропущенные при конфликте строки заранее неизвестны.
+                title_ids = {review.title_id for review in objs}
+                Title.objects.filter(pk__in=title_ids).recalculate_rating()
+                titles_rated.send(sender=Title, title_ids=title_ids)
+                return created
+            title_ids = shift_ratings(Counter(
+                (review.title_id, review.score) for review in objs
+                if review.is_live
+            ))
+            titles_rated.send(sender=Title, title_ids=title_ids)
+            return created
+
+    def update(self, **kwargs):
+        if not {'score', 'title', 'is_hidden', 'is_deleted'} & set(kwargs):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            title_ids = set(self.values_list('title_id', flat=True))
+            if 'title' in kwargs:
+                title = kwargs['title']
+                title_ids.add(getattr(title, 'pk', title))
+            rows = super().update(**kwargs)
+            if rows:
+                Title.objects.filter(pk__in=title_ids).recalculate_rating()
+                titles_rated.send(sender=Title, title_ids=title_ids)
+        return rows
+
+    def delete(self):
+        if rating_sync_suspended():
+            return super().delete()
+        with transaction.atomic(using=self.db):
+            scores = Counter(dict(
+                ((title_id, score), -count)
+                for title_id, score, count in self.filter(
+                    LIVE
+                ).order_by().values_list('title_id', 'score').annotate(
+                    count=Count('pk')
+                )
+            ))
+            with suspend_rating_sync():
+                deleted, rows = super().delete()
+            titles_rated.send(sender=Title, title_ids=shift_ratings(scores))
+        return deleted, rows
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
 
 class Review(models.Model):
     """Модель отзыва."""
@@ -88,22 +420,77 @@ class Review(models.Model):
         verbose_name='Автор'
     )
     score = models.PositiveSmallIntegerField(choices=SCORE_CHOICES)
+    # Не auto_now_add: импорт сохраняет дату публикации из файла.
     pub_date = models.DateField(
         'Дата публикации',
-        auto_now_add=True,
+        default=datetime.date.today,
+        editable=False,
         db_index=True
     )
+    is_hidden = models.BooleanField('Скрыт модератором', default=False)
+    is_deleted = models.BooleanField('Удалён', default=False)
+
+    objects = ReviewQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:TEXT_REVIEW]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        hidden = instance.__dict__.get('is_hidden')
+        deleted = instance.__dict__.get('is_deleted')
+        instance._rated = (
+            instance.__dict__.get('title_id'),
+            instance.__dict__.get('score'),
+            None if None in (hidden, deleted) else not (hidden or deleted)
+        )
+        return instance
+
+    @property
+    def is_live(self):
+        return not (self.is_hidden or self.is_deleted)
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic(using=kwargs.get('using')):
+            if not adding and None in getattr(self, '_rated', (None,)):
+                row = Review.objects.filter(pk=self.pk).values_list(
+                    'title_id', 'score', 'is_hidden', 'is_deleted'
+                ).first()
+                self._rated = (
+                    (row[0], row[1], not (row[2] or row[3])) if row
+                    else (None, None, False)
+                )
+            super().save(*args, **kwargs)
+            scores = Counter()
+            if self.is_live:
+                scores[(self.title_id, self.score)] += 1
+            if not adding:
+                old_title_id, old_score, old_live = self._rated
+                if old_live:
+                    scores[(old_title_id, old_score)] -= 1
+            shift_ratings(scores)
+        self._rated = (self.title_id, self.score, self.is_live)
+
     class Meta:
         constraints = [
+            # Удалённый автором отзыв не мешает написать новый.
             models.UniqueConstraint(
                 fields=['title', 'author'],
-                name='unique_title_author'
+                name='unique_title_author',
+                condition=Q(is_deleted=False)
             )
         ]
+        indexes = [
+            # Страницы отзывов читают только живые строки: удалённые и
+            # скрытые в индекс не попадают.
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_live_idx',
+                condition=LIVE
+            ),
+        ]
         ordering = ('pub_date',)
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
@@ -124,16 +511,117 @@ class Comment(models.Model):
         related_name='comments',
         verbose_name='Автор'
     )
+    # Не auto_now_add: импорт сохраняет дату публикации из файла.
     pub_date = models.DateField(
         'Дата публикации',
-        auto_now_add=True,
+        default=datetime.date.today,
+        editable=False,
         db_index=True
     )
+    is_hidden = models.BooleanField('Скрыт модератором', default=False)
+    is_deleted = models.BooleanField('Удалён', default=False)
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_live_idx',
+                condition=LIVE
+            ),
+        ]
         ordering = ('pub_date',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
     def __str__(self):
         return self.text[:TEXT_COMMENT]
+
+
+class ArchivedReview(models.Model):
+    """Отзыв, перенесённый из рабочей таблицы командой archive_content.
+
+    Оценка по-прежнему входит в рейтинг произведения.
+    """
+    id = models.IntegerField(primary_key=True)
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='archived_reviews',
+        verbose_name='Произведение'
+    )
+    text = models.TextField('Текст отзыва')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_reviews',
+        verbose_name='Автор'
+    )
+    score = models.PositiveSmallIntegerField(choices=SCORE_CHOICES)
+    pub_date = models.DateField('Дата публикации')
+    is_hidden = models.BooleanField('Скрыт модератором', default=False)
+    is_deleted = models.BooleanField('Удалён', default=False)
+    archived_at = models.DateTimeField('Дата архивации', auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='archived_review_title_idx'
+            ),
+        ]
+        ordering = ('pub_date',)
+        verbose_name = 'Архивный отзыв'
+        verbose_name_plural = 'Архивные отзывы'
+
+    @property
+    def is_live(self):
+        return not (self.is_hidden or self.is_deleted)
+
+
+class ArchivedComment(models.Model):
+    """Комментарий, перенесённый из рабочей таблицы.
+
+    Отзыв может лежать в рабочей таблице или в архиве, поэтому ссылка на
+    него хранится без внешнего ключа.
+    """
+    id = models.IntegerField(primary_key=True)
+    review_id = models.IntegerField('Отзыв')
+    text = models.TextField('Текст комментария')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateField('Дата публикации')
+    is_hidden = models.BooleanField('Скрыт модератором', default=False)
+    is_deleted = models.BooleanField('Удалён', default=False)
+    archived_at = models.DateTimeField('Дата архивации', auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['review_id', 'pub_date', 'id'],
+                name='archived_comment_review_idx'
+            ),
+        ]
+        ordering = ('pub_date',)
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+
+
+class ImportCheckpoint(models.Model):
+    """Число загруженных импортом строк одного вида."""
+    name = models.CharField('Контрольная точка', max_length=255)
+    kind = models.CharField('Вид', max_length=20)
+    rows = models.BigIntegerField('Загружено строк', default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'kind'],
+                name='unique_checkpoint_kind'
+            ),
+        ]
+        verbose_name = 'Контрольная точка импорта'
+        verbose_name_plural = 'Контрольные точки импорта'
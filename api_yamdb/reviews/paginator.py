@@ -0,0 +1,44 @@
+"""Пагинатор админки без ``COUNT(*)`` по большим таблицам.
+
+Для списка без фильтров и поиска число строк на PostgreSQL берётся из
+статистики планировщика (``pg_class.reltuples``), которую обновляют
+ANALYZE и автовакуум. Оценка неточна, поэтому используется, только
+когда таблица больше ``ADMIN_ESTIMATED_COUNT_THRESHOLD`` строк; иначе и
+на других СУБД число строк считается как обычно.
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models.query import QuerySet
+from django.utils.functional import cached_property
+
+
+def estimated_count(queryset):
+    """Оценка числа строк таблицы или ``None``, если её нет."""
+    if not isinstance(queryset, QuerySet) or queryset.query.where:
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    # До первого ANALYZE reltuples равен -1 (или 0 в старых версиях).
+    if row is None or row[0] <= 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор с оценкой числа строк для больших таблиц."""
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if (estimate is not None
+                and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD):
+            return estimate
+        return super().count
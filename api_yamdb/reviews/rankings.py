@@ -0,0 +1,128 @@
+"""Топ и тренды произведений из заранее посчитанной таблицы.
+
+Топ упорядочен по байесовскому рейтингу: средняя оценка произведения
+сглажена ``RANKING_PRIOR_REVIEWS`` воображаемыми отзывами со средней
+оценкой каталога, так что пара десяток не обгоняет сотню девяток.
+Тренды — число отзывов за последние ``RANKING_TRENDING_DAYS`` дней, где
+вес отзыва вдвое падает каждые ``RANKING_HALF_LIFE_DAYS`` дней.
+
+Взвешенный рейтинг обновляется вслед за отзывами, а тренды зависят от
+текущей даты и пересчитываются вместе со всей таблицей командой
+``refresh_rankings``.
+"""
+import datetime
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum
+from reviews.models import (LIVE, Review, Title, TitleRanking,
+                            rankings_refreshed)
+
+MEAN_KEY = 'rankings:mean'
+ORDERINGS = {
+    'top': 'bayesian_score',
+    'trending': 'trending_score',
+}
+
+
+def catalog_mean(using='default'):
+    """Средняя оценка по всем отзывам каталога."""
+    totals = Title.objects.using(using).aggregate(
+        score_sum=Sum('score_sum'), review_count=Sum('review_count')
+    )
+    if not totals['review_count']:
+        return 0.0
+    return totals['score_sum'] / totals['review_count']
+
+
+def prior_mean(using='default'):
+    """Средняя оценка каталога, закешированная до следующего пересчёта."""
+    mean = cache.get(MEAN_KEY)
+    if mean is None:
+        mean = catalog_mean(using)
+        cache.set(MEAN_KEY, mean, settings.RANKING_REFRESH_INTERVAL)
+    return mean
+
+
+def bayesian_score(score_sum, review_count, mean):
+    prior = settings.RANKING_PRIOR_REVIEWS
+    return (prior * mean + score_sum) / (prior + review_count)
+
+
+def trending_scores(today, using='default'):
+    """Затухающее число недавних отзывов по произведениям."""
+    since = today - datetime.timedelta(days=settings.RANKING_TRENDING_DAYS)
+    counts = Review.objects.using(using).filter(
+        LIVE, pub_date__gt=since
+    ).order_by().values_list('title_id', 'pub_date').annotate(
+        count=Count('pk')
+    )
+    scores = Counter()
+    for title_id, pub_date, count in counts.iterator():
+        age = max((today - pub_date).days, 0)
+        scores[title_id] += count * 0.5 ** (
+            age / settings.RANKING_HALF_LIFE_DAYS
+        )
+    return scores
+
+
+def update_titles(title_ids, using='default'):
+    """Пересчитывает взвешенный рейтинг нескольких произведений."""
+    mean = prior_mean(using)
+    scores = {
+        pk: bayesian_score(score_sum, review_count, mean)
+        for pk, score_sum, review_count in Title.objects.using(using).filter(
+            pk__in=title_ids, review_count__gt=0
+        ).values_list('pk', 'score_sum', 'review_count')
+    }
+    rankings = TitleRanking.objects.using(using)
+    with transaction.atomic(using=using):
+        rankings.filter(title_id__in=title_ids).exclude(
+            title_id__in=scores
+        ).delete()
+        existing = set(rankings.filter(title_id__in=scores).values_list(
+            'title_id', flat=True
+        ))
+        rankings.bulk_update([
+            TitleRanking(title_id=pk, bayesian_score=score)
+            for pk, score in scores.items() if pk in existing
+        ], ['bayesian_score'])
+        # Тренды новой строки появятся при следующем пересчёте таблицы.
+        rankings.bulk_create([
+            TitleRanking(title_id=pk, bayesian_score=score)
+            for pk, score in scores.items() if pk not in existing
+        ], ignore_conflicts=True)
+
+
+def refresh_rankings(using='default', today=None):
+    """Пересчитывает таблицу рейтинга целиком; возвращает число строк."""
+    today = today or datetime.date.today()
+    mean = catalog_mean(using)
+    trending = trending_scores(today, using)
+    rows = [
+        TitleRanking(
+            title_id=pk,
+            bayesian_score=bayesian_score(score_sum, review_count, mean),
+            trending_score=trending.get(pk, 0.0),
+        )
+        for pk, score_sum, review_count in Title.objects.using(using).filter(
+            review_count__gt=0
+        ).values_list('pk', 'score_sum', 'review_count').iterator()
+    ]
+    with transaction.atomic(using=using):
+        TitleRanking.objects.using(using).all().delete()
+        TitleRanking.objects.using(using).bulk_create(rows)
+    cache.set(MEAN_KEY, mean, settings.RANKING_REFRESH_INTERVAL)
+    rankings_refreshed.send(sender=TitleRanking, using=using)
+    return len(rows)
+
+
+def ranked_title_ids(kind, limit, offset=0):
+    """Первые произведения топа или трендов: пары (id, оценка)."""
+    field = ORDERINGS[kind]
+    rankings = TitleRanking.objects.filter(**{f'{field}__gt': 0})
+    return list(rankings.order_by(f'-{field}', 'title_id').values_list(
+        'title_id', field
+    )[offset:offset + limit])
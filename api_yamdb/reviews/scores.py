@@ -0,0 +1,99 @@
+"""Статистика оценок произведения по гистограмме из ``ScoreBucket``.
+
+Оценки — целые от 1 до 10, поэтому медиана, процентили и разброс
+считаются по десяти счётчикам за постоянное время, сколько бы ни было
+отзывов.
+"""
+import math
+
+from django.db.models import Count
+from reviews.models import (LIVE, SCORE_CHOICES, ArchivedReview, Review,
+                            ScoreBucket, Title)
+
+SCORES = [score for score, _ in SCORE_CHOICES]
+PERCENTILES = (10, 25, 75, 90)
+
+
+def title_histogram(buckets):
+    """Счётчики отзывов по всем оценкам из строк ``ScoreBucket``."""
+    counts = dict.fromkeys(SCORES, 0)
+    for bucket in buckets:
+        counts[bucket.score] += bucket.count
+    return counts
+
+
+def _order_statistic(counts, index):
+    """Оценка на месте ``index`` в отсортированном списке оценок."""
+    seen = 0
+    for score in SCORES:
+        seen += counts[score]
+        if index < seen:
+            return score
+    return SCORES[-1]
+
+
+def percentile(counts, total, rank):
+    """Процентиль с линейной интерполяцией между соседними оценками."""
+    position = (total - 1) * rank / 100
+    lower = math.floor(position)
+    low = _order_statistic(counts, lower)
+    high = _order_statistic(counts, min(lower + 1, total - 1))
+    return low + (high - low) * (position - lower)
+
+
+def score_stats(counts):
+    """Распределение, среднее, медиана, процентили и разброс оценок."""
+    total = sum(counts.values())
+    stats = {
+        'count': total,
+        'mean': None,
+        'median': None,
+        'stddev': None,
+        'percentiles': dict.fromkeys(
+            (f'p{rank}' for rank in PERCENTILES), None
+        ),
+        'distribution': [{'score': score, 'count': counts[score]}
+                         for score in SCORES],
+    }
+    if not total:
+        return stats
+    mean = sum(score * count for score, count in counts.items()) / total
+    variance = sum(
+        count * (score - mean) ** 2 for score, count in counts.items()
+    ) / total
+    stats.update(
+        mean=round(mean, 4),
+        median=percentile(counts, total, 50),
+        stddev=round(math.sqrt(variance), 4),
+        percentiles={f'p{rank}': percentile(counts, total, rank)
+                     for rank in PERCENTILES},
+    )
+    return stats
+
+
+def histogram_drift(chunk_size=10000):
+    """Произведения, чьи гистограммы разошлись с отзывами и архивом.
+
+    Сверка идёт диапазонами ``id``, чтобы не держать в памяти счётчики
+    всего каталога. Отдаёт пары (id, сохранённые, по отзывам).
+    """
+    last = Title.objects.order_by('-pk').values_list('pk', flat=True).first()
+    for start in range(0, (last or 0) + 1, chunk_size):
+        pk_range = {'title_id__gte': start,
+                    'title_id__lt': start + chunk_size}
+        stored, actual = {}, {}
+        for title_id, score, count in ScoreBucket.objects.filter(
+            count__gt=0, **pk_range
+        ).values_list('title_id', 'score', 'count'):
+            stored.setdefault(title_id, {})[score] = count
+        for model in (Review, ArchivedReview):
+            for title_id, score, count in model.objects.filter(
+                LIVE, **pk_range
+            ).order_by().values_list('title_id', 'score').annotate(
+                count=Count('pk')
+            ):
+                scores = actual.setdefault(title_id, {})
+                scores[score] = scores.get(score, 0) + count
+        for title_id in sorted(stored.keys() | actual.keys()):
+            if stored.get(title_id) != actual.get(title_id):
+                yield title_id, stored.get(title_id), actual.get(title_id)
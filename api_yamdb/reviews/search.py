@@ -0,0 +1,138 @@
+"""Поиск произведений по индексу, зависящему от СУБД.
+
+Ищется по названию и описанию. На PostgreSQL используются GIN-индексы
+pg_trgm по обоим полям: они обслуживают и оператор похожести ``%``, и
+``LIKE '%...%'``. На SQLite поиск идёт по виртуальной таблице FTS5,
+которую поддерживают сигналы произведения. На обеих СУБД совпадения в
+названии ранжируются выше совпадений только в описании. Фильтр по
+названию идёт по тем же индексам, но без ранжирования.
+"""
+import re
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.models import Q
+
+FTS_TABLE = 'reviews_title_fts'
+RANK = 'rank'
+TOKEN_RE = re.compile(r'\w+')
+
+_fts_available = {}
+
+
+def fts_available(connection):
+    """Есть ли в базе SQLite таблица полнотекстового индекса."""
+    if connection.vendor != 'sqlite':
+        return False
+    if connection.alias not in _fts_available:
+        with connection.cursor() as cursor:
+            tables = connection.introspection.table_names(cursor)
+        _fts_available[connection.alias] = FTS_TABLE in tables
+    return _fts_available[connection.alias]
+
+
+def index_title(title, using):
+    """Обновляет запись произведения в индексе FTS5."""
+    index_titles([title], using)
+
+
+def index_titles(titles, using):
+    """Обновляет записи нескольких произведений в индексе FTS5."""
+    connection = connections[using]
+    if not titles or not fts_available(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                           [[title.pk] for title in titles])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            [[title.pk, title.name, title.description] for title in titles]
+        )
+
+
+def rebuild_index(using):
+    """Заново строит индекс FTS5 по всем произведениям."""
+    connection = connections[using]
+    if not fts_available(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'SELECT id, name, description FROM reviews_title'
+        )
+
+
+def unindex_title(title, using):
+    """Удаляет произведение из индекса FTS5."""
+    connection = connections[using]
+    if not fts_available(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                       [title.pk])
+
+
+def _fts_query(value):
+    tokens = TOKEN_RE.findall(value)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def is_ranked(queryset):
+    """Отсортирован ли запрос по релевантности из ``search_titles``."""
+    return RANK in queryset.query.annotations or RANK in queryset.query.extra
+
+
+def filter_names(queryset, value):
+    """Отбирает произведения, в названии которых есть ``value``.
+
+    На PostgreSQL ``LIKE`` обслуживает индекс pg_trgm по названию, на
+    SQLite ищутся начала слов названия в FTS5.
+    """
+    connection = connections[queryset.db]
+    if fts_available(connection):
+        match = _fts_query(value)
+        if not match:
+            return queryset.none()
+        # Подзапросом, а не соединением: с ?search= таблица FTS уже в FROM.
+        return queryset.extra(
+            where=[
+                f'reviews_title.id IN (SELECT rowid FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s)'
+            ],
+            params=[f'name : ({match})'],
+        )
+    return queryset.filter(name__contains=value)
+
+
+def search_titles(queryset, value):
+    """Отбирает произведения по запросу, сортируя по релевантности."""
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        # Похожесть считается по названию: с длинным описанием она всегда
+        # мала, и такие совпадения уходят в конец выдачи.
+        return queryset.filter(
+            Q(name__trigram_similar=value) | Q(name__icontains=value)
+            | Q(description__icontains=value)
+        ).annotate(
+            **{RANK: TrigramSimilarity('name', value)}
+        ).order_by(f'-{RANK}', 'name', 'pk')
+    if fts_available(connection):
+        match = _fts_query(value)
+        if not match:
+            return queryset.none()
+        # Соединение с FTS-таблицей: поиск ведёт индекс, а не скан.
+        return queryset.extra(
+            # bm25 с весами столбцов (name, description).
+            select={RANK: f'bm25({FTS_TABLE}, 10.0, 1.0)'},
+            tables=[FTS_TABLE],
+            where=[
+                f'{FTS_TABLE}.rowid = reviews_title.id',
+                f'{FTS_TABLE} MATCH %s',
+            ],
+            params=[match],
+        ).order_by(RANK, 'name', 'pk')
+    return queryset.filter(
+        Q(name__icontains=value) | Q(description__icontains=value)
+    )
@@ -0,0 +1,111 @@
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from reviews import facets, rankings
+from reviews.models import (ArchivedReview, Category, Genre, Review, Title,
+                            catalog_imported, rating_sync_suspended,
+                            shift_ratings, titles_rated)
+from reviews.search import index_title, unindex_title
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """Вычитает оценку удалённого отзыва из рейтинга и гистограммы."""
+    if rating_sync_suspended() or not instance.is_live:
+        return
+    shift_ratings({(instance.title_id, instance.score): -1})
+
+
+@receiver(post_delete, sender=ArchivedReview)
+def archived_review_deleted(sender, instance, **kwargs):
+    # Архивные отзывы удаляются каскадом вместе с автором.
+    review_deleted(sender, instance, **kwargs)
+
+
+def update_rankings_on_commit(title_ids, using):
+    # Рейтинг произведения сдвигается уже после post_save отзыва.
+    title_ids = {title_id for title_id in title_ids if title_id is not None}
+    transaction.on_commit(
+        lambda: rankings.update_titles(title_ids, using), using=using
+    )
+
+
+@receiver(post_save, sender=Review)
+def review_rankings_saved(sender, instance, created, using, **kwargs):
+    """Пересчитывает взвешенный рейтинг произведения отзыва."""
+    old_title_id = None
+    if not created:
+        old_title_id = getattr(instance, '_rated', (None, None))[0]
+    update_rankings_on_commit({instance.title_id, old_title_id}, using)
+
+
+@receiver(post_delete, sender=Review)
+def review_rankings_deleted(sender, instance, using, **kwargs):
+    if rating_sync_suspended():
+        return
+    update_rankings_on_commit({instance.title_id}, using)
+
+
+@receiver(titles_rated)
+def titles_rankings_rated(sender, title_ids, **kwargs):
+    update_rankings_on_commit(title_ids, 'default')
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, using, **kwargs):
+    """Обновляет произведение в полнотекстовом индексе SQLite."""
+    index_title(instance, using)
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, using, **kwargs):
+    """Удаляет произведение из полнотекстового индекса SQLite."""
+    unindex_title(instance, using)
+
+
+@receiver(pre_save, sender=Title)
+def title_facets_saving(sender, instance, using, **kwargs):
+    facets.title_saving(instance, using)
+
+
+@receiver(post_save, sender=Title)
+def title_facets_saved(sender, instance, created, using, **kwargs):
+    """Переносит произведение в счётчиках фасетов."""
+    facets.title_saved(instance, created, using)
+
+
+@receiver(pre_delete, sender=Title)
+def title_facets_deleting(sender, instance, using, **kwargs):
+    # Связи с жанрами удаляются каскадом без m2m_changed.
+    facets.title_deleting(instance, using)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_facets(sender, instance, action, reverse, pk_set, using,
+                        **kwargs):
+    facets.genre_links_changed(instance, action, reverse, pk_set, using)
+
+
+@receiver(post_delete, sender=Genre)
+def genre_facets_deleted(sender, instance, using, **kwargs):
+    facets.genre_deleted(instance, using)
+
+
+@receiver(post_delete, sender=Category)
+def category_facets_deleted(sender, instance, using, **kwargs):
+    facets.category_deleted(instance, using)
+
+
+@receiver(catalog_imported)
+def catalog_facets_imported(sender, kinds, using='default', **kwargs):
+    """Пересобирает фасеты после массовой загрузки произведений."""
+    if facets.IMPORTED_KINDS & set(kinds):
+        facets.rebuild_facets(using)
+
+
+@receiver(catalog_imported)
+def catalog_rankings_imported(sender, kinds, using='default', **kwargs):
+    """Пересчитывает рейтинг после массовой загрузки отзывов."""
+    if 'reviews' in kinds:
+        rankings.refresh_rankings(using)
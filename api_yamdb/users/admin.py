@@ -1,7 +1,7 @@
 from typing import Tuple
 
 from django.contrib import admin
-from users.models import User
+from users.models import OutboxEmail, User
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -15,4 +15,15 @@ class UserAdmin(admin.ModelAdmin):
     empty_value_display: str = '-пусто-'
 
 
+class OutboxEmailAdmin(admin.ModelAdmin):
+    """Класс для админки исходящей очереди писем."""
+    list_display: Tuple[str, ...] = ('pk', 'recipient', 'subject', 'status',
+                                     'attempts', 'next_attempt_at',
+                                     'sent_at',)
+    list_filter: Tuple[str, ...] = ('status',)
+    search_fields: Tuple[str, ...] = ('recipient',)
+    empty_value_display: str = '-пусто-'
+
+
 admin.site.register(User, UserAdmin)
+admin.site.register(OutboxEmail, OutboxEmailAdmin)
@@ -0,0 +1,59 @@
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from users import token_versions
+from users.models import User
+
+VERSION_CLAIM = 'ver'
+
+
+def add_user_claims(token, user):
+    """Добавляет в токен всё, что нужно для проверки прав без базы."""
+    token['username'] = user.username
+    token['role'] = user.role
+    token['is_superuser'] = user.is_superuser
+    token[VERSION_CLAIM] = user.token_version
+    return token
+
+
+def load_token_version(user_id):
+    version = User.objects.filter(pk=user_id, is_active=True).values_list(
+        'token_version', flat=True
+    ).first()
+    return token_versions.REVOKED if version is None else version
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь, собранный из подписанных claim'ов токена."""
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', User.USER)
+
+    def is_moderator(self):
+        return self.role == User.MODERATOR
+
+    def is_admin(self):
+        return self.role == User.ADMIN
+
+    def is_user(self):
+        return self.role == User.USER
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без запроса пользователя из базы.
+
+    Роль и имя берутся из claim'ов токена, а актуальность токена
+    проверяется по версии из кеша. Токены, выданные до появления
+    claim'ов, по-прежнему проверяются запросом к базе.
+    """
+
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        user = ClaimsUser(validated_token)
+        version = token_versions.get_version(user.id, load_token_version)
+        if version != validated_token[VERSION_CLAIM]:
+            raise AuthenticationFailed('Токен отозван.', code='token_revoked')
+        return user
@@ -0,0 +1,47 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from users.outbox import deliver_pending
+
+
+class Command(BaseCommand):
+    """Воркер исходящей очереди писем."""
+    help = 'Отправляет письма из исходящей очереди пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--max-attempts', type=int, default=5)
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а опрашивать очередь с интервалом.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Пауза между опросами пустой очереди, секунд.'
+        )
+
+    def handle(self, *args, **options):
+        connection = get_connection()
+        try:
+            while True:
+                sent, failed = deliver_pending(
+                    connection, options['batch_size'],
+                    options['max_attempts']
+                )
+                if sent or failed:
+                    self.stdout.write(
+                        f'Отправлено: {sent}, с ошибкой: {failed}.'
+                    )
+                if sent + failed < options['batch_size']:
+                    if not options['loop']:
+                        break
+                    connection.close()
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
@@ -1,7 +1,40 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.auth.models import UserManager as AuthUserManager
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from users import token_versions
 
 SAFE_ROLE = ['admin', 'moderator']
+# Поля, копии которых живут в выданных токенах.
+TOKEN_CLAIM_FIELDS = ('role', 'is_active', 'is_superuser')
+
+
+def forget_token_version(user_id):
+    """Сбрасывает кеш версии токенов сейчас и после фиксации транзакции."""
+    token_versions.forget(user_id)
+    transaction.on_commit(lambda: token_versions.forget(user_id))
+
+
+class UserQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        """Массовая смена роли или блокировка отзывает токены."""
+        if not set(TOKEN_CLAIM_FIELDS) & set(kwargs):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            user_ids = list(self.values_list('pk', flat=True))
+            rows = super().update(
+                token_version=F('token_version') + 1, **kwargs
+            )
+            if rows:
+                for user_id in user_ids:
+                    forget_token_version(user_id)
+        return rows
+
+
+class UserManager(AuthUserManager.from_queryset(UserQuerySet)):
+    pass
 
 
 class User(AbstractUser):
@@ -57,6 +90,14 @@ class User(AbstractUser):
                                 max_length=150,
                                 unique=True)
 
+    token_version = models.PositiveIntegerField(
+        'Версия токенов',
+        default=0,
+        editable=False,
+    )
+
+    objects = UserManager()
+
     class Meta:
         ordering = ('username',)
         verbose_name = 'Пользователь'
@@ -65,6 +106,45 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._token_claims = instance.token_claims()
+        return instance
+
+    def token_claims(self):
+        """Значения полей, копии которых живут в выданных токенах."""
+        return tuple(self.__dict__.get(field) for field in TOKEN_CLAIM_FIELDS)
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_token_claims', None)
+        changed = loaded is not None and loaded != self.token_claims()
+        if changed:
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self._token_claims = self.token_claims()
+        if changed:
+            self.forget_token_version()
+
+    def delete(self, *args, **kwargs):
+        user_id = self.pk
+        try:
+            return super().delete(*args, **kwargs)
+        finally:
+            forget_token_version(user_id)
+
+    def revoke_tokens(self):
+        """Отзывает все выданные пользователю токены."""
+        self.token_version += 1
+        self.save()
+        self.forget_token_version()
+
+    def forget_token_version(self):
+        forget_token_version(self.pk)
+
     def is_moderator(self):
         return self.role == 'moderator'
 
@@ -73,3 +153,51 @@ class User(AbstractUser):
 
     def is_user(self):
         return self.role == 'user'
+
+
+class OutboxEmail(models.Model):
+    """Письмо, записанное в исходящую очередь для отправки воркером."""
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUSES = [
+        (PENDING, 'pending'),
+        (SENT, 'sent'),
+        (FAILED, 'failed'),
+    ]
+
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.EmailField('Отправитель', max_length=254)
+    recipient = models.EmailField('Получатель', max_length=254)
+    status = models.CharField(
+        'Статус',
+        max_length=16,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток отправки', default=0)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка',
+        default=timezone.now,
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    sent_at = models.DateTimeField('Отправлено', blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at'],
+                condition=Q(status='pending'),
+                name='outbox_pending_idx'
+            ),
+        ]
+        ordering = ('next_attempt_at',)
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
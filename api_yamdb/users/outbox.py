@@ -0,0 +1,87 @@
+"""Исходящая очередь писем.
+
+Письмо записывается в таблицу в той же транзакции, что и данные, ради
+которых оно отправляется, а воркер ``send_outbox`` забирает очередь
+пачками в аренду и отправляет её через одно SMTP-соединение на пачку.
+"""
+from datetime import timedelta
+
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.utils import timezone
+from users.models import OutboxEmail
+
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_MAX = timedelta(hours=1)
+# На сколько письмо пачки скрывается от других воркеров до отправки.
+LEASE = timedelta(minutes=5)
+
+
+def enqueue_email(subject, body, from_email, recipient):
+    """Кладёт письмо в исходящую очередь."""
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email,
+        recipient=recipient,
+    )
+
+
+def backoff(attempts):
+    """Задержка перед следующей попыткой: экспонента с потолком."""
+    return min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+
+
+def claim_batch(batch_size, now):
+    """Забирает пачку писем в аренду короткой транзакцией.
+
+    Пока аренда не истекла, письма не достанутся другим воркерам. Если
+    воркер упадёт, не записав результат, письмо уйдёт повторно после её
+    окончания.
+    """
+    with transaction.atomic():
+        batch = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True).filter(
+                status=OutboxEmail.PENDING,
+                next_attempt_at__lte=now,
+            ).order_by('next_attempt_at')[:batch_size]
+        )
+        for email in batch:
+            email.attempts += 1
+            email.next_attempt_at = now + LEASE
+        OutboxEmail.objects.bulk_update(batch, ['attempts', 'next_attempt_at'])
+    return batch
+
+
+def deliver_pending(connection, batch_size, max_attempts):
+    """Отправляет одну пачку писем, возвращает (отправлено, с ошибкой).
+
+    SMTP работает вне транзакции, а результат каждого письма
+    записывается сразу: сбой на следующем письме не вернёт в очередь уже
+    отправленные.
+    """
+    sent = failed = 0
+    for email in claim_batch(batch_size, timezone.now()):
+        message = EmailMessage(
+            email.subject, email.body, email.from_email, [email.recipient],
+        )
+        try:
+            # Открытое соединение переиспользуется для всей пачки.
+            connection.open()
+            connection.send_messages([message])
+        except Exception as error:
+            failed += 1
+            result = {'last_error': repr(error)}
+            if email.attempts >= max_attempts:
+                result['status'] = OutboxEmail.FAILED
+            else:
+                result['next_attempt_at'] = (
+                    timezone.now() + backoff(email.attempts)
+                )
+            # Соединение могло оборваться: следующее письмо откроет новое.
+            connection.close()
+        else:
+            sent += 1
+            result = {'status': OutboxEmail.SENT, 'sent_at': timezone.now()}
+        OutboxEmail.objects.filter(pk=email.pk).update(**result)
+    return sent, failed
@@ -0,0 +1,71 @@
+"""Версии токенов пользователей.
+
+Версия хранится в ``User.token_version`` и попадает в claim ``ver``
+выданного токена. Смена роли, блокировка или явный отзыв увеличивают
+версию, и старые токены перестают приниматься. Чтобы проверка не стоила
+запроса, версия читается из общего кеша, а поверх него держится короткий
+кеш в памяти процесса.
+
+Если кеш по умолчанию — ``LocMemCache``, он свой у каждого воркера, и
+``forget`` сбрасывает версию только там, где её изменили. Тогда версия
+хранится в нём не дольше ``JWT_TOKEN_VERSION_LOCAL_TTL``, и остальные
+воркеры узнают об отзыве за это же время.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+REVOKED = -1
+
+_local = {}
+_local_lock = threading.Lock()
+
+
+def cache_key(user_id):
+    return f'users:token_version:{user_id}'
+
+
+def process_local():
+    """Кеш по умолчанию живёт в памяти процесса, а не общий."""
+    return isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+
+def get_version(user_id, load):
+    """Текущая версия токенов пользователя; ``load`` читает её из базы."""
+    if process_local():
+        # Второй кеш в памяти не нужен: сам кеш живёт не дольше TTL.
+        version = cache.get(cache_key(user_id))
+        if version is None:
+            version = load(user_id)
+            cache.set(cache_key(user_id), version,
+                      settings.JWT_TOKEN_VERSION_LOCAL_TTL)
+        return version
+    now = time.monotonic()
+    with _local_lock:
+        cached = _local.get(user_id)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+    version = cache.get(cache_key(user_id))
+    if version is None:
+        version = load(user_id)
+        cache.set(cache_key(user_id), version,
+                  settings.JWT_TOKEN_VERSION_CACHE_TIMEOUT)
+    with _local_lock:
+        _local[user_id] = (version, now + settings.JWT_TOKEN_VERSION_LOCAL_TTL)
+    return version
+
+
+def forget(user_id):
+    """Сбрасывает закешированную версию после её изменения."""
+    cache.delete(cache_key(user_id))
+    with _local_lock:
+        _local.pop(user_id, None)
+
+
+def clear_local():
+    """Очищает кеш версий в памяти процесса."""
+    with _local_lock:
+        _local.clear()
@@ -1,9 +1,21 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+from django.core.cache import cache
+from users import token_versions
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
+    'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кеш локальной памяти живёт весь прогон, сбрасываем его между тестами."""
+    cache.clear()
+    token_versions.clear_local()
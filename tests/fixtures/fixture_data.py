@@ -0,0 +1,85 @@
+import pytest
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from reviews.models import Category, Genre, Review, Title
+from users.authentication import add_user_claims
+from users.models import User
+
+
+def client_for(user):
+    client = APIClient()
+    token = add_user_claims(RefreshToken.for_user(user), user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.fixture
+def user():
+    return User.objects.create(username='reader', email='reader@yamdb.fake')
+
+
+@pytest.fixture
+def admin():
+    return User.objects.create(
+        username='admin', email='admin@yamdb.fake', role=User.ADMIN
+    )
+
+
+@pytest.fixture
+def moderator():
+    return User.objects.create(
+        username='moderator', email='moderator@yamdb.fake',
+        role=User.MODERATOR
+    )
+
+
+@pytest.fixture
+def user_client(user):
+    return client_for(user)
+
+
+@pytest.fixture
+def admin_api_client(admin):
+    return client_for(admin)
+
+
+@pytest.fixture
+def moderator_client(moderator):
+    return client_for(moderator)
+
+
+@pytest.fixture
+def users():
+    return [
+        User.objects.create(username=f'user{i}', email=f'user{i}@yamdb.fake')
+        for i in range(5)
+    ]
+
+
+@pytest.fixture
+def category():
+    return Category.objects.create(name='Книга', slug='book')
+
+
+@pytest.fixture
+def genre():
+    return Genre.objects.create(name='Ужасы', slug='horror')
+
+
+@pytest.fixture
+def title(category, genre):
+    title = Title.objects.create(
+        name='Хребты безумия', year=1930, category=category
+    )
+    title.genre.add(genre)
+    return title
+
+
+@pytest.fixture
+def reviews(title, users):
+    return [
+        Review.objects.create(
+            title=title, author=author, text='Отзыв', score=score
+        )
+        for author, score in zip(users, (10, 7, 4))
+    ]
@@ -0,0 +1,71 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews import paginator
+from reviews.models import Review, Title
+from reviews.paginator import EstimatedCountPaginator
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+class TestAdminChangelists:
+
+    def test_review_list_constant_queries(self, admin_client, title, reviews,
+                                          users):
+        single = count_queries(admin_client, '/admin/reviews/review/')
+        other = Title.objects.create(name='Другое', year=2000)
+        Review.objects.bulk_create([
+            Review(title=other, author=author, text='Отзыв', score=5)
+            for author in users
+        ])
+        assert count_queries(admin_client, '/admin/reviews/review/') \
+            == single, (
+                'Проверьте, что список отзывов в админке получает '
+                'произведения и авторов одним запросом'
+            )
+
+    def test_title_list_constant_queries(self, admin_client, title, category):
+        single = count_queries(admin_client, '/admin/reviews/title/')
+        for index in range(5):
+            Title.objects.create(
+                name=f'Произведение {index}', year=2000, category=category
+            )
+        assert count_queries(admin_client, '/admin/reviews/title/') == single
+
+    def test_search(self, admin_client, title, reviews):
+        other = Title.objects.create(name='Дюна', year=1965)
+        response = admin_client.get('/admin/reviews/title/?q=Дюна')
+        assert list(response.context['cl'].result_list) == [other]
+        response = admin_client.get('/admin/reviews/review/?q=безумия')
+        assert set(response.context['cl'].result_list) == set(reviews), (
+            'Проверьте, что отзывы в админке ищутся по названию произведения'
+        )
+
+
+@pytest.mark.django_db
+class TestEstimatedCountPaginator:
+
+    def test_small_or_unsupported_table_counts_rows(self, reviews,
+                                                    monkeypatch):
+        assert EstimatedCountPaginator(Review.objects.all(), 2).count == 3
+        monkeypatch.setattr(paginator, 'estimated_count', lambda qs: 10)
+        assert EstimatedCountPaginator(Review.objects.all(), 2).count == 3, (
+            'Проверьте, что оценка не используется для небольших таблиц'
+        )
+
+    def test_large_table_uses_estimate(self, settings, reviews, monkeypatch):
+        settings.ADMIN_ESTIMATED_COUNT_THRESHOLD = 1000
+        monkeypatch.setattr(paginator, 'estimated_count', lambda qs: 5000)
+        assert EstimatedCountPaginator(Review.objects.all(), 2).count == 5000
+
+    def test_estimate_only_for_whole_table(self, reviews):
+        assert paginator.estimated_count(
+            Review.objects.filter(score=10)
+        ) is None
+        assert paginator.estimated_count(list(Review.objects.all())) is None
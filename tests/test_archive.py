@@ -0,0 +1,222 @@
+import datetime
+import gzip
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from reviews import archive as archive_module
+from reviews.models import (ArchivedComment, ArchivedReview, Comment, Review,
+                            Title)
+from reviews.scores import histogram_drift
+from tests.fixtures.fixture_data import client_for
+
+OLD = datetime.date(2020, 1, 1)
+
+
+@pytest.fixture
+def old_reviews(reviews, users):
+    """Отзывы 2020 года с комментариями; последний скрыт модератором."""
+    for review in reviews:
+        Comment.objects.create(review=review, author=users[4], text='Ответ')
+    Review.objects.filter(pk=reviews[2].pk).update(is_hidden=True)
+    Review.objects.update(pub_date=OLD)
+    Comment.objects.update(pub_date=OLD)
+    return reviews
+
+
+def archive(*args):
+    output = StringIO()
+    call_command('archive_content', '--before', '2021-01-01', *args,
+                 stdout=output)
+    return output.getvalue()
+
+
+def assert_rating(title, score_sum, review_count):
+    title = Title.objects.get(pk=title.pk)
+    assert (title.score_sum, title.review_count) == (
+        score_sum, review_count
+    ), 'Проверьте, что рейтинг учитывает только живые отзывы'
+    assert list(histogram_drift()) == []
+
+
+@pytest.mark.django_db
+class TestSoftDelete:
+
+    def test_delete_keeps_row(self, client, title, reviews, users):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = client_for(users[0]).delete(f'{url}{reviews[0].pk}/')
+        assert response.status_code == 204
+        assert Review.objects.get(pk=reviews[0].pk).is_deleted, (
+            'Проверьте, что удаление отзыва через API помечает строку, '
+            'а не удаляет её'
+        )
+        assert_rating(title, 7 + 4, 2)
+        listed = client.get(url).json()['results']
+        assert reviews[0].pk not in [item['id'] for item in listed]
+        assert client.get(f'{url}{reviews[0].pk}/').status_code == 404
+
+    def test_review_again_after_delete(self, title, reviews, users):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        author = client_for(users[0])
+        author.delete(f'{url}{reviews[0].pk}/')
+        response = author.post(url, {'text': 'Передумал', 'score': 1})
+        assert response.status_code == 201, (
+            'Проверьте, что после удаления отзыва автор может написать новый'
+        )
+        assert_rating(title, 1 + 7 + 4, 3)
+        response = author.post(url, {'text': 'Ещё раз', 'score': 5})
+        assert response.status_code == 400
+
+    def test_delete_comment(self, client, title, reviews, users):
+        comment = Comment.objects.create(
+            review=reviews[0], author=users[4], text='Ответ'
+        )
+        url = f'/api/v1/titles/{title.pk}/reviews/{reviews[0].pk}/comments/'
+        response = client_for(users[4]).delete(f'{url}{comment.pk}/')
+        assert response.status_code == 204
+        assert Comment.objects.filter(pk=comment.pk, is_deleted=True).exists()
+        assert client.get(url).json()['results'] == []
+
+    def test_partial_indexes(self):
+        with connection.cursor() as cursor:
+            for table, name in (('reviews_review', 'review_live_idx'),
+                                ('reviews_comment', 'comment_live_idx')):
+                indexes = connection.introspection.get_constraints(
+                    cursor, table
+                )
+                assert name in indexes, (
+                    f'Проверьте, что у таблицы {table} есть индекс {name}'
+                )
+        if connection.vendor == 'sqlite':
+            sql = connection.cursor().execute(
+                "SELECT sql FROM sqlite_master WHERE name = 'review_live_idx'"
+            ).fetchone()[0]
+            assert 'WHERE' in sql, (
+                'Проверьте, что индекс отзывов покрывает только живые строки'
+            )
+
+
+@pytest.mark.django_db
+class TestArchive:
+
+    def test_archive_keeps_rating(self, title, old_reviews, users):
+        Comment.objects.create(
+            review=Review.objects.create(
+                title=title, author=users[3], text='Свежий', score=1
+            ),
+            author=users[4], text='Свежий ответ'
+        )
+        output = archive()
+        assert 'отзывов 3, комментариев 3' in output
+        assert Review.objects.count() == 1 and Comment.objects.count() == 1, (
+            'Проверьте, что в рабочих таблицах остаются только свежие записи'
+        )
+        assert ArchivedReview.objects.filter(
+            pk=old_reviews[2].pk, is_hidden=True
+        ).exists(), 'Проверьте, что флаги отзыва переносятся в архив'
+        assert_rating(title, 10 + 7 + 1, 3)
+        Title.objects.all().recalculate_rating()
+        assert_rating(title, 10 + 7 + 1, 3)
+        assert 'отзывов 0, комментариев 0' in archive()
+
+    def test_archived_review_blocks_new_one(self, title, old_reviews, users,
+                                            admin_api_client):
+        archive()
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = client_for(users[0]).post(url, {'text': 'Снова', 'score': 1})
+        assert response.status_code == 400, (
+            'Проверьте, что автор архивного отзыва не может написать второй'
+        )
+        response = admin_api_client.post('/api/v1/reviews/bulk/', [
+            {'title': title.pk, 'author': users[1].username, 'text': 'Снова',
+             'score': 1},
+            {'title': title.pk, 'author': users[3].username, 'text': 'Новый',
+             'score': 1},
+        ], format='json')
+        assert response.json()['results'][0]['errors'], (
+            'Проверьте, что массовая загрузка не дублирует архивный отзыв'
+        )
+        assert response.json()['created'] == 1
+        assert_rating(title, 10 + 7 + 1, 3)
+
+    def test_read_archive(self, client, title, old_reviews):
+        archive()
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = client.get(url + 'archive/')
+        assert response.status_code == 200
+        assert [item['id'] for item in response.json()['results']] == [
+            old_reviews[0].pk, old_reviews[1].pk
+        ], 'Проверьте, что архивные отзывы читаются по запросу'
+        response = client.get(url + f'{old_reviews[0].pk}/comments/archive/')
+        assert response.status_code == 200
+        assert response.json()['results'][0]['text'] == 'Ответ'
+        response = client.get(url + f'{old_reviews[2].pk}/comments/archive/')
+        assert response.status_code == 404, (
+            'Проверьте, что комментарии скрытого отзыва недоступны и в архиве'
+        )
+        assert client.get('/api/v1/titles/999/reviews/archive/').status_code \
+            == 404
+
+    def test_export_and_restore(self, title, old_reviews, tmp_path):
+        archive()
+        output = archive('--export', str(tmp_path))
+        assert 'отзывов 3, комментариев 3' in output
+        assert not ArchivedReview.objects.exists()
+        assert not ArchivedComment.objects.exists()
+        assert (tmp_path / 'reviews.jsonl.gz').exists()
+        assert_rating(title, 0, 0)
+        call_command('import_catalog', str(tmp_path), stdout=StringIO())
+        assert Review.objects.count() == 3 and Comment.objects.count() == 3, (
+            'Проверьте, что выгрузка архива загружается import_catalog'
+        )
+        assert Review.objects.get(pk=old_reviews[2].pk).is_hidden
+        assert_rating(title, 17, 2)
+
+    def test_export_rerun_after_failure(self, title, old_reviews, tmp_path,
+                                        monkeypatch):
+        archive()
+        cutoff = datetime.date(2021, 1, 1)
+        path = tmp_path / 'reviews.jsonl.gz'
+
+        def exported_ids():
+            with gzip.open(path, 'rt', encoding='utf-8') as source:
+                return [json.loads(line)['id'] for line in source]
+
+        class Broken:
+            def send(self, **kwargs):
+                raise RuntimeError('Сбой до фиксации удаления')
+
+        monkeypatch.setattr(archive_module, 'titles_rated', Broken())
+        with pytest.raises(RuntimeError):
+            archive_module.export_archive(str(tmp_path), cutoff, 2)
+        monkeypatch.undo()
+        assert ArchivedReview.objects.count() == 3
+        commit = archive_module._commit_batch
+        calls = []
+
+        def crash_once(export_path):
+            calls.append(export_path)
+            if len(calls) == 1:
+                raise RuntimeError('Сбой после фиксации удаления')
+            commit(export_path)
+
+        monkeypatch.setattr(archive_module, '_commit_batch', crash_once)
+        with pytest.raises(RuntimeError):
+            archive_module.export_archive(str(tmp_path), cutoff, 2)
+        monkeypatch.undo()
+        assert ArchivedReview.objects.count() == 1
+        archive_module.export_archive(str(tmp_path), cutoff, 2)
+        assert sorted(exported_ids()) == sorted(
+            review.pk for review in old_reviews
+        ), 'Проверьте, что повторная выгрузка не дублирует и не теряет строки'
+        assert not ArchivedReview.objects.exists()
+
+    def test_cutoff_outside_trending_window(self):
+        with pytest.raises(CommandError):
+            call_command('archive_content', '--days', '1', stdout=StringIO())
+        with pytest.raises(CommandError):
+            call_command('archive_content', '--before', '2020-13-01',
+                         stdout=StringIO())
@@ -0,0 +1,121 @@
+import time
+
+import pytest
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from users import token_versions
+from users.models import User
+
+
+def user_queries(context):
+    return [
+        query for query in context.captured_queries
+        if 'FROM "users_user"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+class TestStatelessJWT:
+
+    def obtain_token(self, user):
+        user.confirmation_code = 'code'
+        user.save()
+        response = APIClient().post('/api/v1/auth/token/', {
+            'username': user.username, 'confirmation_code': 'code'
+        })
+        assert response.status_code == 200
+        return response.json()['token']
+
+    def test_authenticated_request_skips_user_lookup(self, user, title):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {self.obtain_token(user)}'
+        )
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        assert not user_queries(context), (
+            'Проверьте, что аутентификация не загружает пользователя из базы'
+        )
+        response = client.post(url, {'text': 'Отзыв', 'score': 8})
+        assert response.status_code == 201
+        assert response.json()['author'] == user.username
+
+    def test_role_change_revokes_token(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {self.obtain_token(user)}'
+        )
+        assert client.get('/api/v1/users/me/').status_code == 200
+        user = User.objects.get(pk=user.pk)
+        user.role = User.MODERATOR
+        user.save()
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что смена роли отзывает старые токены'
+        )
+
+    def test_partial_save_and_bulk_update_revoke_token(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {self.obtain_token(user)}'
+        )
+        user = User.objects.get(pk=user.pk)
+        user.role = User.MODERATOR
+        user.save(update_fields=['role'])
+        assert User.objects.get(pk=user.pk).token_version == 1, (
+            'Проверьте, что save(update_fields=...) сохраняет версию токенов'
+        )
+        assert client.get('/api/v1/users/me/').status_code == 401
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {self.obtain_token(user)}'
+        )
+        assert client.get('/api/v1/users/me/').status_code == 200
+        User.objects.filter(pk=user.pk).update(role=User.USER)
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что массовая смена роли отзывает старые токены'
+        )
+
+    def test_other_worker_rejects_within_ttl(self, user, settings,
+                                             monkeypatch):
+        settings.JWT_TOKEN_VERSION_LOCAL_TTL = 5
+        clock = [time.time()]
+        monkeypatch.setattr(time, 'time', lambda: clock[0])
+        monkeypatch.setattr(time, 'monotonic', lambda: clock[0])
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {self.obtain_token(user)}'
+        )
+        # Второй воркер: свой LocMemCache и свой кеш в памяти.
+        other = LocMemCache('other-worker', {})
+        monkeypatch.setattr(token_versions, 'cache', other)
+        token_versions.clear_local()
+        assert client.get('/api/v1/users/me/').status_code == 200
+        monkeypatch.setattr(token_versions, 'cache', cache)
+        user = User.objects.get(pk=user.pk)
+        user.role = User.MODERATOR
+        user.save()
+        monkeypatch.setattr(token_versions, 'cache', other)
+        clock[0] += settings.JWT_TOKEN_VERSION_LOCAL_TTL + 1
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что другие воркеры с кешем в памяти отказывают '
+            'отозванному токену не позже JWT_TOKEN_VERSION_LOCAL_TTL'
+        )
+
+    def test_admin_claims(self, admin_api_client):
+        response = admin_api_client.get('/api/v1/users/')
+        assert response.status_code == 200
+
+    def test_me_patch_with_claims_user(self, user_client, user):
+        response = user_client.patch('/api/v1/users/me/', {'bio': 'Читатель'})
+        assert response.status_code == 200
+        user.refresh_from_db()
+        assert user.bio == 'Читатель'
+
+    def test_deleted_user_rejected(self, user, user_client):
+        user.delete()
+        assert user_client.get('/api/v1/users/me/').status_code == 401
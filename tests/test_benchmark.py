@@ -0,0 +1,102 @@
+import os
+import random
+import runpy
+
+import pytest
+from api import benchmark
+from django.conf import settings
+from reviews.models import Title
+
+
+class TestBenchmarkReport:
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert benchmark.percentile(values, 50) == 50
+        assert benchmark.percentile(values, 99) == 99
+        assert benchmark.percentile([], 50) is None
+
+    def test_compare(self):
+        baseline = {'endpoints': {'titles': {'p50_ms': 10.0, 'queries': 4}}}
+        report = {'endpoints': {
+            'titles': {'p50_ms': 5.0, 'queries': 2},
+            'genres': {'p50_ms': 1.0, 'queries': 1},
+        }}
+        assert benchmark.compare(report, baseline) == [
+            'titles: p50_ms 10.00 -> 5.00 (-50%), queries 4.00 -> 2.00 (-50%)'
+        ]
+
+
+@pytest.mark.django_db
+class TestBenchmarkRun:
+
+    def test_seed_and_run(self, client):
+        sizes = dict(benchmark.DEFAULT_SIZES, users=4, titles=6,
+                     reviews_per_title=3, comments_per_review=1)
+        dataset = benchmark.seed(sizes, random.Random(0))
+        assert dataset['sizes']['titles'] == 6
+        assert dataset['sizes']['reviews'] == 18
+        assert all(title.review_count == 3 for title in Title.objects.all()), (
+            'Проверьте, что синтетические отзывы учитываются в рейтинге'
+        )
+        scenarios = benchmark.default_scenarios(dataset)
+        search_url = {name: url for name, url, _ in scenarios}[
+            'titles_search'
+        ]
+        assert client.get(search_url).json()['results'], (
+            'Проверьте, что сценарий поиска находит синтетические произведения'
+        )
+        report = benchmark.run(dataset, scenarios, 2, 0)
+        for name, stats in report['endpoints'].items():
+            assert stats['statuses'] == [200], name
+            assert stats['p50_ms'] <= stats['p99_ms']
+        assert report['meta']['dataset'] == dataset['sizes']
+
+    def test_measure_renderers(self, title, reviews):
+        results = benchmark.measure_renderers(rows=10, iterations=2)
+        assert set(results) == {'titles', 'reviews', 'comments'}
+        reviews_result = results['reviews']
+        assert reviews_result['rows'] == len(reviews)
+        assert reviews_result['fast']['bytes'] == (
+            reviews_result['drf']['bytes']
+        )
+        assert reviews_result['drf_ascii']['bytes'] > (
+            reviews_result['drf']['bytes']
+        ), 'Кириллица без экранирования должна занимать меньше места'
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConcurrencyBenchmark:
+
+    def test_measure_concurrency(self, live_server):
+        results = benchmark.measure_concurrency(
+            live_server.url, ['/api/v1/categories/', '/api/v1/missing/'],
+            levels=[1, 2], requests=4
+        )
+        assert list(results) == ['c1', 'c2']
+        for stats in results.values():
+            assert stats['requests'] == 4
+            assert stats['failed'] == 2, (
+                'Проверьте, что ответы не 200 считаются ошибками'
+            )
+            assert stats['p50_ms'] <= stats['p99_ms']
+
+    def test_slow_clients(self, live_server):
+        with benchmark.slow_clients(live_server.url, 1):
+            results = benchmark.measure_concurrency(
+                live_server.url, ['/api/v1/genres/'], levels=[2], requests=2
+            )
+        assert results['c2']['failed'] == 0
+
+
+class TestGunicornConfig:
+
+    def test_defaults_and_env(self, monkeypatch):
+        path = os.path.join(settings.BASE_DIR, 'gunicorn.conf.py')
+        config = runpy.run_path(path)
+        assert config['worker_class'] == 'gthread'
+        assert config['threads'] > 1
+        monkeypatch.setenv('GUNICORN_WORKER_CLASS', 'sync')
+        monkeypatch.setenv('GUNICORN_WORKERS', '3')
+        config = runpy.run_path(path)
+        assert (config['worker_class'], config['workers']) == ('sync', 3)
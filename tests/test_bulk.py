@@ -0,0 +1,142 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews import facets
+from reviews.models import Genre, Review, Title, TitleFacet
+from reviews.search import search_titles
+
+
+def post_bulk(client, url, items):
+    with CaptureQueriesContext(connection) as context:
+        response = client.post(url, data=items, format='json')
+    return response, len(context.captured_queries)
+
+
+@pytest.mark.django_db
+class TestBulkUpsert:
+
+    def test_admin_only(self, user_client, admin_api_client):
+        assert user_client.post(
+            '/api/v1/genres/bulk/', data=[], format='json'
+        ).status_code == 403
+        response = admin_api_client.post(
+            '/api/v1/genres/bulk/', data={'name': 'Драма'}, format='json'
+        )
+        assert response.status_code == 400
+
+    def test_genres(self, admin_api_client, genre):
+        response, _ = post_bulk(admin_api_client, '/api/v1/genres/bulk/', [
+            {'name': 'Хоррор', 'slug': 'horror'},
+            {'name': 'Драма', 'slug': 'drama'},
+            {'name': 'Без слага'},
+            {'name': 'Драма снова', 'slug': 'drama'},
+        ])
+        assert response.status_code == 200
+        data = response.json()
+        assert (data['created'], data['updated'], data['errors']) == (1, 1, 2)
+        assert data['results'][0] == {'id': genre.pk, 'status': 'updated'}
+        assert 'slug' in data['results'][2]['errors']
+        assert 'non_field_errors' in data['results'][3]['errors']
+        genre.refresh_from_db()
+        assert genre.name == 'Хоррор'
+        assert Genre.objects.get(slug='drama').pk == (
+            data['results'][1]['id']
+        )
+
+    def test_titles(self, admin_api_client, title, category, genre):
+        Genre.objects.create(name='Драма', slug='drama')
+        items = [
+            {'id': title.pk, 'name': 'Хребты безумия', 'year': 1936,
+             'category': 'book', 'genre': ['drama']},
+            {'name': 'Дагон', 'year': 1919, 'category': 'book',
+             'genre': ['horror', 'drama']},
+            {'name': 'Зов Ктулху', 'year': 1928},
+            {'name': 'Ошибка', 'year': 1928, 'genre': ['unknown']},
+            {'id': 10 ** 6, 'name': 'Нет такого', 'year': 1928},
+        ]
+        response, _ = post_bulk(
+            admin_api_client, '/api/v1/titles/bulk/', items
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert (data['created'], data['updated'], data['errors']) == (2, 1, 2)
+        assert 'genre' in data['results'][3]['errors']
+        assert 'id' in data['results'][4]['errors']
+        title.refresh_from_db()
+        assert title.year == 1936
+        assert list(title.genre.values_list('slug', flat=True)) == ['drama']
+        dagon = Title.objects.get(pk=data['results'][1]['id'])
+        assert dagon.name == 'Дагон'
+        assert set(dagon.genre.values_list('slug', flat=True)) == {
+            'horror', 'drama'
+        }
+        assert Title.objects.get(pk=data['results'][2]['id']).category is None
+        assert [found.pk for found in search_titles(
+            Title.objects.all(), 'дагон'
+        )] == [dagon.pk], 'Проверьте, что новые произведения попали в поиск'
+
+    def test_titles_shift_facets(self, admin_api_client, title, genre,
+                                 monkeypatch):
+        Genre.objects.create(name='Драма', slug='drama')
+
+        def table():
+            return {(row.genre_id, row.category_id, row.year): row.count
+                    for row in TitleFacet.objects.all() if row.count}
+
+        def rebuild(using='default'):
+            raise AssertionError(
+                'Проверьте, что массовая загрузка не пересобирает фасеты'
+            )
+
+        monkeypatch.setattr(facets, 'rebuild_facets', rebuild)
+        response, _ = post_bulk(admin_api_client, '/api/v1/titles/bulk/', [
+            {'id': title.pk, 'name': title.name, 'year': 1936,
+             'category': None, 'genre': ['drama']},
+            {'name': 'Дагон', 'year': 1919, 'category': 'book',
+             'genre': ['horror', 'drama']},
+        ])
+        assert response.json()['errors'] == 0
+        maintained = table()
+        monkeypatch.undo()
+        facets.rebuild_facets()
+        assert maintained == table(), (
+            'Проверьте, что массовая загрузка сдвигает счётчики фасетов'
+        )
+
+    def test_titles_constant_queries(self, admin_api_client, category,
+                                     genre):
+        def items(count, start):
+            return [{'name': f'Произведение {i}', 'year': 2000,
+                     'category': 'book', 'genre': ['horror']}
+                    for i in range(start, start + count)]
+
+        # Первый запрос прогревает кеши токена и схемы поиска.
+        post_bulk(admin_api_client, '/api/v1/titles/bulk/', items(1, 0))
+        _, small = post_bulk(
+            admin_api_client, '/api/v1/titles/bulk/', items(2, 1)
+        )
+        response, large = post_bulk(
+            admin_api_client, '/api/v1/titles/bulk/', items(50, 3)
+        )
+        assert response.json()['created'] == 50
+        assert large == small, (
+            'Проверьте, что число запросов не зависит от размера пачки'
+        )
+
+    def test_reviews(self, admin_api_client, title, reviews, users):
+        response, _ = post_bulk(admin_api_client, '/api/v1/reviews/bulk/', [
+            {'title': title.pk, 'author': users[0].username,
+             'text': 'Передумал', 'score': 2},
+            {'title': title.pk, 'author': users[4].username,
+             'text': 'Новый', 'score': 6},
+            {'title': title.pk, 'author': 'nobody', 'text': 'X', 'score': 6},
+            {'title': title.pk, 'author': users[3].username,
+             'text': 'X', 'score': 11},
+        ])
+        data = response.json()
+        assert (data['created'], data['updated'], data['errors']) == (1, 1, 2)
+        assert Review.objects.get(pk=reviews[0].pk).score == 2
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (2 + 7 + 4 + 6, 4), (
+            'Проверьте, что рейтинг учитывает массовую загрузку отзывов'
+        )
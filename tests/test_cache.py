@@ -0,0 +1,59 @@
+import pytest
+from reviews.models import Category, Genre, Review
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_hit_after_miss(self, client, title):
+        url = f'/api/v1/titles/{title.pk}/'
+        assert client.get(url)['X-Cache'] == 'MISS'
+        response = client.get(url)
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный запрос отдаётся из кеша'
+        )
+        assert response.json()['name'] == title.name
+
+    def test_conditional_requests(self, client, title):
+        url = '/api/v1/titles/'
+        response = client.get(url)
+        etag = response['ETag']
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        assert client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        ).status_code == 304
+        assert client.get(url, HTTP_IF_NONE_MATCH='"other"').status_code == 200
+
+    def test_review_invalidates_only_its_title(self, client, title, users):
+        other = Category.objects.create(name='Фильм', slug='movie')
+        categories_url = '/api/v1/categories/'
+        title_url = f'/api/v1/titles/{title.pk}/'
+        client.get(categories_url)
+        client.get(title_url)
+        Review.objects.create(
+            title=title, author=users[0], text='Отзыв', score=9
+        )
+        response = client.get(title_url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['rating'] == 9, (
+            'Проверьте, что новый отзыв сбрасывает кеш произведения'
+        )
+        assert client.get(categories_url)['X-Cache'] == 'HIT', (
+            'Проверьте, что отзыв не сбрасывает кеш категорий'
+        )
+        other.delete()
+        assert client.get(categories_url)['X-Cache'] == 'MISS'
+
+    def test_genre_link_invalidates_title_list(self, client, title):
+        client.get('/api/v1/titles/')
+        title.genre.add(Genre.objects.create(name='Драма', slug='drama'))
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'MISS'
+        assert len(response.json()['results'][0]['genre']) == 2
+
+    def test_stats_for_admin_only(self, client, admin_api_client, title):
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        assert client.get('/api/v1/metrics/cache/').status_code == 401
+        stats = admin_api_client.get('/api/v1/metrics/cache/').json()
+        assert stats['hits'] >= 1 and stats['misses'] >= 1
@@ -0,0 +1,137 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.facets import rebuild_facets
+from reviews.models import Category, Genre, Title, TitleFacet
+
+
+def facet_table():
+    return {
+        (row.genre_id, row.category_id, row.year): row.count
+        for row in TitleFacet.objects.all() if row.count
+    }
+
+
+def assert_consistent():
+    maintained = facet_table()
+    rebuild_facets()
+    assert maintained == facet_table(), (
+        'Проверьте, что счётчики фасетов поддерживаются при изменениях'
+    )
+
+
+@pytest.fixture
+def catalog(category, genre):
+    film = Category.objects.create(name='Фильм', slug='film')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    titles = [
+        Title.objects.create(name='Дагон', year=1919, category=category),
+        Title.objects.create(name='Сияние', year=1980, category=film),
+        Title.objects.create(name='Оно', year=1986, category=category),
+        Title.objects.create(name='Без категории', year=1986),
+    ]
+    titles[0].genre.set([genre])
+    titles[1].genre.set([genre, drama])
+    titles[2].genre.set([genre])
+    return titles
+
+
+@pytest.mark.django_db
+class TestFacetMaintenance:
+
+    def test_title_changes(self, catalog, category, genre):
+        assert_consistent()
+        dagon, shining, it, _ = catalog
+        dagon.year = 1920
+        dagon.category = None
+        dagon.save()
+        assert_consistent()
+        shining = Title.objects.get(pk=shining.pk)
+        shining.category = category
+        shining.save()
+        shining.genre.remove(genre)
+        assert_consistent()
+        Title(pk=it.pk, name=it.name, year=1990).save()
+        assert_consistent()
+        it.genre.clear()
+        genre.title_set.add(shining)
+        assert_consistent()
+        dagon.delete()
+        assert_consistent()
+
+    def test_genre_and_category_deleted(self, catalog, category, genre):
+        genre.delete()
+        assert_consistent()
+        category.delete()
+        assert_consistent()
+        Genre.objects.get(slug='drama').title_set.clear()
+        assert_consistent()
+
+    def test_command(self, catalog):
+        TitleFacet.objects.all().delete()
+        call_command('rebuild_facets', stdout=StringIO())
+        assert facet_table()[(0, catalog[0].category_id, 1919)] == 1
+
+
+@pytest.mark.django_db
+class TestFacetsEndpoint:
+
+    def get(self, client, query=''):
+        response = client.get(f'/api/v1/titles/facets/{query}')
+        assert response.status_code == 200
+        data = response.json()
+        return data, {
+            name: {item.get('slug', item.get('year')): item['count']
+                   for item in data[name]}
+            for name in ('genre', 'category', 'year')
+        }
+
+    def test_unfiltered(self, client, catalog):
+        with CaptureQueriesContext(connection) as context:
+            data, facets = self.get(client)
+        assert data['count'] == 4
+        assert facets['genre'] == {'horror': 3, 'drama': 1}
+        assert facets['category'] == {'book': 2, 'film': 1}
+        assert facets['year'] == {1919: 1, 1980: 1, 1986: 2}
+        assert not any(
+            'FROM "reviews_title"' in query['sql']
+            for query in context.captured_queries
+        ), 'Проверьте, что фасеты считаются без сканирования произведений'
+
+    def test_filtered(self, client, catalog):
+        data, facets = self.get(client, '?genre=drama&year=1980')
+        assert data['count'] == 1
+        assert facets['genre'] == {'horror': 1, 'drama': 1}, (
+            'Счётчики жанров не должны учитывать фильтр по жанру'
+        )
+        assert facets['category'] == {'film': 1}
+        assert facets['year'] == {1980: 1}
+        data, facets = self.get(client, '?category=book')
+        assert data['count'] == 2
+        assert facets['category'] == {'book': 2, 'film': 1}
+        assert facets['genre'] == {'horror': 2}
+
+    def test_name_filter_uses_titles(self, client, catalog):
+        data, facets = self.get(client, '?name=Оно&genre=horror')
+        assert data['count'] == 1
+        assert facets['year'] == {1986: 1}
+        assert facets['category'] == {'book': 1}
+
+    def test_unknown_values(self, client, catalog):
+        data, facets = self.get(client, '?genre=unknown')
+        assert data['count'] == 0
+        response = client.get('/api/v1/titles/facets/?year=abc')
+        assert response.status_code == 400
+
+    def test_bulk_upsert_rebuilds(self, admin_api_client, client, catalog):
+        response = admin_api_client.post('/api/v1/titles/bulk/', data=[
+            {'name': 'Новое', 'year': 2001, 'category': 'film',
+             'genre': ['drama']},
+        ], format='json')
+        assert response.status_code == 200
+        data, facets = self.get(client)
+        assert data['count'] == 5
+        assert facets['genre']['drama'] == 2
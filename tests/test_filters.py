@@ -0,0 +1,47 @@
+import pytest
+from reviews.models import Title
+
+
+@pytest.mark.django_db
+class TestTitleFilter:
+
+    def names(self, client, query):
+        response = client.get(f'/api/v1/titles/?{query}')
+        assert response.status_code == 200
+        return [title['name'] for title in response.json()['results']]
+
+    def test_search_is_ranked(self, client, title):
+        Title.objects.create(name='Безумный Макс', year=1979)
+        Title.objects.create(name='Зов Ктулху', year=1928)
+        assert set(self.names(client, 'search=безум')) == {
+            'Безумный Макс', 'Хребты безумия'
+        }, 'Проверьте, что поиск находит произведения по началу слова'
+        assert self.names(client, 'search=ктулху') == ['Зов Ктулху']
+        assert self.names(client, 'search=!!!') == []
+
+    def test_search_description(self, client, title):
+        Title.objects.create(
+            name='Дагон', year=1919, description='Рассказ о морском божестве'
+        )
+        Title.objects.create(name='Морской волк', year=1904)
+        assert self.names(client, 'search=морск') == [
+            'Морской волк', 'Дагон'
+        ], (
+            'Проверьте, что поиск идёт и по описанию, а совпадения '
+            'в названии выше'
+        )
+
+    def test_search_follows_title_changes(self, client, title):
+        title.name = 'Шепчущий во тьме'
+        title.save()
+        assert self.names(client, 'search=шепчущ') == ['Шепчущий во тьме']
+        title.delete()
+        assert self.names(client, 'search=шепчущ') == []
+
+    def test_slug_filters_are_exact(self, client, title):
+        assert self.names(client, 'genre=horror') == ['Хребты безумия']
+        assert self.names(client, 'genre=horr') == [], (
+            'Проверьте, что жанр фильтруется по точному совпадению слага'
+        )
+        assert self.names(client, 'category=book') == ['Хребты безумия']
+        assert self.names(client, 'category=bo') == []
@@ -0,0 +1,70 @@
+import pytest
+from api.query_plan import flat_fields
+from api.serializers import (CommentSerializer, ReviewSerializer,
+                             TitleReadSerializer)
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Comment, Review
+
+
+def get_json(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response.json(), len(context.captured_queries)
+
+
+@pytest.mark.django_db
+class TestFlatLists:
+
+    def test_flat_fields(self):
+        assert flat_fields(ReviewSerializer) == (
+            ('id', 'id'), ('text', 'text'),
+            ('author', 'author__username'), ('score', 'score'),
+            ('pub_date', 'pub_date'),
+        )
+        assert flat_fields(CommentSerializer) is not None
+        assert flat_fields(TitleReadSerializer) is None, (
+            'Проверьте, что вложенные сериализаторы идут обычным путём'
+        )
+
+    @pytest.mark.parametrize('query', ['', '?page=2', '?pagination=cursor'])
+    def test_same_response(self, settings, client, title, reviews, users,
+                           query):
+        Review.objects.bulk_create(
+            Review(title=title, author=user, text='Отзыв', score=3)
+            for user in users[len(reviews):]
+        )
+        Comment.objects.bulk_create(
+            Comment(review=reviews[0], author=user, text=user.username)
+            for user in users
+        )
+        for url in (
+            f'/api/v1/titles/{title.pk}/reviews/{query}',
+            f'/api/v1/titles/{title.pk}/reviews/{reviews[0].pk}/comments/'
+            f'{query}',
+        ):
+            flat, flat_queries = get_json(client, url)
+            settings.API_FLAT_LISTS = False
+            full, _ = get_json(client, url)
+            settings.API_FLAT_LISTS = True
+            assert flat == full, (
+                'Проверьте, что список строками совпадает с ответом '
+                'сериализатора'
+            )
+            assert flat_queries <= 2
+
+    def test_cursor_from_flat_rows(self, client, title, users):
+        Review.objects.bulk_create(
+            Review(title=title, author=user, text='Отзыв', score=5)
+            for user in users
+        )
+        url = f'/api/v1/titles/{title.pk}/reviews/?pagination=cursor'
+        seen = []
+        while url:
+            data, _ = get_json(client, url)
+            seen += [review['id'] for review in data['results']]
+            url = data['next']
+        assert sorted(seen) == sorted(
+            Review.objects.values_list('pk', flat=True)
+        )
@@ -0,0 +1,167 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from reviews.importer import CatalogImporter, Checkpoint, find_files
+from reviews.models import Comment, ImportCheckpoint, Review, Title
+from reviews.search import search_titles
+from users.models import User
+
+
+def write_jsonl(path, rows):
+    path.write_text(
+        '\n'.join(json.dumps(row, ensure_ascii=False) for row in rows),
+        encoding='utf-8'
+    )
+
+
+@pytest.fixture
+def catalog_dir(tmp_path):
+    (tmp_path / 'users.csv').write_text(
+        'id,username,email,role\n'
+        '10,alice,alice@yamdb.fake,user\n'
+        '11,bob,bob@yamdb.fake,moderator\n',
+        encoding='utf-8'
+    )
+    (tmp_path / 'categories.csv').write_text(
+        'id,name,slug\n1,Книга,book\n', encoding='utf-8'
+    )
+    write_jsonl(tmp_path / 'genres.jsonl', [
+        {'name': 'Ужасы', 'slug': 'horror'},
+        {'name': 'Драма', 'slug': 'drama'},
+    ])
+    write_jsonl(tmp_path / 'titles.jsonl', [
+        {'id': 1, 'name': 'Хребты безумия', 'year': 1936,
+         'category': 'book'},
+        {'id': 2, 'name': 'Дагон', 'year': 1919, 'category': 'unknown'},
+        {'id': 3, 'name': 'Зов Ктулху', 'year': 1928, 'category': ''},
+    ])
+    write_jsonl(tmp_path / 'genre_title.jsonl', [
+        {'title': 1, 'genre': 'horror'},
+        {'title': 1, 'genre': 'drama'},
+        {'title': 3, 'genre': 'horror'},
+    ])
+    write_jsonl(tmp_path / 'reviews.jsonl', [
+        {'id': 100, 'title': 1, 'author': 'alice', 'text': 'Жутко',
+         'score': 9, 'pub_date': '2019-09-24T21:08:21.567Z'},
+        {'id': 101, 'title': 1, 'author': 'bob', 'text': 'Скучно',
+         'score': 4},
+        {'id': 102, 'title': 3, 'author': 'carol', 'text': 'Кто я',
+         'score': 1},
+        {'id': 103, 'title': 3, 'author': 'bob', 'text': 'Ктулху',
+         'score': 10},
+    ])
+    (tmp_path / 'comments.csv').write_text(
+        'review,author,text,pub_date\n'
+        '100,bob,Согласен,2019-09-25\n',
+        encoding='utf-8'
+    )
+    return tmp_path
+
+
+@pytest.mark.django_db
+class TestCatalogImport:
+
+    def test_import(self, catalog_dir):
+        out = StringIO()
+        call_command('import_catalog', str(catalog_dir), stdout=out)
+        assert User.objects.get(pk=11).role == 'moderator'
+        assert list(Title.objects.order_by('pk').values_list(
+            'pk', flat=True
+        )) == [1, 3], 'Проверьте, что строка с неизвестной категорией пропущена'
+        assert Title.objects.get(pk=1).genre.count() == 2
+        assert Review.objects.count() == 3
+        assert str(Review.objects.get(pk=100).pub_date) == '2019-09-24', (
+            'Проверьте, что дата публикации берётся из файла'
+        )
+        assert Comment.objects.get().author.username == 'bob'
+        title = Title.objects.get(pk=1)
+        assert (title.score_sum, title.review_count) == (13, 2), (
+            'Проверьте, что рейтинг пересчитан после импорта'
+        )
+        assert 'reviews: 3 строк' in out.getvalue()
+        assert 'пропущено 1' in out.getvalue()
+        assert not ImportCheckpoint.objects.exists()
+        found = search_titles(Title.objects.all(), 'ктулху')
+        assert [title.pk for title in found] == [3], (
+            'Проверьте, что импортированные произведения попали в индекс поиска'
+        )
+
+    def test_resume_after_failure(self, catalog_dir):
+        reviews_file = catalog_dir / 'reviews.jsonl'
+        good = reviews_file.read_text(encoding='utf-8')
+        reviews_file.write_text(
+            good.replace('"score": 10', '"score": "десять"'),
+            encoding='utf-8'
+        )
+        checkpoint = Checkpoint('catalog')
+        importer = CatalogImporter(batch_size=2, checkpoint=checkpoint)
+        with pytest.raises(ValueError):
+            list(importer.run(find_files(str(catalog_dir))))
+        assert Checkpoint('catalog').get('reviews') == 2
+        reviews_file.write_text(good, encoding='utf-8')
+        checkpoint = Checkpoint('catalog')
+        importer = CatalogImporter(batch_size=2, checkpoint=checkpoint)
+        stats = {
+            stats.kind: stats
+            for stats in importer.run(find_files(str(catalog_dir)))
+        }
+        assert stats['reviews'].resumed_from == 2
+        assert stats['titles'].rows == 0, (
+            'Проверьте, что загруженные виды не импортируются повторно'
+        )
+        assert Review.objects.count() == 3
+        assert Title.objects.get(pk=3).review_count == 1
+
+    def test_resume_rows_without_ids(self, catalog_dir, monkeypatch):
+        (catalog_dir / 'comments.csv').unlink()
+        write_jsonl(catalog_dir / 'comments.jsonl', [
+            {'review': 100, 'author': 'bob', 'text': f'Ответ {index}'}
+            for index in range(3)
+        ])
+        save = Checkpoint.save
+
+        def crash(checkpoint, kind, rows):
+            save(checkpoint, kind, rows)
+            if kind == 'comments' and rows == 2:
+                raise RuntimeError('Сбой после вставки пачки')
+
+        monkeypatch.setattr(Checkpoint, 'save', crash)
+        importer = CatalogImporter(batch_size=2,
+                                   checkpoint=Checkpoint('catalog'))
+        with pytest.raises(RuntimeError):
+            list(importer.run(find_files(str(catalog_dir))))
+        monkeypatch.undo()
+        assert not Comment.objects.exists()
+        importer = CatalogImporter(batch_size=2,
+                                   checkpoint=Checkpoint('catalog'))
+        stats = {
+            stats.kind: stats
+            for stats in importer.run(find_files(str(catalog_dir)))
+        }
+        assert stats['comments'].resumed_from == 0
+        assert Comment.objects.count() == 3, (
+            'Проверьте, что строки без id не вставляются повторно '
+            'после возобновления'
+        )
+
+    def test_duplicate_review_skipped(self, catalog_dir):
+        write_jsonl(catalog_dir / 'reviews.jsonl', [
+            {'id': 100, 'title': 1, 'author': 'alice', 'text': 'Жутко',
+             'score': 9},
+            {'title': 1, 'author': 'bob', 'text': 'Скучно', 'score': 4},
+            {'title': 1, 'author': 'alice', 'text': 'Ещё раз', 'score': 1},
+        ])
+        out, err = StringIO(), StringIO()
+        call_command('import_catalog', str(catalog_dir), stdout=out,
+                     stderr=err)
+        assert Review.objects.count() == 2, (
+            'Проверьте, что повтор отзыва пропускается, а не прерывает импорт'
+        )
+        assert Review.objects.get(author__username='alice').score == 9
+        assert 'reviews: строка 3 пропущена' in err.getvalue(), (
+            'Проверьте, что импорт сообщает номер отвергнутой строки'
+        )
+        title = Title.objects.get(pk=1)
+        assert (title.score_sum, title.review_count) == (13, 2)
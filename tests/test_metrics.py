@@ -0,0 +1,66 @@
+import pytest
+from api import metrics
+from api.middleware import QueryMetricsMiddleware
+from django.http import HttpResponse
+from users.models import User
+
+
+@pytest.fixture
+def sampled(settings):
+    settings.API_METRICS_SAMPLE_RATE = 1
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.mark.django_db
+class TestQueryMetrics:
+
+    def test_server_timing_only_when_sampled(self, client, title):
+        response = client.get(f'/api/v1/titles/{title.pk}/')
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что без выборки запрос не замеряется'
+        )
+        assert metrics.get_metrics() == {}
+
+    def test_server_timing(self, sampled, client, title):
+        response = client.get(f'/api/v1/titles/{title.pk}/')
+        timing = response['Server-Timing']
+        assert timing.startswith('db;dur=')
+        assert 'serializer;dur=' in timing and 'total;dur=' in timing
+        endpoint = metrics.get_metrics()['GET title-detail']
+        assert endpoint['queries']['count'] == 1
+        assert endpoint['response_bytes']['max'] == len(response.content)
+        assert endpoint['duplicate_requests'] == 0
+
+    def test_duplicate_queries_flagged(self, sampled, rf, users):
+        def view(request):
+            for user in users:
+                User.objects.filter(pk=user.pk).exists()
+            return HttpResponse()
+
+        response = QueryMetricsMiddleware(view)(rf.get('/'))
+        assert f'{len(users)} duplicated' in response['Server-Timing']
+        endpoint = metrics.get_metrics()['GET unresolved']
+        assert endpoint['duplicate_requests'] == 1, (
+            'Проверьте, что повторяющиеся запросы отмечаются как N+1'
+        )
+        assert endpoint['duplicate_queries'][0]['count'] == len(users)
+
+    def test_reviews_list_without_duplicates(self, sampled, client, title,
+                                             reviews):
+        client.get(f'/api/v1/titles/{title.pk}/reviews/')
+        endpoint = metrics.get_metrics()['GET reviews-list']
+        assert endpoint['duplicate_requests'] == 0
+
+    def test_metrics_endpoint(self, sampled, client, user_client,
+                              admin_api_client, title):
+        client.get('/api/v1/titles/')
+        assert user_client.get('/api/v1/metrics/').status_code == 403
+        response = admin_api_client.get('/api/v1/metrics/')
+        assert response.status_code == 200
+        data = response.json()
+        assert data['endpoints']['GET title-list']['duration_ms']['count']
+        assert 'hit_ratio' in data['cache']
+        assert admin_api_client.delete('/api/v1/metrics/').status_code == 204
+        assert 'GET title-list' not in metrics.get_metrics()
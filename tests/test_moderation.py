@@ -0,0 +1,133 @@
+import datetime
+
+import pytest
+from reviews.models import Comment, Review, Title
+from reviews.scores import histogram_drift
+
+REVIEWS_URL = '/api/v1/moderation/reviews/'
+COMMENTS_URL = '/api/v1/moderation/comments/'
+
+
+@pytest.fixture
+def comments(reviews, users):
+    return [
+        Comment.objects.create(review=review, author=users[4], text='Спам')
+        for review in reviews
+    ]
+
+
+def assert_rating(title, score_sum, review_count):
+    title = Title.objects.get(pk=title.pk)
+    assert (title.score_sum, title.review_count) == (
+        score_sum, review_count
+    ), 'Проверьте, что модерация пересчитывает рейтинг произведения'
+    assert list(histogram_drift()) == []
+
+
+@pytest.mark.django_db
+class TestModeration:
+
+    def test_hide_and_restore_reviews(self, client, moderator_client, title,
+                                      reviews, users):
+        response = moderator_client.post(
+            REVIEWS_URL, {'action': 'hide', 'author': users[0].username},
+            format='json'
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            'action': 'hide', 'affected': {'reviews': 1}
+        }, 'Проверьте, что модерация возвращает число затронутых объектов'
+        assert_rating(title, 7 + 4, 2)
+        listed = client.get(f'/api/v1/titles/{title.pk}/reviews/').json()
+        assert reviews[0].pk not in [item['id'] for item in listed['results']]
+        response = client.get(
+            f'/api/v1/titles/{title.pk}/reviews/{reviews[0].pk}/comments/'
+        )
+        assert response.status_code == 404, (
+            'Проверьте, что комментарии скрытого отзыва недоступны'
+        )
+        response = moderator_client.post(
+            REVIEWS_URL, {'action': 'restore', 'ids': [
+                reviews[0].pk, reviews[1].pk
+            ]}, format='json'
+        )
+        assert response.json()['affected'] == {'reviews': 1}
+        assert_rating(title, 21, 3)
+
+    def test_delete_reviews_with_comments(self, moderator_client, title,
+                                          reviews, comments):
+        Review.objects.filter(pk=reviews[2].pk).update(
+            pub_date=datetime.date(2020, 1, 1)
+        )
+        response = moderator_client.post(REVIEWS_URL, {
+            'action': 'delete', 'since': '2019-12-01', 'until': '2020-01-31'
+        }, format='json')
+        assert response.json()['affected'] == {'reviews': 1, 'comments': 1}
+        assert_rating(title, 17, 2)
+        assert Review.objects.filter(pk=reviews[2].pk, is_deleted=True) \
+            .exists(), (
+                'Проверьте, что массовое удаление только помечает отзывы'
+            )
+        assert Comment.objects.filter(
+            pk=comments[2].pk, is_deleted=True
+        ).exists(), 'Проверьте, что комментарии отзыва помечаются удалёнными'
+        response = moderator_client.post(COMMENTS_URL, {
+            'action': 'delete', 'ids': [comment.pk for comment in comments]
+        }, format='json')
+        assert response.json()['affected'] == {'reviews': 0, 'comments': 2}, (
+            'Проверьте, что уже удалённые комментарии не считаются повторно'
+        )
+        response = moderator_client.post(REVIEWS_URL, {
+            'action': 'delete', 'ids': [review.pk for review in reviews]
+        }, format='json')
+        assert response.json()['affected'] == {'reviews': 2, 'comments': 0}
+        assert Comment.objects.count() == 3 and Review.objects.count() == 3
+        assert_rating(title, 0, 0)
+
+    def test_restore_deleted_reviews(self, moderator_client, title, reviews,
+                                     users):
+        ids = [review.pk for review in reviews]
+        moderator_client.post(REVIEWS_URL, {'action': 'delete', 'ids': ids},
+                              format='json')
+        Review.objects.create(title=title, author=users[2], text='Новый',
+                              score=1)
+        response = moderator_client.post(
+            REVIEWS_URL, {'action': 'restore', 'ids': ids}, format='json'
+        )
+        assert response.json()['affected'] == {'reviews': 2}, (
+            'Проверьте, что возврат не трогает отзыв, вместо которого автор '
+            'написал новый'
+        )
+        assert_rating(title, 10 + 7 + 1, 3)
+
+    def test_hide_comments(self, client, moderator_client, title, reviews,
+                           comments, users):
+        response = moderator_client.post(COMMENTS_URL, {
+            'action': 'hide', 'author': users[4].username
+        }, format='json')
+        assert response.json()['affected'] == {'comments': 3}
+        response = client.get(
+            f'/api/v1/titles/{title.pk}/reviews/{reviews[0].pk}/comments/'
+        )
+        assert response.json()['results'] == []
+
+    def test_permissions_and_validation(self, user_client, moderator_client,
+                                        reviews):
+        response = user_client.post(
+            REVIEWS_URL, {'action': 'delete', 'ids': [reviews[0].pk]},
+            format='json'
+        )
+        assert response.status_code == 403, (
+            'Проверьте, что модерация доступна только модераторам и админам'
+        )
+        for data in (
+            {'action': 'delete'},
+            {'action': 'purge', 'ids': [1]},
+            {'action': 'hide', 'author': 'nobody'},
+            {'action': 'hide', 'since': '2021-01-02', 'until': '2021-01-01'},
+        ):
+            response = moderator_client.post(REVIEWS_URL, data, format='json')
+            assert response.status_code == 400, (
+                f'Проверьте, что запрос {data} отклоняется со статусом 400'
+            )
+        assert Review.objects.count() == 3
@@ -0,0 +1,89 @@
+import pytest
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.serializers import ModelSerializer
+from reviews.models import Comment, Review
+
+
+def capture_queries(client, url, method='get', **kwargs):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, **kwargs)
+    return response, [query['sql'] for query in context.captured_queries]
+
+
+def count_queries(client, url):
+    response, queries = capture_queries(client, url)
+    return response, len(queries)
+
+
+@pytest.mark.django_db
+class TestNestedRoutes:
+
+    def test_comments_list_queries(self, client, title, reviews, users):
+        review = reviews[0]
+        url = f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+        Comment.objects.create(review=review, author=users[0], text='Да')
+        _, single = count_queries(client, url)
+        Comment.objects.bulk_create(
+            Comment(review=review, author=user, text='Нет') for user in users
+        )
+        response, full_page = count_queries(client, url)
+        assert response.status_code == 200
+        assert single == full_page == 2, (
+            'Проверьте, что список комментариев получается запросом '
+            'подсчёта и одним запросом страницы с авторами'
+        )
+        _, cursor = count_queries(client, url + '?pagination=cursor')
+        assert cursor == 1
+
+    def test_parent_chain_checked(self, client, title, reviews, category):
+        other = title.__class__.objects.create(
+            name='Дагон', year=1919, category=category
+        )
+        review = reviews[0]
+        wrong = f'/api/v1/titles/{other.pk}/reviews/{review.pk}/comments/'
+        assert client.get(wrong).status_code == 404, (
+            'Проверьте, что отзыв другого произведения даёт 404'
+        )
+        assert client.get(f'/api/v1/titles/{other.pk}/reviews/').json()[
+            'results'
+        ] == []
+        assert client.get('/api/v1/titles/0/reviews/').status_code == 404
+        assert client.get(
+            f'/api/v1/titles/{title.pk}/reviews/0/comments/'
+        ).status_code == 404
+
+    def test_create_comment(self, user_client, user, title, reviews):
+        url = (f'/api/v1/titles/{title.pk}/reviews/'
+               f'{reviews[0].pk}/comments/')
+        response, queries = capture_queries(
+            user_client, url, 'post', data={'text': 'Согласен'}
+        )
+        assert response.status_code == 201
+        assert response.json()['author'] == user.username
+        parent_queries = [
+            sql for sql in queries if sql.startswith('SELECT')
+            and 'FROM "reviews_review"' in sql
+        ]
+        assert len(parent_queries) == 1, (
+            'Проверьте, что отзыв с произведением проверяется одним запросом'
+        )
+
+    def test_duplicate_review(self, user_client, user, title):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        data = {'text': 'Жутко', 'score': 8}
+        assert user_client.post(url, data=data).status_code == 201
+        response = user_client.post(url, data=data)
+        assert response.status_code == 400
+        assert 'non_field_errors' in response.json()
+        assert Review.objects.filter(author=user).count() == 1
+
+    def test_other_integrity_error_not_duplicate(self, user_client, title,
+                                                 monkeypatch):
+        def broken(self, validated_data):
+            raise IntegrityError('NOT NULL constraint failed: reviews_review')
+
+        monkeypatch.setattr(ModelSerializer, 'create', broken)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        with pytest.raises(IntegrityError):
+            user_client.post(url, data={'text': 'Жутко', 'score': 8})
@@ -0,0 +1,81 @@
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+from users.models import OutboxEmail
+from users.outbox import claim_batch, enqueue_email
+
+
+@pytest.mark.django_db
+class TestSignupOutbox:
+
+    def signup(self, client):
+        response = client.post(
+            '/api/v1/auth/signup/',
+            {'username': 'newbie', 'email': 'newbie@yamdb.fake'}
+        )
+        assert response.status_code == 200
+        return OutboxEmail.objects.get()
+
+    def test_signup_enqueues_instead_of_sending(self, client):
+        email = self.signup(client)
+        assert not mail.outbox, (
+            'Проверьте, что регистрация не отправляет письмо в запросе'
+        )
+        assert email.recipient == 'newbie@yamdb.fake'
+        assert email.status == OutboxEmail.PENDING
+
+    def test_worker_sends_batch(self, client):
+        email = self.signup(client)
+        call_command('send_outbox')
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.SENT
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ['newbie@yamdb.fake']
+
+    def test_worker_retries_with_backoff(self, client, monkeypatch):
+        email = self.signup(client)
+
+        def fail(backend, messages):
+            raise ConnectionError('SMTP недоступен')
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', fail)
+        call_command('send_outbox', '--max-attempts=2')
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.PENDING
+        assert email.attempts == 1
+        assert email.next_attempt_at > timezone.now(), (
+            'Проверьте, что повторная отправка откладывается'
+        )
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        call_command('send_outbox', '--max-attempts=2')
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.FAILED
+
+    def test_claimed_batch_is_leased(self, client):
+        email = self.signup(client)
+        assert [claimed.pk for claimed in claim_batch(10, timezone.now())] \
+            == [email.pk]
+        assert claim_batch(10, timezone.now()) == [], (
+            'Проверьте, что взятое в отправку письмо не достаётся другому '
+            'воркеру'
+        )
+        email.refresh_from_db()
+        assert email.attempts == 1 and email.status == OutboxEmail.PENDING
+
+    def test_each_result_saved_separately(self, client, monkeypatch):
+        enqueue_email('Первое', 'Текст', 'yamdb@yamdb.fake', 'a@yamdb.fake')
+        enqueue_email('Второе', 'Текст', 'yamdb@yamdb.fake', 'b@yamdb.fake')
+        send_messages = EmailBackend.send_messages
+
+        def fail_second(backend, messages):
+            if messages[0].subject == 'Второе':
+                raise ConnectionError('SMTP недоступен')
+            return send_messages(backend, messages)
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', fail_second)
+        call_command('send_outbox')
+        assert dict(OutboxEmail.objects.values_list('subject', 'status')) == {
+            'Первое': OutboxEmail.SENT, 'Второе': OutboxEmail.PENDING
+        }, 'Проверьте, что результат каждого письма записывается отдельно'
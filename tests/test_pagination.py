@@ -0,0 +1,72 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Title
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+
+    @pytest.fixture
+    def titles(self):
+        return Title.objects.bulk_create([
+            Title(name=name, year=2000)
+            for name in ('Б', 'А', 'Г', 'В', 'Д', 'Е', 'В', 'Ж', 'З', 'И')
+        ])
+
+    def walk(self, client, url):
+        results = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что курсорная пагинация не считает записи'
+            )
+            results.extend(data['results'])
+            url = data['next']
+        return results
+
+    def test_cursor_walk_matches_ordering(self, client, titles):
+        results = self.walk(client, '/api/v1/titles/?pagination=cursor')
+        assert [title['name'] for title in results] == sorted(title.name for title in titles), (
+            'Проверьте, что курсор проходит все произведения по порядку '
+            'без пропусков и повторов'
+        )
+
+    def test_previous_link(self, client, titles):
+        first = client.get('/api/v1/titles/?pagination=cursor').json()
+        second = client.get(first['next']).json()
+        back = client.get(second['previous']).json()
+        assert back['results'] == first['results']
+
+    def test_page_number_still_works(self, client, titles):
+        data = client.get('/api/v1/titles/?page=2').json()
+        assert data['count'] == len(titles)
+
+    def test_invalid_cursor(self, client, titles):
+        response = client.get('/api/v1/titles/?cursor=garbage')
+        assert response.status_code == 404
+
+    def test_search_rejects_cursor(self, client, title):
+        Title.objects.create(name='Безумный Макс', year=1979)
+        response = client.get('/api/v1/titles/?search=безум&pagination=cursor')
+        assert response.status_code == 400, (
+            'Проверьте, что курсорная пагинация не подменяет порядок '
+            'релевантности поиска'
+        )
+        assert 'pagination' in response.json()
+        response = client.get('/api/v1/titles/?search=безум&page=1')
+        assert response.status_code == 200
+        assert response.json()['count'] == 2
+        response = client.get('/api/v1/titles/?name=безум&pagination=cursor')
+        assert response.status_code == 200
+
+    def test_reviews_cursor_without_count(self, client, title, reviews):
+        url = f'/api/v1/titles/{title.pk}/reviews/?pagination=cursor'
+        with CaptureQueriesContext(connection) as context:
+            client.get(url)
+        assert not any(
+            'COUNT(' in query['sql'] for query in context.captured_queries
+        ), 'Проверьте, что курсорная пагинация не выполняет COUNT(*)'
+        assert len(self.walk(client, url)) == len(reviews)
@@ -0,0 +1,119 @@
+import sqlite3
+import threading
+
+import pytest
+from api import pool
+from django.db import OperationalError
+from django.db.utils import ConnectionHandler
+
+
+def handler_for(pooled_settings):
+    return ConnectionHandler({
+        'default': {'ENGINE': 'django.db.backends.sqlite3'},
+        'pooled': pooled_settings,
+    })
+
+
+@pytest.fixture
+def pooled(tmp_path):
+    yield handler_for({
+        'ENGINE': 'api.pool.sqlite3',
+        'NAME': str(tmp_path / 'pool.sqlite3'),
+        'POOL': {'MAX_SIZE': 2, 'TIMEOUT': 0.05},
+    })
+    pool.close_pools()
+
+
+def memory():
+    return sqlite3.connect(':memory:')
+
+
+def connection_in_thread(pooled_settings, results):
+    handler = handler_for(pooled_settings)
+    try:
+        handler['pooled'].ensure_connection()
+        results.append(handler['pooled'])
+    except OperationalError as error:
+        results.append(error)
+
+
+class TestConnectionPool:
+
+    def test_reuse_and_limit(self):
+        connection_pool = pool.ConnectionPool(max_size=2, timeout=0.01)
+        first = connection_pool.acquire(memory)
+        second = connection_pool.acquire(memory)
+        with pytest.raises(pool.PoolExhaustedError):
+            connection_pool.acquire(memory)
+        connection_pool.release(first)
+        assert connection_pool.acquire(memory) is first, (
+            'Проверьте, что свободное соединение берётся из пула'
+        )
+        connection_pool.release(second, reusable=False)
+        stats = connection_pool.stats()
+        assert (stats['created'], stats['reused'], stats['closed']) == (
+            2, 1, 1
+        )
+        assert (stats['size'], stats['in_use'], stats['timeouts']) == (
+            1, 1, 1
+        )
+
+    def test_health_check_and_idle_timeout(self):
+        connection_pool = pool.ConnectionPool(
+            health_check_interval=0, errors=(sqlite3.Error,)
+        )
+        broken = connection_pool.acquire(memory)
+        connection_pool.release(broken)
+        broken.close()
+        fresh = connection_pool.acquire(memory)
+        assert fresh is not broken, (
+            'Проверьте, что неработающее соединение не выдаётся из пула'
+        )
+        assert connection_pool.stats()['unhealthy'] == 1
+        connection_pool.idle_timeout = 0
+        connection_pool.release(fresh)
+        connection_pool.acquire(memory)
+        assert connection_pool.stats()['created'] == 3
+
+
+@pytest.mark.django_db
+class TestPooledBackend:
+
+    def test_connection_returns_to_pool(self, pooled):
+        connection = pooled['pooled']
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id integer)')
+        raw = connection.connection
+        connection.close()
+        assert connection.connection is None
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM item')
+        assert connection.connection is raw
+        stats = pool.get_stats()['databases']['pooled']
+        assert (stats['created'], stats['reused']) == (1, 1)
+
+    def test_exhausted_pool(self, pooled):
+        pooled['pooled'].ensure_connection()
+        results = []
+        for _ in range(2):
+            thread = threading.Thread(
+                target=connection_in_thread,
+                args=(pooled.databases['pooled'], results)
+            )
+            thread.start()
+            thread.join()
+        assert isinstance(results[1], OperationalError), (
+            'Проверьте, что при исчерпании пула поднимается OperationalError'
+        )
+        assert pool.get_stats()['databases']['pooled']['in_use'] == 2
+
+
+@pytest.mark.django_db
+class TestPoolMetrics:
+
+    def test_metrics_show_pools(self, admin_api_client, pooled):
+        pooled['pooled'].ensure_connection()
+        response = admin_api_client.get('/api/v1/metrics/')
+        pools = response.json()['db_pools']
+        assert pools['pid'] > 0
+        assert pools['databases']['pooled']['in_use'] == 1
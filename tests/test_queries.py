@@ -0,0 +1,47 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Genre, Title
+
+
+def create_titles(category, count):
+    genres = Genre.objects.all()
+    for i in range(count):
+        title = Title.objects.create(
+            name=f'Произведение {i}', year=2000, category=category
+        )
+        title.genre.set(genres)
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+class TestTitleQueries:
+
+    @pytest.fixture(autouse=True)
+    def genres(self):
+        return Genre.objects.bulk_create([
+            Genre(name='Ужасы', slug='horror'),
+            Genre(name='Фантастика', slug='sci-fi'),
+        ])
+
+    def test_title_list_constant_queries(self, client, category):
+        create_titles(category, 1)
+        single = count_queries(client, '/api/v1/titles/')
+        create_titles(category, 12)
+        full_page = count_queries(client, '/api/v1/titles/')
+        last_page = count_queries(client, '/api/v1/titles/?page=3')
+        assert single == full_page == last_page == 3, (
+            'Проверьте, что список произведений получает категории и жанры '
+            'без отдельного запроса на каждое произведение'
+        )
+
+    def test_title_detail_queries(self, client, category):
+        create_titles(category, 1)
+        title = Title.objects.get()
+        assert count_queries(client, f'/api/v1/titles/{title.pk}/') == 2
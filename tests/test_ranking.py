@@ -0,0 +1,127 @@
+import datetime
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from reviews.models import Review, Title, TitleRanking
+from reviews.rankings import ranked_title_ids, refresh_rankings
+from users.models import User
+
+TODAY = datetime.date(2026, 10, 1)
+
+
+@pytest.fixture
+def authors():
+    return [
+        User.objects.create(username=f'author{i}', email=f'a{i}@yamdb.fake')
+        for i in range(20)
+    ]
+
+
+def rate(title, authors, scores, pub_date=TODAY):
+    Review.objects.bulk_create([
+        Review(title=title, author=author, text='Отзыв', score=score)
+        for author, score in zip(authors, scores)
+    ])
+    Review.objects.filter(title=title).update(pub_date=pub_date)
+
+
+@pytest.mark.django_db
+class TestRankings:
+
+    def test_bayesian_score_needs_many_reviews(self, authors):
+        lucky = Title.objects.create(name='Один отзыв', year=2000)
+        classic = Title.objects.create(name='Классика', year=1950)
+        flop = Title.objects.create(name='Провал', year=1990)
+        rate(lucky, authors, [10])
+        rate(classic, authors, [9] * 20)
+        rate(flop, authors, [3] * 20)
+        refresh_rankings(today=TODAY)
+        assert [pk for pk, _ in ranked_title_ids('top', 10)] == [
+            classic.pk, lucky.pk, flop.pk
+        ], (
+            'Проверьте, что топ сглаживает рейтинг средней оценкой каталога '
+            'и единственный отзыв не выводит произведение на первое место'
+        )
+
+    def test_trending_decays_with_age(self, authors):
+        old = Title.objects.create(name='Старое', year=2000)
+        fresh = Title.objects.create(name='Свежее', year=2001)
+        quiet = Title.objects.create(name='Забытое', year=2002)
+        rate(old, authors, [8] * 6, TODAY - datetime.timedelta(days=14))
+        rate(fresh, authors, [8] * 3, TODAY)
+        rate(quiet, authors, [8] * 9, TODAY - datetime.timedelta(days=60))
+        refresh_rankings(today=TODAY)
+        ranked = ranked_title_ids('trending', 10)
+        assert [pk for pk, _ in ranked] == [fresh.pk, old.pk], (
+            'Проверьте, что в трендах вес отзыва затухает со временем, а '
+            'отзывы за пределами окна не учитываются'
+        )
+        assert ranked[1][1] == pytest.approx(6 * 0.25)
+
+    def test_command(self, reviews):
+        output = StringIO()
+        call_command('refresh_rankings', stdout=output)
+        assert 'Рейтинг пересчитан: 1' in output.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRankingUpdates:
+    """Взвешенный рейтинг обновляется после фиксации транзакции."""
+
+    def test_review_updates_score_incrementally(
+        self, user_client, title, reviews, authors
+    ):
+        refresh_rankings(today=TODAY)
+        before = TitleRanking.objects.get(title=title).bayesian_score
+        response = user_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/',
+            data={'text': 'Шедевр', 'score': 10}
+        )
+        assert response.status_code == 201
+        after = TitleRanking.objects.get(title=title).bayesian_score
+        assert after > before, (
+            'Проверьте, что новый отзыв сразу пересчитывает взвешенный '
+            'рейтинг произведения'
+        )
+        other = Title.objects.create(name='Новинка', year=2020)
+        rate(other, authors, [5])
+        assert TitleRanking.objects.filter(title=other).exists(), (
+            'Проверьте, что произведение попадает в таблицу рейтинга после '
+            'первого отзыва'
+        )
+        Review.objects.filter(title=other).delete()
+        assert not TitleRanking.objects.filter(title=other).exists()
+
+
+@pytest.mark.django_db
+class TestRankingEndpoints:
+
+    def test_top_and_trending(self, client, title, reviews, authors):
+        refresh_rankings()
+        response = client.get('/api/v1/titles/top/')
+        assert response.status_code == 200
+        data = response.json()
+        assert [item['id'] for item in data] == [title.pk]
+        assert data[0]['name'] == title.name
+        assert data[0]['genre'][0]['slug'] == 'horror'
+        assert 'score' in data[0], (
+            'Проверьте, что в ответе топа есть оценка произведения'
+        )
+        response = client.get('/api/v1/titles/trending/?limit=1')
+        assert [item['id'] for item in response.json()] == [title.pk]
+
+        other = Title.objects.create(name='Новинка', year=2020)
+        rate(other, authors, [10] * 20)
+        refresh_rankings()
+        response = client.get('/api/v1/titles/top/')
+        assert [item['id'] for item in response.json()] == [
+            other.pk, title.pk
+        ], 'Проверьте, что пересчёт таблицы сбрасывает кеш топа'
+
+    @pytest.mark.parametrize('limit', ['0', 'abc', '101'])
+    def test_invalid_limit(self, client, limit):
+        response = client.get(f'/api/v1/titles/top/?limit={limit}')
+        assert response.status_code == 400, (
+            'Проверьте, что неверный `limit` возвращает статус 400'
+        )
@@ -0,0 +1,50 @@
+import pytest
+from django.core.management import call_command
+from reviews.models import Review, Title
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def assert_rating(self, title, score_sum, review_count):
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (
+            score_sum, review_count
+        ), 'Проверьте, что сумма и количество оценок пересчитываются'
+        expected = score_sum / review_count if review_count else None
+        assert title.rating == expected, (
+            'Проверьте, что рейтинг равен средней оценке'
+        )
+
+    def test_review_create_update_delete(self, title, reviews):
+        self.assert_rating(title, 21, 3)
+        review = Review.objects.get(pk=reviews[0].pk)
+        review.score = 1
+        review.save()
+        self.assert_rating(title, 12, 3)
+        review.delete()
+        self.assert_rating(title, 11, 2)
+
+    def test_bulk_paths(self, title, reviews, users):
+        Review.objects.filter(pk=reviews[1].pk).update(score=10)
+        self.assert_rating(title, 24, 3)
+        Review.objects.bulk_create([
+            Review(title=title, author=users[3], text='Отзыв', score=2),
+        ])
+        self.assert_rating(title, 26, 4)
+        Review.objects.filter(score__gte=10).delete()
+        self.assert_rating(title, 6, 2)
+        users[2].delete()
+        self.assert_rating(title, 2, 1)
+
+    def test_recalculate_ratings_command(self, title, reviews):
+        Title.objects.filter(pk=title.pk).update(score_sum=0, review_count=0)
+        call_command('recalculate_ratings')
+        self.assert_rating(title, 21, 3)
+
+    def test_read_serializer_uses_stored_rating(self, client, title, reviews):
+        response = client.get(f'/api/v1/titles/{title.pk}/')
+        assert response.status_code == 200
+        assert response.json()['rating'] == 7, (
+            'Проверьте, что рейтинг произведения берётся из сохранённого поля'
+        )
@@ -0,0 +1,63 @@
+import datetime
+import decimal
+from io import BytesIO
+
+import pytest
+from api import renderers
+from api.renderers import FastJSONParser, FastJSONRenderer
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+DATA = {
+    'text': 'Жуткая история с продолжением',
+    'pub_date': datetime.date(2022, 9, 8),
+    'created': datetime.datetime(
+        2022, 9, 8, 17, 7, 53, 748123, tzinfo=datetime.timezone.utc
+    ),
+    'price': decimal.Decimal('9.90'),
+    'message': gettext_lazy('Not found.'),
+    1: [None, True, 1.5],
+}
+
+
+class TestFastJSON:
+
+    def test_same_output_as_drf(self):
+        assert FastJSONRenderer().render(DATA) == JSONRenderer().render(DATA), (
+            'Проверьте, что быстрый рендерер выдаёт тот же JSON, что и DRF'
+        )
+
+    def test_without_orjson(self, monkeypatch):
+        monkeypatch.setattr(renderers, 'orjson', None)
+        assert FastJSONRenderer().render(DATA) == JSONRenderer().render(DATA)
+        assert FastJSONParser().parse(BytesIO(b'{"a": 1}')) == {'a': 1}
+
+    def test_utf8_without_escapes(self):
+        body = FastJSONRenderer().render({'name': 'Хребты безумия'})
+        assert 'Хребты безумия'.encode() in body
+
+    def test_indent_falls_back(self):
+        rendered = FastJSONRenderer().render(
+            {'a': 1}, 'application/json; indent=2'
+        )
+        assert rendered == b'{\n  "a": 1\n}'
+
+    def test_parse(self):
+        body = '{"text": "Отзыв", "score": 9}'.encode()
+        assert FastJSONParser().parse(BytesIO(body)) == JSONParser().parse(
+            BytesIO(body)
+        )
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"text": '))
+
+
+@pytest.mark.django_db
+def test_api_uses_fast_json(user_client, title):
+    response = user_client.post(
+        f'/api/v1/titles/{title.pk}/reviews/',
+        data={'text': 'Очень страшно', 'score': 9}, format='json'
+    )
+    assert response.status_code == 201
+    assert 'Очень страшно'.encode() in response.content
@@ -0,0 +1,90 @@
+import pytest
+from api import routers
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import RequestFactory
+from reviews.models import Review, Title
+from users.models import User
+
+REPLICA = 'replica_1'
+
+
+@pytest.fixture
+def add_replica(settings):
+    def add(name):
+        connections.databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': name
+        }
+        connections.ensure_defaults(REPLICA)
+        settings.DATABASE_REPLICAS = [REPLICA]
+
+    yield add
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    del connections.databases[REPLICA]
+    routers._health.clear()
+
+
+@pytest.fixture
+def replica(add_replica, tmp_path, title):
+    add_replica(str(tmp_path / 'replica.sqlite3'))
+    call_command('migrate', database=REPLICA, verbosity=0)
+    # Реплика отстала: произведение уже есть, отзывов ещё нет.
+    Title.objects.using(REPLICA).bulk_create(
+        [Title(pk=title.pk, name='Устаревшее название', year=title.year)]
+    )
+    return REPLICA
+
+
+def review_count(client, title):
+    response = client.get(f'/api/v1/titles/{title.pk}/reviews/')
+    assert response.status_code == 200
+    return response.json()['count']
+
+
+@pytest.mark.django_db
+class TestReplicaRouting:
+
+    def test_safe_reads_use_replica(self, client, replica, title, reviews):
+        assert review_count(client, title) == 0, (
+            'Проверьте, что GET-запросы читают с реплики'
+        )
+        response = client.get(f'/api/v1/titles/{title.pk}/')
+        assert response.json()['name'] == title.name, (
+            'Проверьте, что ответы для кеша строятся по основной базе'
+        )
+
+    def test_author_reads_own_writes(self, client, user_client, replica,
+                                     title, reviews):
+        response = user_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/',
+            data={'text': 'Свежий отзыв', 'score': 5}
+        )
+        assert response.status_code == 201
+        assert Review.objects.filter(title=title).count() == 4
+        assert review_count(user_client, title) == 4, (
+            'Проверьте, что после записи автор читает с основной базы'
+        )
+        assert review_count(client, title) == 0
+
+    def test_unhealthy_replica_falls_back(self, client, add_replica,
+                                          tmp_path, title, reviews):
+        add_replica(str(tmp_path / 'missing' / 'replica.sqlite3'))
+        assert review_count(client, title) == 3, (
+            'Проверьте, что без живых реплик чтение идёт с основной базы'
+        )
+        assert routers.get_health() == {REPLICA: False}
+
+    def test_router(self, replica, reviews):
+        router = routers.ReplicaRouter()
+        routers.begin(RequestFactory().get('/api/v1/titles/'))
+        assert router.db_for_read(Review) == REPLICA
+        assert router.db_for_read(User) is None
+        with routers.use_primary():
+            assert router.db_for_read(Review) is None
+        stale = Title.objects.using(REPLICA).get()
+        assert router.db_for_write(Title, instance=stale) == DEFAULT_DB_ALIAS
+        assert router.allow_relation(stale, reviews[0])
+        routers.begin(RequestFactory().post('/api/v1/titles/'))
+        assert router.db_for_read(Review) is None
+        routers.end()
@@ -0,0 +1,121 @@
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Review, ScoreBucket, Title
+from reviews.scores import histogram_drift, score_stats
+
+
+def assert_consistent():
+    assert list(histogram_drift()) == [], (
+        'Проверьте, что гистограммы оценок поддерживаются при изменениях '
+        'отзывов'
+    )
+
+
+@pytest.mark.django_db
+class TestScoreHistogram:
+
+    def test_review_changes(self, title, reviews, users):
+        assert_consistent()
+        review = Review.objects.get(pk=reviews[0].pk)
+        review.score = 1
+        review.save()
+        assert_consistent()
+        other = Title.objects.create(name='Другое', year=2000)
+        review.title = other
+        review.save()
+        assert_consistent()
+        review.delete()
+        assert_consistent()
+        Review.objects.bulk_create([
+            Review(title=title, author=users[3], text='Отзыв', score=2),
+            Review(title=other, author=users[4], text='Отзыв', score=2),
+        ])
+        assert_consistent()
+        Review.objects.filter(pk=reviews[1].pk).update(score=10)
+        assert_consistent()
+        Review.objects.filter(score__gte=10).delete()
+        assert_consistent()
+        users[2].delete()
+        other.delete()
+        assert_consistent()
+
+    def test_stats(self):
+        counts = dict.fromkeys(range(1, 11), 0)
+        counts.update({4: 1, 7: 1, 10: 1})
+        stats = score_stats(counts)
+        assert stats['count'] == 3
+        assert stats['mean'] == 7
+        assert stats['median'] == 7
+        assert stats['stddev'] == pytest.approx(6 ** 0.5, abs=1e-4)
+        assert stats['percentiles']['p25'] == 5.5
+        assert stats['percentiles']['p90'] == pytest.approx(9.4)
+        assert stats['distribution'][3] == {'score': 4, 'count': 1}
+        empty = score_stats(dict.fromkeys(range(1, 11), 0))
+        assert empty['count'] == 0 and empty['median'] is None
+
+    def test_command(self, title, reviews):
+        ScoreBucket.objects.filter(title=title, score=10).delete()
+        output = StringIO()
+        call_command('rebuild_score_histograms', '--dry-run', stdout=output)
+        assert 'Расхождений: 1' in output.getvalue()
+        assert list(histogram_drift()), (
+            'Проверьте, что --dry-run ничего не сохраняет'
+        )
+        call_command('rebuild_score_histograms', stdout=StringIO())
+        assert_consistent()
+
+
+@pytest.mark.django_db
+class TestScoreStatsEndpoints:
+
+    def test_stats_endpoint(self, client, title, reviews):
+        response = client.get(f'/api/v1/titles/{title.pk}/stats/')
+        assert response.status_code == 200
+        data = response.json()
+        assert (data['count'], data['median']) == (3, 7), (
+            'Проверьте, что эндпоинт статистики считает медиану по отзывам'
+        )
+        assert len(data['distribution']) == 10
+        response = client.get('/api/v1/titles/999/stats/')
+        assert response.status_code == 404
+
+    def test_optional_serializer_field(self, client, title, reviews):
+        response = client.get(f'/api/v1/titles/{title.pk}/')
+        assert 'stats' not in response.json(), (
+            'Проверьте, что статистика отдаётся только по запросу'
+        )
+        response = client.get(f'/api/v1/titles/{title.pk}/?stats=true')
+        assert response.json()['stats']['mean'] == 7
+
+    def test_list_stats_constant_queries(self, client, category, users):
+        def list_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get('/api/v1/titles/?stats=1')
+            assert all('stats' in item for item in response.json()['results'])
+            return len(queries)
+
+        for index in range(2):
+            title = Title.objects.create(
+                name=f'Произведение {index}', year=2000, category=category
+            )
+            Review.objects.create(
+                title=title, author=users[index], text='Отзыв', score=5
+            )
+        list_queries()
+        expected = list_queries()
+        for index in range(2, 4):
+            title = Title.objects.create(
+                name=f'Произведение {index}', year=2000, category=category
+            )
+            Review.objects.create(
+                title=title, author=users[index], text='Отзыв', score=5
+            )
+        assert list_queries() == expected, (
+            'Проверьте, что гистограммы списка загружаются одним запросом'
+        )
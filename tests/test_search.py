@@ -0,0 +1,48 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews import search
+from reviews.models import Title
+
+
+def names(client, query):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(f'/api/v1/titles/?{query}')
+    assert response.status_code == 200
+    sql = ' '.join(item['sql'] for item in context.captured_queries)
+    return sorted(title['name'] for title in response.json()['results']), sql
+
+
+@pytest.mark.django_db
+class TestNameFilter:
+
+    @pytest.fixture(autouse=True)
+    def titles(self, title):
+        Title.objects.create(name='Безумный Макс', year=1979)
+        Title.objects.create(name='Дагон', year=1919,
+                             description='Безумие моряка')
+
+    def test_index_search(self, client):
+        if not search.fts_available(connection):
+            pytest.skip('Нет индекса FTS5')
+        found, sql = names(client, 'name=безум')
+        assert found == ['Безумный Макс', 'Хребты безумия'], (
+            'Проверьте, что фильтр по названию ищет только в названии'
+        )
+        assert 'MATCH' in sql, (
+            'Проверьте, что фильтр по названию идёт через индекс FTS5'
+        )
+        assert names(client, 'name=хребты безум')[0] == ['Хребты безумия']
+        assert names(client, 'name=!!!')[0] == []
+        assert names(client, 'search=безум&name=макс')[0] == [
+            'Безумный Макс'
+        ], 'Проверьте, что фильтр по названию сочетается с поиском'
+        response = client.get('/api/v1/titles/facets/?name=безум')
+        assert response.status_code == 200
+
+    def test_like_search(self, client, monkeypatch):
+        # Так фильтр работает на PostgreSQL: LIKE по индексу pg_trgm.
+        monkeypatch.setattr(search, 'fts_available', lambda connection: False)
+        found, sql = names(client, 'name=Безум')
+        assert found == ['Безумный Макс']
+        assert 'MATCH' not in sql
@@ -0,0 +1,94 @@
+import gzip
+import json
+
+import brotli
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Title
+
+
+def read_stream(response):
+    assert response.streaming, 'Проверьте, что ответ отдаётся потоком'
+    return b''.join(response.streaming_content)
+
+
+@pytest.fixture
+def titles(category, genre):
+    titles = [
+        Title.objects.create(name=f'Произведение {i}', year=2000,
+                             category=category)
+        for i in range(7)
+    ]
+    for title in titles:
+        title.genre.add(genre)
+    return titles
+
+
+@pytest.mark.django_db
+class TestStreamingLists:
+
+    @pytest.fixture(autouse=True)
+    def small_chunks(self, settings):
+        settings.API_STREAM_CHUNK_SIZE = 3
+
+    def test_titles_json_array(self, client, titles):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/?stream=json')
+            data = json.loads(read_stream(response))
+        assert response['Content-Type'] == 'application/json'
+        assert [title['name'] for title in data] == sorted(
+            title.name for title in titles
+        )
+        assert data[0]['genre'] == [{'name': 'Ужасы', 'slug': 'horror'}]
+        assert len(context.captured_queries) == 3 * 2, (
+            'Проверьте, что список читается пачками с подгрузкой жанров'
+        )
+        assert 'X-Cache' not in response
+
+    def test_reviews_ndjson(self, client, title, reviews):
+        response = client.get(
+            f'/api/v1/titles/{title.pk}/reviews/?stream=ndjson'
+        )
+        assert response['Content-Type'] == 'application/x-ndjson'
+        lines = read_stream(response).decode().splitlines()
+        paginated = client.get(
+            f'/api/v1/titles/{title.pk}/reviews/'
+        ).json()['results']
+        assert [json.loads(line) for line in lines] == paginated
+
+    @pytest.mark.parametrize('accept, encoding, decompress', [
+        ('gzip', 'gzip', gzip.decompress),
+        ('gzip;q=0.5, br', 'br', brotli.decompress),
+        ('br;q=0, gzip', 'gzip', gzip.decompress),
+    ])
+    def test_compression(self, client, titles, accept, encoding,
+                         decompress):
+        response = client.get(
+            '/api/v1/titles/?stream=json', HTTP_ACCEPT_ENCODING=accept
+        )
+        assert response['Content-Encoding'] == encoding
+        assert 'Accept-Encoding' in response['Vary']
+        data = json.loads(decompress(read_stream(response)))
+        assert len(data) == len(titles)
+
+    def test_empty_and_missing(self, client, title):
+        response = client.get(f'/api/v1/titles/{title.pk}/reviews/?stream=json')
+        assert json.loads(read_stream(response)) == []
+        assert client.get(
+            '/api/v1/titles/0/reviews/?stream=json'
+        ).status_code == 404
+        assert client.get('/api/v1/titles/?stream=xml').status_code == 400
+
+    def test_comments_stream(self, client, title, reviews, users):
+        review = reviews[0]
+        for user in users:
+            review.comments.create(author=user, text=user.username)
+        response = client.get(
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+            '?stream=json'
+        )
+        data = json.loads(read_stream(response))
+        assert [comment['text'] for comment in data] == [
+            user.username for user in users
+        ]
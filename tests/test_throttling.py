@@ -0,0 +1,105 @@
+import time
+
+import pytest
+from api import throttling
+from api.middleware import AdmissionControlMiddleware
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
+from rest_framework.test import APIClient
+
+
+class TestTokenBucket:
+
+    def test_parse_rate(self):
+        assert throttling.parse_rate('5/hour') == (5, 5 / 3600)
+        assert throttling.parse_rate('30/m') == (30, 0.5)
+
+    def test_burst_and_refill(self):
+        take = [throttling.take_token('test:bucket', 2, 1.0, now=100.0)
+                for _ in range(3)]
+        assert [allowed for allowed, _ in take] == [True, True, False]
+        assert take[2][1] == pytest.approx(1.0)
+        assert throttling.take_token('test:bucket', 2, 1.0, now=101.0)[0], (
+            'Проверьте, что корзина пополняется со временем'
+        )
+        assert not throttling.take_token(
+            'test:bucket', 2, 1.0, now=101.5
+        )[0]
+
+
+@pytest.mark.django_db
+class TestThrottledEndpoints:
+
+    def signup(self, client, number, address='10.0.0.1'):
+        return client.post('/api/v1/auth/signup/', data={
+            'username': f'user{number}', 'email': f'user{number}@yamdb.fake'
+        }, HTTP_X_FORWARDED_FOR=address)
+
+    def test_signup_by_ip(self, client, settings):
+        settings.API_THROTTLE_RATES = dict(
+            settings.API_THROTTLE_RATES, signup='2/hour'
+        )
+        assert self.signup(client, 1).status_code == 200
+        assert self.signup(client, 2).status_code == 200
+        response = self.signup(client, 3)
+        assert response.status_code == 429
+        assert int(response['Retry-After']) > 0
+        assert self.signup(client, 4, '10.0.0.2').status_code == 200, (
+            'Проверьте, что корзины считаются по IP клиента'
+        )
+        assert throttling.get_stats()['throttled:signup'] >= 1
+
+    def test_review_writes_by_user(self, user_client, admin_api_client,
+                                   reviews, settings):
+        settings.API_THROTTLE_RATES = dict(
+            settings.API_THROTTLE_RATES, review_write='2/minute'
+        )
+        review = reviews[0]
+        url = (f'/api/v1/titles/{review.title_id}/reviews/{review.pk}'
+               '/comments/')
+        for _ in range(2):
+            assert user_client.post(
+                url, data={'text': 'Комментарий'}
+            ).status_code == 201
+        assert user_client.post(
+            url, data={'text': 'Лишний'}
+        ).status_code == 429
+        assert user_client.get(url).status_code == 200, (
+            'Проверьте, что чтение не ограничивается корзиной записи'
+        )
+        assert admin_api_client.post(
+            url, data={'text': 'Комментарий'}
+        ).status_code == 201
+
+
+@pytest.mark.django_db
+class TestAdmissionControl:
+
+    def test_queue_time(self, settings):
+        settings.API_ADMISSION_MAX_QUEUE_MS = 500
+        client = Client()
+        response = client.get(
+            '/api/v1/genres/', HTTP_X_REQUEST_START=f't={time.time() - 2}'
+        )
+        assert response.status_code == 503
+        assert response['Retry-After'] == '1'
+        assert client.get(
+            '/api/v1/genres/', HTTP_X_REQUEST_START=f't={time.time()}'
+        ).status_code == 200
+        assert APIClient().get('/api/v1/genres/').status_code == 200
+
+    def test_concurrency(self, settings):
+        settings.API_ADMISSION_MAX_CONCURRENT = 1
+        request = RequestFactory().get('/api/v1/genres/')
+        nested = []
+
+        def get_response(request):
+            nested.append(middleware(request).status_code)
+            return HttpResponse()
+
+        middleware = AdmissionControlMiddleware(get_response)
+        assert middleware(request).status_code == 200
+        assert nested == [503], (
+            'Проверьте, что запросы сверх лимита отбрасываются'
+        )
+        assert throttling.get_stats()['shed:concurrency'] >= 1